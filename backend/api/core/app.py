@@ -12,6 +12,7 @@ src_path = project_root / "src"
 sys.path.insert(0, str(src_path))
 
 from config.config_manager import ConfigManager
+from clients.gitlab.async_gitlab_client import AsyncGitLabClient
 from .middleware import setup_middleware
 from .exception_handlers import setup_exception_handlers
 from .dependencies import get_config
@@ -23,7 +24,8 @@ from ..endpoints import (
     config_api,
     health_api,
     project_pipeline_api,
-    llm_api
+    llm_api,
+    webhook_api
 )
 
 def create_app() -> FastAPI:
@@ -65,6 +67,11 @@ def create_app() -> FastAPI:
     app.include_router(health_api.router, prefix="/api/v1", tags=["health"])
     app.include_router(project_pipeline_api.router, prefix="/api/v1", tags=["project-pipeline"])
     app.include_router(llm_api.router, prefix="/api/v1", tags=["llm"])
+    app.include_router(webhook_api.router, prefix="/api/v1", tags=["webhooks"])
+
+    @app.on_event("shutdown")
+    async def close_gitlab_connections():
+        await AsyncGitLabClient.aclose()
 
     # Serve static files if frontend build exists
     frontend_build = project_root / "frontend" / "build"
@@ -14,6 +14,7 @@ from services.web.session_service import SessionService
 from services.web.workflow_service import WorkflowService
 from services.web.gitlab_proxy_service import GitLabProxyService
 from services.web.pipeline_monitor_service import PipelineMonitorService
+from services.web.ci_status_service import CIStatusService
 
 # Global instances
 _config: Optional[AppConfig] = None
@@ -21,6 +22,7 @@ _session_service: Optional[SessionService] = None
 _workflow_service: Optional[WorkflowService] = None
 _gitlab_proxy_service: Optional[GitLabProxyService] = None
 _pipeline_monitor_service: Optional[PipelineMonitorService] = None
+_ci_status_service: Optional[CIStatusService] = None
 
 def get_config() -> AppConfig:
     global _config
@@ -63,4 +65,10 @@ def get_pipeline_monitor_service(
     global _pipeline_monitor_service
     if _pipeline_monitor_service is None:
         _pipeline_monitor_service = PipelineMonitorService(config, gitlab_service)
-    return _pipeline_monitor_service
\ No newline at end of file
+    return _pipeline_monitor_service
+
+def get_ci_status_service(config: AppConfig = Depends(get_config)) -> CIStatusService:
+    global _ci_status_service
+    if _ci_status_service is None:
+        _ci_status_service = CIStatusService(config)
+    return _ci_status_service
@@ -4,6 +4,13 @@ import time
 import uuid
 from typing import Callable
 import logging
+import sys
+from pathlib import Path
+# Add src to path
+project_root = Path(__file__).parent.parent.parent.parent
+src_path = project_root / "src"
+sys.path.insert(0, str(src_path))
+from clients.gitlab.rate_limiter import RequestPriority, request_priority
 logger = logging.getLogger("api.middleware")
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
@@ -27,6 +34,12 @@ class SessionMiddleware(BaseHTTPMiddleware):
             request.state.session_id = session_id
         response = await call_next(request)
         return response
+class GitLabPriorityMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        # GitLab calls made while serving a UI request go ahead of background polling
+        with request_priority(RequestPriority.INTERACTIVE):
+            return await call_next(request)
 def setup_middleware(app: FastAPI):
     app.add_middleware(RequestLoggingMiddleware)
+    app.add_middleware(GitLabPriorityMiddleware)
     app.add_middleware(SessionMiddleware)
\ No newline at end of file
@@ -7,7 +7,8 @@ from . import (
     config_api,
     health_api,
     project_pipeline_api,
-    llm_api
+    llm_api,
+    webhook_api
 )
 
 __all__ = [
@@ -18,5 +19,6 @@ __all__ = [
     "config_api",
     "health_api",
     "project_pipeline_api",
-    "llm_api"
+    "llm_api",
+    "webhook_api"
 ]
\ No newline at end of file
@@ -1,14 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
+import asyncio
 import sys
 from pathlib import Path
 # Add src to path
 project_root = Path(__file__).parent.parent.parent.parent
 src_path = project_root / "src"
 sys.path.insert(0, str(src_path))
-from clients.gitlab.project_client import ProjectClient
-from clients.gitlab.merge_request_client import MergeRequestClient
-from clients.gitlab.pipeline_client import PipelineClient
-from clients.gitlab.job_client import JobClient
+from clients.gitlab.async_project_client import AsyncProjectClient
+from clients.gitlab.async_merge_request_client import AsyncMergeRequestClient
+from clients.gitlab.async_job_client import AsyncJobClient
+from clients.gitlab.pipeline_watcher import known_job_status
+from services.web.ci_status_service import CIStatusService, ProjectNotFound, MergeRequestNotFound
+from services.web.trace_stream import trace_chunk_response, trace_response
+from ..core.dependencies import get_ci_status_service
 router = APIRouter()
 @router.get("/projects/{project_name}")
 async def get_project_info(project_name: str):
@@ -16,8 +21,8 @@ async def get_project_info(project_name: str):
     try:
         # URL decode project name
         actual_project_name = project_name.replace('%2F', '/')
-        project_client = ProjectClient()
-        project = project_client.get_project_by_name(actual_project_name)
+        project_client = AsyncProjectClient()
+        project = await project_client.get_project_by_name(actual_project_name)
         if not project:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -30,6 +35,8 @@ async def get_project_info(project_name: str):
             "web_url": project.web_url,
             "default_branch": project.default_branch
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -42,16 +49,16 @@ async def get_merge_request_info(project_name: str, mr_id: int):
         # URL decode project name
         actual_project_name = project_name.replace('%2F', '/')
         # First get project
-        project_client = ProjectClient()
-        project = project_client.get_project_by_name(actual_project_name)
+        project_client = AsyncProjectClient()
+        project = await project_client.get_project_by_name(actual_project_name)
         if not project:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Project '{actual_project_name}' not found"
             )
         # Then get MR
-        mr_client = MergeRequestClient()
-        mr = mr_client.get_merge_request(project.id, mr_id)
+        mr_client = AsyncMergeRequestClient()
+        mr = await mr_client.get_merge_request(project.id, mr_id)
         if not mr:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -87,23 +94,24 @@ async def get_merge_request_pipelines(project_name: str, mr_id: int):
         # URL decode project name
         actual_project_name = project_name.replace('%2F', '/')
         # First get project
-        project_client = ProjectClient()
-        project = project_client.get_project_by_name(actual_project_name)
+        project_client = AsyncProjectClient()
+        project = await project_client.get_project_by_name(actual_project_name)
         if not project:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Project '{actual_project_name}' not found"
             )
-        # Get MR to validate it exists
-        mr_client = MergeRequestClient()
-        mr = mr_client.get_merge_request(project.id, mr_id)
+        # The MR (validation) and its pipelines only depend on the project id
+        mr_client = AsyncMergeRequestClient()
+        mr, pipelines = await asyncio.gather(
+            mr_client.get_merge_request(project.id, mr_id),
+            mr_client.get_merge_request_pipelines(project.id, mr_id)
+        )
         if not mr:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Merge Request {mr_id} not found in project '{actual_project_name}'"
             )
-        # Get pipelines for the MR
-        pipelines = mr_client.get_merge_request_pipelines(project.id, mr.iid)
         pipeline_list = []
         for pipeline in pipelines:
             pipeline_list.append({
@@ -131,102 +139,69 @@ async def get_merge_request_pipelines(project_name: str, mr_id: int):
             detail=f"Failed to get merge request pipelines: {str(e)}"
         )
 @router.get("/projects/{project_name}/merge_requests/{mr_id}/ci_status")
-async def get_merge_request_ci_status(project_name: str, mr_id: int):
+async def get_merge_request_ci_status(
+    project_name: str,
+    mr_id: int,
+    ci_status_service: CIStatusService = Depends(get_ci_status_service)
+):
     """Get comprehensive CI status for a merge request"""
+    # URL decode project name
+    actual_project_name = project_name.replace('%2F', '/')
     try:
-        # URL decode project name
-        actual_project_name = project_name.replace('%2F', '/')
-        # Get project
-        project_client = ProjectClient()
-        project = project_client.get_project_by_name(actual_project_name)
-        if not project:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Project '{actual_project_name}' not found"
-            )
-        # Get MR
-        mr_client = MergeRequestClient()
-        mr = mr_client.get_merge_request(project.id, mr_id)
-        if not mr:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Merge Request {mr_id} not found in project '{actual_project_name}'"
-            )
-        # Get latest pipeline for this MR
-        latest_pipeline = mr_client.get_latest_mr_pipeline(project.id, mr.iid)
-        ci_status = {
-            "merge_request": {
-                "id": mr.id,
-                "iid": mr.iid,
-                "title": mr.title,
-                "state": mr.state,
-                "source_branch": mr.source_branch,
-                "target_branch": mr.target_branch,
-                "web_url": mr.web_url
-            },
-            "pipeline": None,
-            "jobs": [],
-            "overall_status": "no_pipeline"
-        }
-        if latest_pipeline:
-            pipeline_client = PipelineClient()
-            job_client = JobClient()
-            # Get pipeline details
-            pipeline_details = pipeline_client.get_pipeline(project.id, latest_pipeline["id"])
-            # Get jobs for this pipeline
-            jobs = job_client.list_jobs(project.id, latest_pipeline["id"])
-            ci_status.update({
-                "pipeline": {
-                    "id": pipeline_details.id,
-                    "status": pipeline_details.status,
-                    "ref": pipeline_details.ref,
-                    "web_url": pipeline_details.web_url,
-                    "created_at": getattr(pipeline_details, 'created_at', None),
-                    "updated_at": getattr(pipeline_details, 'updated_at', None)
-                },
-                "jobs": [
-                    {
-                        "id": job.id,
-                        "name": job.name,
-                        "status": job.status,
-                        "stage": job.stage,
-                        "started_at": job.started_at,
-                        "finished_at": job.finished_at,
-                        "web_url": getattr(job, 'web_url', None)
-                    } for job in jobs
-                ],
-                "overall_status": pipeline_details.status
-            })
-        return ci_status
-    except HTTPException:
-        raise
+        return await ci_status_service.get_ci_status(actual_project_name, mr_id)
+    except ProjectNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Project '{actual_project_name}' not found"
+        )
+    except MergeRequestNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Merge Request {mr_id} not found in project '{actual_project_name}'"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get CI status: {str(e)}"
         )
 @router.get("/projects/{project_name}/pipelines/{pipeline_id}/jobs/{job_id}/trace")
-async def get_job_trace(project_name: str, pipeline_id: int, job_id: int):
-    """Get job trace/logs"""
+async def get_job_trace(
+    project_name: str,
+    pipeline_id: int,
+    job_id: int,
+    offset: Optional[int] = Query(None, ge=0),
+    normalize: bool = Query(False),
+    raw: bool = Query(False),
+    job_status: Optional[str] = Query(None, alias="status")
+):
+    """
+    Get job trace/logs, streamed from GitLab; with ?offset=N only the bytes after N are returned, plus next_offset.
+    ?raw=true streams plain text instead of JSON, ?normalize=true strips ANSI codes and section markers.
+    ?status=<job status> passes a status the client already knows, so finished traces are archived.
+    """
     try:
         # URL decode project name
         actual_project_name = project_name.replace('%2F', '/')
         # Get project
-        project_client = ProjectClient()
-        project = project_client.get_project_by_name(actual_project_name)
+        project_client = AsyncProjectClient()
+        project = await project_client.get_project_by_name(actual_project_name)
         if not project:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Project '{actual_project_name}' not found"
             )
         # Get job trace
-        job_client = JobClient()
-        trace = job_client.get_job_trace(project.id, job_id)
-        return {
-            "job_id": job_id,
-            "pipeline_id": pipeline_id,
-            "trace": trace
-        }
+        job_client = AsyncJobClient()
+        job_status = job_status or known_job_status(project.id, job_id)
+        if offset is not None:
+            chunk = await job_client.get_job_trace_since(project.id, job_id, offset, status=job_status)
+            return trace_chunk_response(chunk, envelope={"job_id": job_id, "pipeline_id": pipeline_id})
+        return await trace_response(
+            job_client.stream_job_trace(project.id, job_id, status=job_status),
+            normalize,
+            raw,
+            envelope={"job_id": job_id, "pipeline_id": pipeline_id}
+        )
     except HTTPException:
         raise
     except Exception as e:
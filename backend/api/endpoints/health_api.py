@@ -10,6 +10,14 @@ src_path = project_root / "src"
 sys.path.insert(0, str(src_path))
 
 from config.config_models import AppConfig
+from clients.gitlab import gitlab_client, async_gitlab_client
+from clients.gitlab.rate_limiter import get_rate_limiter
+from clients.gitlab.trace_archive import get_trace_archive
+from clients.gitlab.pipeline_result_store import get_pipeline_result_store
+from clients.gitlab.superseded_pipelines import superseded_pipelines
+from clients.gitlab.pipeline_events import pipeline_events
+from clients.gitlab.pipeline_watcher import pipeline_watcher
+from clients.cassette import get_cassette
 from ..core.dependencies import get_config
 
 router = APIRouter()
@@ -51,6 +59,19 @@ async def detailed_health_check(config: AppConfig = Depends(get_config)):
         except:
             health_data["services"]["gitlab_api"] = "error"
 
+        # Request coalescing counters for GitLab GETs
+        health_data["gitlab_request_coalescing"] = {
+            "sync": gitlab_client.request_flight.stats(),
+            "async": async_gitlab_client.request_flight.stats()
+        }
+        health_data["gitlab_rate_limiter"] = get_rate_limiter().stats()
+        health_data["trace_archive"] = get_trace_archive(config.gitlab_api).stats()
+        health_data["gitlab_webhooks"] = pipeline_events.stats()
+        health_data["pipeline_watcher"] = pipeline_watcher.stats()
+        health_data["pipeline_results"] = get_pipeline_result_store(config.gitlab_api).stats()
+        health_data["superseded_pipelines"] = superseded_pipelines.stats()
+        health_data["http_cassette"] = get_cassette(config).stats()
+
         # Test LLM service connectivity
         try:
             llm_url = config.services.llm_url
@@ -1,8 +1,8 @@
 # backend/api/endpoints/llm_api.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import sys
 from pathlib import Path
 import json
@@ -13,8 +13,10 @@ src_path = project_root / "src"
 sys.path.insert(0, str(src_path))
 
 from clients.llm.llm_client import LLMClient
-from clients.gitlab.job_client import JobClient
+from clients.gitlab.async_job_client import AsyncJobClient
+from clients.gitlab.pipeline_watcher import known_job_status
 from config.config_models import AppConfig
+from services.web.trace_stream import trace_response
 from ..core.dependencies import get_config
 
 router = APIRouter()
@@ -32,8 +34,9 @@ async def analyze_logs_stream(
         
         if not logs and project_id and job_id:
             # 如果没有直接提供日志，从GitLab获取
-            job_client = JobClient()
-            logs = job_client.get_job_trace(project_id, job_id)
+            job_client = AsyncJobClient()
+            job_status = request.get("job_status") or known_job_status(project_id, job_id)
+            logs = await job_client.get_job_trace(project_id, job_id, status=job_status)
         
         if not logs:
             raise HTTPException(
@@ -114,13 +117,15 @@ async def fix_code_stream(
 async def get_job_logs(
     project_id: int,
     job_id: int,
+    job_status: Optional[str] = Query(None, alias="status"),
     config: AppConfig = Depends(get_config)
 ):
-    """获取Job日志"""
+    """获取Job日志（流式转发，不在内存中缓存完整日志；已结束 Job 的日志写入归档，?status= 可传入已知的 Job 状态）"""
     try:
-        job_client = JobClient()
-        logs = job_client.get_job_trace(project_id, job_id)
-        return {"logs": logs}
+        job_client = AsyncJobClient()
+        job_status = job_status or known_job_status(project_id, job_id)
+        return await trace_response(job_client.stream_job_trace(project_id, job_id, status=job_status),
+                                    envelope={}, field="logs")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
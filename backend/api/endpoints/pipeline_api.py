@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from typing import Optional
 import sys
 from pathlib import Path
@@ -10,6 +10,7 @@ sys.path.insert(0, str(src_path))
 
 from models.web.api_models import PipelineStatusResponse, JobStatusResponse
 from services.web.pipeline_monitor_service import PipelineMonitorService
+from services.web.trace_stream import trace_chunk_response, trace_response
 from ..core.dependencies import get_pipeline_monitor_service
 
 router = APIRouter()
@@ -21,7 +22,7 @@ async def get_pipeline_status(
 ):
     """Get current pipeline status for a session"""
     try:
-        status_info = pipeline_service.get_pipeline_status(session_id)
+        status_info = await pipeline_service.get_pipeline_status(session_id)
         return status_info
     except Exception as e:
         raise HTTPException(
@@ -36,7 +37,7 @@ async def get_job_statuses(
 ):
     """Get job statuses for a session's pipeline"""
     try:
-        jobs = pipeline_service.get_job_statuses(session_id)
+        jobs = await pipeline_service.get_job_statuses(session_id)
         return jobs
     except Exception as e:
         raise HTTPException(
@@ -51,7 +52,7 @@ async def monitor_pipeline(
 ):
     """Get comprehensive pipeline monitoring data"""
     try:
-        monitor_data = pipeline_service.get_monitor_data(session_id)
+        monitor_data = await pipeline_service.get_monitor_data(session_id)
         return monitor_data
     except Exception as e:
         raise HTTPException(
@@ -62,11 +63,12 @@ async def monitor_pipeline(
 @router.post("/pipeline/{session_id}/retry")
 async def retry_failed_jobs(
     session_id: str,
+    infra_only: bool = Query(False, description="Only retry runner/network/resource failures"),
     pipeline_service: PipelineMonitorService = Depends(get_pipeline_monitor_service)
 ):
     """Retry failed jobs in the pipeline"""
     try:
-        result = pipeline_service.retry_failed_jobs(session_id)
+        result = await pipeline_service.retry_failed_jobs(session_id, infra_only=infra_only)
         return {"status": "retrying", "message": "Failed jobs retry initiated", "data": result}
     except Exception as e:
         raise HTTPException(
@@ -78,12 +80,27 @@ async def retry_failed_jobs(
 async def get_job_trace(
     session_id: str,
     job_id: int,
+    offset: Optional[int] = Query(None, ge=0),
+    normalize: bool = Query(False),
+    raw: bool = Query(False),
+    job_status: Optional[str] = Query(None, alias="status"),
     pipeline_service: PipelineMonitorService = Depends(get_pipeline_monitor_service)
 ):
-    """Get trace output for a specific job"""
+    """
+    Get trace output for a specific job, streamed from GitLab; with ?offset=N only the bytes after N are returned.
+    ?raw=true streams plain text instead of JSON, ?normalize=true strips ANSI codes and section markers.
+    ?status=<job status> passes a status the client already knows, so finished traces are archived.
+    """
     try:
-        trace = pipeline_service.get_job_trace(session_id, job_id)
-        return {"job_id": job_id, "trace": trace}
+        if offset is not None:
+            chunk = await pipeline_service.get_job_trace_since(session_id, job_id, offset, job_status)
+            return trace_chunk_response(chunk, envelope={"job_id": job_id})
+        return await trace_response(
+            pipeline_service.stream_job_trace(session_id, job_id, job_status),
+            normalize,
+            raw,
+            envelope={"job_id": job_id}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Dict, Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Dict, Any, List, Optional
+import asyncio
 import sys
 from pathlib import Path
 # Add src to path
 project_root = Path(__file__).parent.parent.parent.parent
 src_path = project_root / "src"
 sys.path.insert(0, str(src_path))
-from clients.gitlab.project_client import ProjectClient
-from clients.gitlab.pipeline_client import PipelineClient
-from clients.gitlab.job_client import JobClient
-from clients.gitlab.merge_request_client import MergeRequestClient
+from clients.gitlab.async_project_client import AsyncProjectClient
+from clients.gitlab.async_pipeline_client import AsyncPipelineClient
+from clients.gitlab.async_job_client import AsyncJobClient
+from clients.gitlab.async_merge_request_client import AsyncMergeRequestClient
+from clients.gitlab.job_duration_store import get_job_duration_store
+from clients.gitlab.pipeline_watcher import known_job_status
+from config.config_models import AppConfig
+from services.web.trace_stream import trace_chunk_response, trace_response
+from ..core.dependencies import get_config
 router = APIRouter()
 @router.get("/projects/{project_path}")
 async def get_project_info(project_path: str):
@@ -17,8 +23,8 @@ async def get_project_info(project_path: str):
     try:
         # URL decode project path
         actual_project_path = project_path.replace('%2F', '/')
-        project_client = ProjectClient()
-        project = project_client.get_project_by_name(actual_project_path)
+        project_client = AsyncProjectClient()
+        project = await project_client.get_project_by_name(actual_project_path)
         if not project:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -32,6 +38,8 @@ async def get_project_info(project_path: str):
             "default_branch": project.default_branch,
             "visibility": project.visibility
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -41,11 +49,9 @@ async def get_project_info(project_path: str):
 async def get_project_pipelines(project_id: int, per_page: int = 10, ref: str = None):
     """Get pipelines for a project"""
     try:
-        pipeline_client = PipelineClient()
+        pipeline_client = AsyncPipelineClient()
         params = {"per_page": per_page}
-        if ref:
-            params["ref"] = ref
-        pipelines = pipeline_client.list_pipelines(project_id, ref, params)
+        pipelines = await pipeline_client.list_pipelines(project_id, ref, params, limit=per_page)
         return [
             {
                 "id": pipeline.id,
@@ -67,8 +73,8 @@ async def get_project_pipelines(project_id: int, per_page: int = 10, ref: str =
 async def get_pipeline_info(project_id: int, pipeline_id: int):
     """Get specific pipeline information"""
     try:
-        pipeline_client = PipelineClient()
-        pipeline = pipeline_client.get_pipeline(project_id, pipeline_id)
+        pipeline_client = AsyncPipelineClient()
+        pipeline = await pipeline_client.get_pipeline(project_id, pipeline_id)
         return {
             "id": pipeline.id,
             "status": pipeline.status,
@@ -87,8 +93,8 @@ async def get_pipeline_info(project_id: int, pipeline_id: int):
 async def get_pipeline_jobs(project_id: int, pipeline_id: int):
     """Get jobs for a specific pipeline"""
     try:
-        job_client = JobClient()
-        jobs = job_client.list_jobs(project_id, pipeline_id)
+        job_client = AsyncJobClient()
+        jobs = await job_client.list_jobs(project_id, pipeline_id)
         return [
             {
                 "id": job.id,
@@ -98,7 +104,10 @@ async def get_pipeline_jobs(project_id: int, pipeline_id: int):
                 "ref": job.ref,
                 "started_at": job.started_at,
                 "finished_at": job.finished_at,
-                "web_url": job.web_url
+                "web_url": job.web_url,
+                "duration": job.duration,
+                "queued_duration": job.queued_duration,
+                "allow_failure": job.allow_failure
             }
             for job in jobs
         ]
@@ -107,12 +116,23 @@ async def get_pipeline_jobs(project_id: int, pipeline_id: int):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get pipeline jobs: {str(e)}"
         )
+@router.get("/projects/{project_id}/job-durations")
+async def get_job_durations(project_id: int, config: AppConfig = Depends(get_config)):
+    """Historical duration percentiles and median queue time per job name, as recorded by the pipeline monitors"""
+    try:
+        store = get_job_duration_store(config.gitlab_api)
+        return await asyncio.to_thread(store.summary, project_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get job durations: {str(e)}"
+        )
 @router.get("/projects/{project_id}/jobs/{job_id}")
 async def get_job_info(project_id: int, job_id: int):
     """Get specific job information"""
     try:
-        job_client = JobClient()
-        job = job_client.get_job_details(project_id, job_id)
+        job_client = AsyncJobClient()
+        job = await job_client.get_job_details(project_id, job_id)
         return {
             "id": job.id,
             "name": job.name,
@@ -129,12 +149,26 @@ async def get_job_info(project_id: int, job_id: int):
             detail=f"Job {job_id} not found: {str(e)}"
         )
 @router.get("/projects/{project_id}/jobs/{job_id}/trace")
-async def get_job_trace(project_id: int, job_id: int):
-    """Get job trace/logs"""
+async def get_job_trace(
+    project_id: int,
+    job_id: int,
+    offset: Optional[int] = Query(None, ge=0),
+    normalize: bool = Query(False),
+    raw: bool = Query(False),
+    job_status: Optional[str] = Query(None, alias="status")
+):
+    """
+    Get job trace/logs, streamed from GitLab; with ?offset=N only the bytes after N are returned, plus next_offset.
+    ?raw=true streams plain text instead of a JSON string, ?normalize=true strips ANSI codes and section markers.
+    ?status=<job status> passes a status the client already knows, so finished traces are archived.
+    """
     try:
-        job_client = JobClient()
-        trace = job_client.get_job_trace(project_id, job_id)
-        return trace
+        job_client = AsyncJobClient()
+        job_status = job_status or known_job_status(project_id, job_id)
+        if offset is not None:
+            chunk = await job_client.get_job_trace_since(project_id, job_id, offset, status=job_status)
+            return trace_chunk_response(chunk)
+        return await trace_response(job_client.stream_job_trace(project_id, job_id, status=job_status), normalize, raw)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -147,7 +181,7 @@ async def create_merge_request(
 ):
     """Create a merge request"""
     try:
-        mr_client = MergeRequestClient()
+        mr_client = AsyncMergeRequestClient()
         source_branch = data.get("source_branch")
         target_branch = data.get("target_branch")
         title = data.get("title")
@@ -156,7 +190,7 @@ async def create_merge_request(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="source_branch, target_branch, and title are required"
             )
-        mr = mr_client.create_merge_request(project_id, source_branch, target_branch, title)
+        mr = await mr_client.create_merge_request(project_id, source_branch, target_branch, title)
         return {
             "id": mr.id,
             "iid": mr.iid,
@@ -181,8 +215,8 @@ async def merge_merge_request(
 ):
     """Merge a merge request"""
     try:
-        mr_client = MergeRequestClient()
-        result = mr_client.merge_mr(project_id, merge_request_iid)
+        mr_client = AsyncMergeRequestClient()
+        result = await mr_client.merge_mr(project_id, merge_request_iid)
         return result
     except ValueError as e:
         # Handle expected merge failures
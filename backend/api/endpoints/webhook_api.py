@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from typing import Optional
+import asyncio
+import hmac
+import json
+import sys
+from pathlib import Path
+# Add src to path
+project_root = Path(__file__).parent.parent.parent.parent
+src_path = project_root / "src"
+sys.path.insert(0, str(src_path))
+from config.config_models import AppConfig
+from clients.gitlab.pipeline_events import pipeline_events
+from clients.gitlab.pipeline_result_store import get_pipeline_result_store
+from ..core.dependencies import get_config
+router = APIRouter()
+@router.post("/webhooks/gitlab")
+async def receive_gitlab_webhook(
+    request: Request,
+    x_gitlab_token: Optional[str] = Header(None),
+    x_gitlab_event: Optional[str] = Header(None),
+    config: AppConfig = Depends(get_config)
+):
+    """Ingest GitLab Pipeline, Job and Merge Request hook events into the shared event store"""
+    secret = config.gitlab_api.webhook_secret
+    if not secret:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="GitLab webhook receiver is not enabled (gitlab_api.webhook_secret)"
+        )
+    if not x_gitlab_token or not hmac.compare_digest(x_gitlab_token.encode(), secret.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid X-Gitlab-Token"
+        )
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Webhook body is not valid JSON"
+        )
+    if not isinstance(payload, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Webhook body must be a JSON object"
+        )
+    kind = pipeline_events.apply(payload)
+    if kind == "pipeline":
+        await asyncio.to_thread(get_pipeline_result_store(config.gitlab_api).record_event, payload)
+    # GitLab disables hooks that keep failing, so unsupported events are acknowledged, not rejected
+    return {"status": "accepted" if kind else "ignored", "event": x_gitlab_event, "kind": kind}
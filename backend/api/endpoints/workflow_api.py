@@ -60,7 +60,7 @@ async def get_workflow_status_by_mr(
     try:
         # 将URL中的连字符转换回斜杠
         actual_project_name = project_name.replace('-', '/')
-        status_info = workflow_service.get_workflow_status_by_mr(actual_project_name, mr_id)
+        status_info = await workflow_service.get_workflow_status_by_mr(actual_project_name, mr_id)
         return status_info
     except Exception as e:
         raise HTTPException(
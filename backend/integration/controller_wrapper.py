@@ -101,6 +101,7 @@ class ControllerWrapper:
     def wrap_pipeline_monitor_controller(self):
         """Wrap pipeline monitor controller for web use"""
         from controller.pipeline_monitor_controller import PipelineMonitorController
+        from clients.gitlab.job_duration_store import get_job_duration_store
 
         class WebPipelineMonitorController(PipelineMonitorController):
             def __init__(self, config, wrapper):
@@ -110,33 +111,40 @@ class ControllerWrapper:
             def monitor(self, project_id, pipeline_id):
                 self.wrapper.update_progress(60, f"Monitoring pipeline: {pipeline_id}")
 
-                # Override the monitoring logic to provide progress updates
-                last_statuses = {}
-                dot_counters = {}
-
-                while True:
-                    jobs = self.job_client.list_jobs(project_id, pipeline_id)
-                    all_status = [j.status for j in jobs]
-
-                    # Calculate progress based on job completion
-                    total_jobs = len(jobs)
-                    completed_jobs = len([j for j in jobs if j.status in ["success", "failed", "canceled"]])
-                    progress = 60 + (completed_jobs / total_jobs * 30) if total_jobs > 0 else 60
-
-                    self.wrapper.update_progress(progress, f"Pipeline progress: {completed_jobs}/{total_jobs} jobs completed")
-
-                    # Check completion status
-                    if all(s in ["success", "skipped", "canceled"] for s in all_status):
-                        self.wrapper.update_progress(90, "Pipeline completed successfully")
-                        return "success", jobs
-
-                    if any(s in ["failed"] for s in all_status):
-                        self.wrapper.update_progress(90, "Pipeline failed, entering debug mode")
-                        return "failed", jobs
-
-                    # Continue monitoring
-                    import time
-                    time.sleep(self.interval)
+                # Same shared watcher as the CLI monitor, reporting progress instead of printing
+                timeout, stall_timeout = self._limits()
+                durations = get_job_duration_store(self.config.gitlab_api)
+                with self._subscribe(project_id, pipeline_id) as subscription:
+                    for update in subscription.updates(timeout=timeout, stall_timeout=stall_timeout):
+                        jobs = update.jobs
+
+                        # Weight progress by historical job durations; fall back to job counts without history
+                        total_jobs = len(jobs)
+                        completed_jobs = len([j for j in jobs if j.status in ["success", "failed", "canceled"]])
+                        fraction = durations.progress(project_id, jobs)
+                        if fraction is None:
+                            fraction = completed_jobs / total_jobs if total_jobs > 0 else 0
+                        progress = 60 + fraction * 30
+
+                        message = f"Pipeline progress: {completed_jobs}/{total_jobs} jobs completed"
+                        if update.eta is not None:
+                            message += f", about {int(update.eta)}s remaining"
+                        self.wrapper.update_progress(progress, message)
+
+                        # Check completion status
+                        if update.outcome == "success":
+                            self.wrapper.update_progress(90, "Pipeline completed successfully")
+                            return "success", jobs
+
+                        if update.outcome == "failed":
+                            self.wrapper.update_progress(90, "Pipeline failed, entering debug mode")
+                            self.cancel_remaining(project_id, pipeline_id, jobs)
+                            return "failed", jobs
+
+                        if update.outcome in ("timeout", "stalled"):
+                            self.wrapper.update_progress(90, f"Pipeline monitoring ended: {update.outcome}")
+                            return update.outcome, jobs
+                return "timeout", []
 
         return WebPipelineMonitorController(self.config, self)
 
@@ -137,6 +137,7 @@ class WorkflowBridge:
         if result["status"] == "completed":
             # Update pipeline info with merged pipeline
             workflow_state.pipeline_info["merged_pipeline_id"] = workflow_state.project_info.get("merged_pipeline_id")
+            workflow_state.pipeline_info["merge_commit_sha"] = workflow_state.project_info.get("merge_commit_sha")
             return result
         else:
             # 合并失败时，确保错误信息被正确传递
@@ -157,6 +158,7 @@ class WorkflowBridge:
             # Store deployment info
             workflow_state.pipeline_info = workflow_state.pipeline_info or {}
             workflow_state.pipeline_info["deployment_url"] = result.get("deployment_url")
+            workflow_state.pipeline_info["post_merge_status"] = workflow_state.project_info.get("post_merge_status")
             return result
         else:
             raise Exception(result.get("error", "Post-merge monitoring failed"))
\ No newline at end of file
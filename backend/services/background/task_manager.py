@@ -13,6 +13,7 @@ src_path = project_root / "src"
 sys.path.insert(0, str(src_path))
 
 from models.web.api_models import TaskStatusResponse
+from clients.gitlab.rate_limiter import RequestPriority, set_request_priority
 
 logger = logging.getLogger("task_manager")
 
@@ -41,6 +42,8 @@ class BackgroundTask:
 
     async def run(self):
         """Execute the background task"""
+        # Created from request handlers, so reset the inherited interactive priority
+        set_request_priority(RequestPriority.BACKGROUND)
         try:
             self.status = TaskStatus.RUNNING
             self.started_at = datetime.utcnow()
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+from typing import Dict, Any, Optional
+import sys
+from pathlib import Path
+
+# Add src to path
+project_root = Path(__file__).parent.parent.parent.parent
+src_path = project_root / "src"
+sys.path.insert(0, str(src_path))
+
+from config.config_models import AppConfig
+from clients.gitlab.async_project_client import AsyncProjectClient
+from clients.gitlab.async_merge_request_client import AsyncMergeRequestClient
+from clients.gitlab.async_pipeline_client import AsyncPipelineClient
+from clients.gitlab.async_job_client import AsyncJobClient
+
+logger = logging.getLogger("ci_status_service")
+
+# Fields the composite response needs from a pipeline; MR pipeline list items
+# already carry all of them, so the pipeline details call is only a fallback.
+PIPELINE_FIELDS = ("id", "status", "ref", "web_url", "created_at", "updated_at")
+
+CI_STATUS_QUERY = """
+query ciStatus($fullPath: ID!, $iid: String!) {
+  project(fullPath: $fullPath) {
+    id
+    mergeRequest(iid: $iid) {
+      id
+      iid
+      title
+      state
+      sourceBranch
+      targetBranch
+      webUrl
+      headPipeline {
+        id
+        status
+        ref
+        path
+        createdAt
+        updatedAt
+        jobs {
+          nodes {
+            id
+            name
+            status
+            stage { name }
+            startedAt
+            finishedAt
+            webPath
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+class ProjectNotFound(Exception):
+    pass
+
+
+class MergeRequestNotFound(Exception):
+    pass
+
+
+def _gid_to_int(gid: Optional[str]) -> Optional[int]:
+    """Convert a GraphQL global id (gid://gitlab/Ci::Pipeline/123) to its numeric id"""
+    if gid is None:
+        return None
+    try:
+        return int(str(gid).rsplit("/", 1)[-1])
+    except ValueError:
+        return None
+
+
+class CIStatusService:
+    """Builds the MR CI-status composite with as few sequential GitLab round trips as possible.
+
+    REST dependency graph:
+        project id (shared project cache) -> [MR, latest MR pipeline] (concurrent) -> jobs
+    The pipeline details call is skipped when the MR pipelines list item
+    already carries every field the response needs.
+    """
+
+    def __init__(self, config: AppConfig):
+        self.config = config
+        self.project_client = AsyncProjectClient()
+        self.mr_client = AsyncMergeRequestClient()
+        self.pipeline_client = AsyncPipelineClient()
+        self.job_client = AsyncJobClient()
+
+    async def resolve_project_id(self, project_name: str) -> int:
+        project = await self.project_client.get_project_by_name(project_name)
+        if not project:
+            raise ProjectNotFound(project_name)
+        return project.id
+
+    async def get_ci_status(self, project_name: str, mr_id: int) -> Dict[str, Any]:
+        if self.config.gitlab_api.graphql_ci_status:
+            try:
+                return await self._get_ci_status_graphql(project_name, mr_id)
+            except (ProjectNotFound, MergeRequestNotFound):
+                raise
+            except Exception as e:
+                logger.warning(f"GraphQL CI status query failed, falling back to REST: {e}")
+        return await self._get_ci_status_rest(project_name, mr_id)
+
+    async def _get_ci_status_rest(self, project_name: str, mr_id: int) -> Dict[str, Any]:
+        project_id = await self.resolve_project_id(project_name)
+
+        # The MR iid is known up front, so the MR and its pipelines do not depend on each other
+        mr, latest_pipeline = await asyncio.gather(
+            self.mr_client.get_merge_request(project_id, mr_id),
+            self.mr_client.get_latest_mr_pipeline(project_id, mr_id)
+        )
+        if not mr:
+            raise MergeRequestNotFound(mr_id)
+
+        ci_status = self._base_status({
+            "id": mr.id,
+            "iid": mr.iid,
+            "title": mr.title,
+            "state": mr.state,
+            "source_branch": mr.source_branch,
+            "target_branch": mr.target_branch,
+            "web_url": mr.web_url
+        })
+        if not latest_pipeline:
+            return ci_status
+
+        pipeline_id = latest_pipeline["id"]
+        if all(field in latest_pipeline for field in PIPELINE_FIELDS):
+            pipeline = {field: latest_pipeline.get(field) for field in PIPELINE_FIELDS}
+            jobs = await self.job_client.list_jobs(project_id, pipeline_id)
+        else:
+            details, jobs = await asyncio.gather(
+                self.pipeline_client.get_pipeline(project_id, pipeline_id),
+                self.job_client.list_jobs(project_id, pipeline_id)
+            )
+            pipeline = {field: getattr(details, field, None) for field in PIPELINE_FIELDS}
+
+        ci_status.update({
+            "pipeline": pipeline,
+            "jobs": [
+                {
+                    "id": job.id,
+                    "name": job.name,
+                    "status": job.status,
+                    "stage": job.stage,
+                    "started_at": job.started_at,
+                    "finished_at": job.finished_at,
+                    "web_url": getattr(job, 'web_url', None)
+                } for job in jobs
+            ],
+            "overall_status": pipeline["status"]
+        })
+        return ci_status
+
+    async def _get_ci_status_graphql(self, project_name: str, mr_id: int) -> Dict[str, Any]:
+        data = await self.project_client.graphql(
+            CI_STATUS_QUERY, {"fullPath": project_name, "iid": str(mr_id)}
+        )
+        project = data.get("project")
+        if not project:
+            raise ProjectNotFound(project_name)
+        mr = project.get("mergeRequest")
+        if not mr:
+            raise MergeRequestNotFound(mr_id)
+
+        web_base = self.project_client.base_url
+        ci_status = self._base_status({
+            "id": _gid_to_int(mr.get("id")),
+            "iid": int(mr["iid"]),
+            "title": mr.get("title"),
+            "state": mr.get("state"),
+            "source_branch": mr.get("sourceBranch"),
+            "target_branch": mr.get("targetBranch"),
+            "web_url": mr.get("webUrl")
+        })
+        pipeline = mr.get("headPipeline")
+        if not pipeline:
+            return ci_status
+
+        # GraphQL returns upper-case enum values; REST consumers expect lower-case
+        status = (pipeline.get("status") or "").lower()
+        ci_status.update({
+            "pipeline": {
+                "id": _gid_to_int(pipeline.get("id")),
+                "status": status,
+                "ref": pipeline.get("ref"),
+                "web_url": f"{web_base}{pipeline['path']}" if pipeline.get("path") else None,
+                "created_at": pipeline.get("createdAt"),
+                "updated_at": pipeline.get("updatedAt")
+            },
+            "jobs": [
+                {
+                    "id": _gid_to_int(job.get("id")),
+                    "name": job.get("name"),
+                    "status": (job.get("status") or "").lower(),
+                    "stage": (job.get("stage") or {}).get("name"),
+                    "started_at": job.get("startedAt"),
+                    "finished_at": job.get("finishedAt"),
+                    "web_url": f"{web_base}{job['webPath']}" if job.get("webPath") else None
+                } for job in ((pipeline.get("jobs") or {}).get("nodes") or [])
+            ],
+            "overall_status": status
+        })
+        return ci_status
+
+    @staticmethod
+    def _base_status(merge_request: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "merge_request": merge_request,
+            "pipeline": None,
+            "jobs": [],
+            "overall_status": "no_pipeline"
+        }
@@ -1,5 +1,6 @@
+import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional
 import sys
 from pathlib import Path
 
@@ -9,26 +10,29 @@ src_path = project_root / "src"
 sys.path.insert(0, str(src_path))
 
 from config.config_models import AppConfig
-from clients.gitlab.gitlab_client import GitLabClient
-from clients.gitlab.project_client import ProjectClient
-from clients.gitlab.pipeline_client import PipelineClient
-from clients.gitlab.job_client import JobClient
-from clients.gitlab.merge_request_client import MergeRequestClient
+from models.gitlab_models import JobTraceChunk
+from clients.gitlab.async_project_client import AsyncProjectClient
+from clients.gitlab.async_pipeline_client import AsyncPipelineClient
+from clients.gitlab.async_job_client import AsyncJobClient
+from clients.gitlab.async_merge_request_client import AsyncMergeRequestClient
+from operations.trace.failure_classifier import build_classifier
+from clients.gitlab.pipeline_result_store import get_pipeline_result_store
+from clients.gitlab.pipeline_watcher import known_job_status
 
 logger = logging.getLogger("gitlab_proxy_service")
 
 class GitLabProxyService:
     def __init__(self, config: AppConfig):
         self.config = config
-        self.project_client = ProjectClient()
-        self.pipeline_client = PipelineClient()
-        self.job_client = JobClient()
-        self.mr_client = MergeRequestClient()
+        self.project_client = AsyncProjectClient()
+        self.pipeline_client = AsyncPipelineClient()
+        self.job_client = AsyncJobClient()
+        self.mr_client = AsyncMergeRequestClient()
 
-    def get_project(self, project_path: str) -> Dict[str, Any]:
+    async def get_project(self, project_path: str) -> Dict[str, Any]:
         """Get project information"""
         try:
-            project = self.project_client.get_project_by_name(project_path)
+            project = await self.project_client.get_project_by_name(project_path)
             if project:
                 return project.dict()
             else:
@@ -37,69 +41,137 @@ class GitLabProxyService:
             logger.error(f"Failed to get project {project_path}: {e}")
             raise
 
-    def list_pipelines(self, project_id: int, params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    async def list_pipelines(self, project_id: int, params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """List pipelines for a project"""
         try:
             ref = params.get("ref") if params else None
-            pipelines = self.pipeline_client.list_pipelines(project_id, ref, params)
+            limit = params.get("per_page") if params else None
+            pipelines = await self.pipeline_client.list_pipelines(project_id, ref, params, limit=limit)
             return [pipeline.dict() for pipeline in pipelines]
         except Exception as e:
             logger.error(f"Failed to list pipelines for project {project_id}: {e}")
             raise
 
-    def get_pipeline(self, project_id: int, pipeline_id: int) -> Dict[str, Any]:
+    async def get_pipeline(self, project_id: int, pipeline_id: int) -> Dict[str, Any]:
         """Get pipeline details"""
         try:
-            pipeline = self.pipeline_client.get_pipeline(project_id, pipeline_id)
+            pipeline = await self.pipeline_client.get_pipeline(project_id, pipeline_id)
             return pipeline.dict()
         except Exception as e:
             logger.error(f"Failed to get pipeline {pipeline_id} for project {project_id}: {e}")
             raise
 
-    def create_pipeline(self, project_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def create_pipeline(self, project_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new pipeline"""
         try:
             ref = data.get("ref", "main")
-            pipeline = self.pipeline_client.create_pipeline(project_id, ref)
+            pipeline = await self.pipeline_client.create_pipeline(project_id, ref)
             return pipeline.dict()
         except Exception as e:
             logger.error(f"Failed to create pipeline for project {project_id}: {e}")
             raise
 
-    def list_jobs(self, project_id: int, pipeline_id: int) -> List[Dict[str, Any]]:
+    async def list_jobs(self, project_id: int, pipeline_id: int) -> List[Dict[str, Any]]:
         """List jobs for a pipeline"""
         try:
-            jobs = self.job_client.list_jobs(project_id, pipeline_id)
+            jobs = await self.job_client.list_jobs(project_id, pipeline_id)
             return [job.dict() for job in jobs]
         except Exception as e:
             logger.error(f"Failed to list jobs for pipeline {pipeline_id}: {e}")
             raise
 
-    def get_job_trace(self, project_id: int, job_id: int) -> str:
-        """Get job trace output"""
+    async def get_job_trace(self, project_id: int, job_id: int, status: Optional[str] = None) -> str:
+        """
+        Get job trace output.
+
+        status is the job status the caller already knows; without it the status seen by the
+        shared pipeline watcher or the webhook events is used, so finished traces get archived.
+        """
         try:
-            trace = self.job_client.get_job_trace(project_id, job_id)
+            status = status or known_job_status(project_id, job_id)
+            trace = await self.job_client.get_job_trace(project_id, job_id, status=status)
             return trace
         except Exception as e:
             logger.error(f"Failed to get trace for job {job_id}: {e}")
             raise
 
-    def create_merge_request(self, project_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+    def stream_job_trace(self, project_id: int, job_id: int, status: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Stream job trace output in byte chunks without buffering the whole trace"""
+        status = status or known_job_status(project_id, job_id)
+        return self.job_client.stream_job_trace(project_id, job_id, status=status)
+
+    async def retry_job(self, project_id: int, job_id: int) -> Dict[str, Any]:
+        """Retry a single job and return the newly created job"""
+        try:
+            job = await self.job_client.retry_job(project_id, job_id)
+            return job.dict()
+        except Exception as e:
+            logger.error(f"Failed to retry job {job_id}: {e}")
+            raise
+
+    async def retry_failed_jobs(self, project_id: int, pipeline_id: int, infra_only: bool = False) -> Dict[str, Any]:
+        """
+        Retry the failed jobs of a pipeline.
+
+        With infra_only, each failed job's trace is classified first and only
+        runner/network/resource failures are retried; the rest are reported as skipped.
+        """
+        jobs = await self.job_client.list_jobs(project_id, pipeline_id)
+        failed = [job for job in jobs if job.status == "failed"]
+        skipped = []
+        if infra_only and failed:
+            classifier = build_classifier(self.job_client.api_config.infra_failure_patterns)
+            traces = await asyncio.gather(*(
+                self.job_client.get_job_trace(project_id, job.id, status=job.status) for job in failed
+            ))
+            retryable = []
+            for job, trace in zip(failed, traces):
+                result = classifier.classify(trace, job.failure_reason)
+                if result.retryable:
+                    retryable.append(job)
+                else:
+                    skipped.append({"id": job.id, "name": job.name, "category": result.category})
+            failed = retryable
+        results = await asyncio.gather(
+            *(self.job_client.retry_job(project_id, job.id) for job in failed), return_exceptions=True
+        )
+        retried, errors = [], []
+        for job, result in zip(failed, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to retry job {job.id}: {result}")
+                errors.append({"id": job.id, "name": job.name, "error": str(result)})
+            else:
+                retried.append({"id": job.id, "name": job.name, "new_job_id": result.id})
+        if retried:
+            await asyncio.to_thread(get_pipeline_result_store(self.job_client.api_config).forget, project_id, pipeline_id)
+        return {"retried": retried, "skipped": skipped, "errors": errors}
+
+    async def get_job_trace_since(self, project_id: int, job_id: int, offset: int,
+                                  status: Optional[str] = None) -> JobTraceChunk:
+        """Get job trace output written after the given byte offset"""
+        try:
+            status = status or known_job_status(project_id, job_id)
+            return await self.job_client.get_job_trace_since(project_id, job_id, offset, status=status)
+        except Exception as e:
+            logger.error(f"Failed to get trace for job {job_id} from offset {offset}: {e}")
+            raise
+
+    async def create_merge_request(self, project_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a merge request"""
         try:
             source_branch = data["source_branch"]
             target_branch = data["target_branch"]
             title = data["title"]
-            mr = self.mr_client.create_merge_request(project_id, source_branch, target_branch, title)
+            mr = await self.mr_client.create_merge_request(project_id, source_branch, target_branch, title)
             return mr.dict()
         except Exception as e:
             logger.error(f"Failed to create merge request for project {project_id}: {e}")
             raise
 
-    def merge_merge_request(self, project_id: int, mr_iid: int, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def merge_merge_request(self, project_id: int, mr_iid: int, data: Dict[str, Any]) -> Dict[str, Any]:
         """Merge a merge request"""
         try:
-            result = self.mr_client.merge_mr(project_id, mr_iid)
+            result = await self.mr_client.merge_mr(project_id, mr_iid)
             return result
         except Exception as e:
             logger.error(f"Failed to merge MR {mr_iid} for project {project_id}: {e}")
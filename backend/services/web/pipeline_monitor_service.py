@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional
 from datetime import datetime
 import sys
 from pathlib import Path
@@ -10,6 +10,7 @@ src_path = project_root / "src"
 sys.path.insert(0, str(src_path))
 
 from config.config_models import AppConfig
+from models.gitlab_models import JobTraceChunk
 from models.web.api_models import PipelineStatusResponse, JobStatusResponse
 from services.web.gitlab_proxy_service import GitLabProxyService
 from state.pipeline_state import PipelineStateManager
@@ -22,7 +23,7 @@ class PipelineMonitorService:
         self.gitlab_service = gitlab_service
         self.pipeline_states = PipelineStateManager()
 
-    def get_pipeline_status(self, session_id: str) -> PipelineStatusResponse:
+    async def get_pipeline_status(self, session_id: str) -> PipelineStatusResponse:
         """Get current pipeline status for a session"""
         try:
             pipeline_state = self.pipeline_states.get_state(session_id)
@@ -32,7 +33,7 @@ class PipelineMonitorService:
             # Refresh pipeline status from GitLab
             if pipeline_state.project_id and pipeline_state.pipeline_id:
                 try:
-                    pipeline_data = self.gitlab_service.get_pipeline(
+                    pipeline_data = await self.gitlab_service.get_pipeline(
                         pipeline_state.project_id,
                         pipeline_state.pipeline_id
                     )
@@ -56,7 +57,7 @@ class PipelineMonitorService:
             logger.error(f"Failed to get pipeline status for session {session_id}: {e}")
             raise
 
-    def get_job_statuses(self, session_id: str) -> List[JobStatusResponse]:
+    async def get_job_statuses(self, session_id: str) -> List[JobStatusResponse]:
         """Get job statuses for a session's pipeline"""
         try:
             pipeline_state = self.pipeline_states.get_state(session_id)
@@ -64,7 +65,7 @@ class PipelineMonitorService:
                 raise ValueError(f"No pipeline found for session {session_id}")
 
             # Get jobs from GitLab
-            jobs_data = self.gitlab_service.list_jobs(
+            jobs_data = await self.gitlab_service.list_jobs(
                 pipeline_state.project_id,
                 pipeline_state.pipeline_id
             )
@@ -87,11 +88,11 @@ class PipelineMonitorService:
             logger.error(f"Failed to get job statuses for session {session_id}: {e}")
             raise
 
-    def get_monitor_data(self, session_id: str) -> Dict[str, Any]:
+    async def get_monitor_data(self, session_id: str) -> Dict[str, Any]:
         """Get comprehensive pipeline monitoring data"""
         try:
-            pipeline_status = self.get_pipeline_status(session_id)
-            job_statuses = self.get_job_statuses(session_id)
+            pipeline_status = await self.get_pipeline_status(session_id)
+            job_statuses = await self.get_job_statuses(session_id)
 
             # Calculate summary statistics
             total_jobs = len(job_statuses)
@@ -113,34 +114,60 @@ class PipelineMonitorService:
             logger.error(f"Failed to get monitor data for session {session_id}: {e}")
             raise
 
-    def retry_failed_jobs(self, session_id: str) -> Dict[str, Any]:
-        """Retry failed jobs in the pipeline"""
+    async def retry_failed_jobs(self, session_id: str, infra_only: bool = False) -> Dict[str, Any]:
+        """Retry failed jobs in the pipeline, optionally only infrastructure-class failures"""
         try:
-            # This would typically involve calling GitLab API to retry jobs
-            # For now, return a placeholder response
-            logger.info(f"Retry failed jobs requested for session {session_id}")
+            pipeline_state = self.pipeline_states.get_state(session_id)
+            if not pipeline_state:
+                raise ValueError(f"No pipeline state found for session {session_id}")
+
+            logger.info(f"Retry failed jobs requested for session {session_id} (infra_only={infra_only})")
+            result = await self.gitlab_service.retry_failed_jobs(
+                pipeline_state.project_id, pipeline_state.pipeline_id, infra_only=infra_only
+            )
             return {
                 "session_id": session_id,
                 "action": "retry_failed_jobs",
+                **result,
                 "timestamp": datetime.utcnow().isoformat()
             }
         except Exception as e:
             logger.error(f"Failed to retry failed jobs for session {session_id}: {e}")
             raise
 
-    def get_job_trace(self, session_id: str, job_id: int) -> str:
+    async def get_job_trace(self, session_id: str, job_id: int, status: Optional[str] = None) -> str:
         """Get trace output for a specific job"""
         try:
             pipeline_state = self.pipeline_states.get_state(session_id)
             if not pipeline_state:
                 raise ValueError(f"No pipeline state found for session {session_id}")
 
-            trace = self.gitlab_service.get_job_trace(pipeline_state.project_id, job_id)
+            trace = await self.gitlab_service.get_job_trace(pipeline_state.project_id, job_id, status)
             return trace
         except Exception as e:
             logger.error(f"Failed to get job trace for job {job_id}: {e}")
             raise
 
+    def stream_job_trace(self, session_id: str, job_id: int, status: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Stream trace output for a specific job in byte chunks"""
+        pipeline_state = self.pipeline_states.get_state(session_id)
+        if not pipeline_state:
+            raise ValueError(f"No pipeline state found for session {session_id}")
+        return self.gitlab_service.stream_job_trace(pipeline_state.project_id, job_id, status)
+
+    async def get_job_trace_since(self, session_id: str, job_id: int, offset: int,
+                                  status: Optional[str] = None) -> JobTraceChunk:
+        """Get trace output written after the given byte offset"""
+        try:
+            pipeline_state = self.pipeline_states.get_state(session_id)
+            if not pipeline_state:
+                raise ValueError(f"No pipeline state found for session {session_id}")
+
+            return await self.gitlab_service.get_job_trace_since(pipeline_state.project_id, job_id, offset, status)
+        except Exception as e:
+            logger.error(f"Failed to get job trace for job {job_id}: {e}")
+            raise
+
     def update_pipeline_state(self, session_id: str, project_id: int, pipeline_id: int, **kwargs):
         """Update pipeline state for a session"""
         self.pipeline_states.update_state(session_id, project_id, pipeline_id, **kwargs)
\ No newline at end of file
@@ -0,0 +1,88 @@
+import codecs
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+import sys
+from pathlib import Path
+
+# Add src to path
+project_root = Path(__file__).parent.parent.parent.parent
+src_path = project_root / "src"
+sys.path.insert(0, str(src_path))
+
+from fastapi.responses import StreamingResponse
+from models.gitlab_models import JobTraceChunk
+from operations.trace.trace_normalizer import TraceNormalizer
+
+async def decode_trace(chunks: AsyncIterator[bytes], normalize: bool = False) -> AsyncIterator[str]:
+    """Decode trace bytes incrementally (multi-byte characters may straddle chunks), optionally normalising"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    normalizer = TraceNormalizer() if normalize else None
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if normalizer is not None:
+            text = normalizer.feed(text)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if normalizer is not None:
+        tail = normalizer.feed(tail) + normalizer.flush()
+    if tail:
+        yield tail
+
+async def _json_string(texts: AsyncIterator[str], prefix: str, suffix: str) -> AsyncIterator[str]:
+    # json.dumps escapes character by character, so escaped pieces concatenate into one valid string
+    yield prefix + '"'
+    async for text in texts:
+        yield json.dumps(text, ensure_ascii=False)[1:-1]
+    yield '"' + suffix
+
+async def _prepend(first: Optional[bytes], chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    try:
+        if first is not None:
+            yield first
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        await chunks.aclose()
+
+def trace_chunk_response(chunk: JobTraceChunk, envelope: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Body of an ?offset= trace request: the new text under "trace" plus offset and next_offset"""
+    return {
+        **(envelope or {}),
+        "trace": chunk.content,
+        "offset": chunk.offset,
+        "next_offset": chunk.next_offset
+    }
+
+async def trace_response(
+    chunks: AsyncIterator[bytes],
+    normalize: bool = False,
+    raw: bool = False,
+    envelope: Optional[Dict[str, Any]] = None,
+    field: str = "trace"
+) -> StreamingResponse:
+    """
+    Build a streaming response for a job trace without holding the whole trace in memory.
+
+    raw=True streams text/plain; otherwise the trace is streamed as a JSON string, either
+    bare or as envelope[field], so existing JSON clients see the same body as before.
+    The first upstream chunk is read before the response starts, so lookup and HTTP errors
+    still surface as proper error statuses. Client disconnects close the upstream stream.
+    """
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except BaseException:
+        await chunks.aclose()
+        raise
+    texts = decode_trace(_prepend(first, chunks), normalize)
+    if raw:
+        return StreamingResponse(texts, media_type="text/plain; charset=utf-8")
+    if envelope is None:
+        prefix, suffix = "", ""
+    else:
+        head = json.dumps(envelope, ensure_ascii=False)
+        prefix = (head[:-1] + ", " if envelope else "{") + json.dumps(field) + ": "
+        suffix = "}"
+    return StreamingResponse(_json_string(texts, prefix, suffix), media_type="application/json")
@@ -17,6 +17,7 @@ from models.web.api_models import WorkflowStartRequest, WorkflowStatusResponse
 from models.web.workflow_models import WorkflowState, WorkflowStep
 from services.web.session_service import SessionService
 from services.background.workflow_executor import WorkflowExecutor
+from clients.gitlab.rate_limiter import RequestPriority, set_request_priority
 logger = logging.getLogger("workflow_service")
 class WorkflowService:
     def __init__(self, config: AppConfig, session_service: SessionService):
@@ -44,6 +45,7 @@ class WorkflowService:
         logger.info(f"Workflow started for session {session_id}")
     async def _run_workflow_with_monitoring(self, session_id: str, executor: WorkflowExecutor):
         """Run workflow in background with error monitoring"""
+        set_request_priority(RequestPriority.BACKGROUND)
         try:
             # 启动错误监控线程
             error_monitor = threading.Thread(
@@ -202,7 +204,7 @@ class WorkflowService:
                 )
             else:
                 raise ValueError(f"No workflow state found for session {session_id}")
-    def get_workflow_status_by_mr(self, project_name: str, mr_id: str) -> WorkflowStatusResponse:
+    async def get_workflow_status_by_mr(self, project_name: str, mr_id: str) -> WorkflowStatusResponse:
         """Get workflow status by MR ID"""
         mr_key = f"{project_name}:{mr_id}"
         # 先查找映射关系
@@ -230,8 +232,8 @@ class WorkflowService:
                             self.mr_to_session_mapping[mr_key] = session_id
                             return self.get_workflow_status(session_id)
         # 如果都没找到，创建一个基于MR信息的状态响应
-        return self._create_mr_based_status(project_name, mr_id)
-    def _create_mr_based_status(self, project_name: str, mr_id: str) -> WorkflowStatusResponse:
+        return await self._create_mr_based_status(project_name, mr_id)
+    async def _create_mr_based_status(self, project_name: str, mr_id: str) -> WorkflowStatusResponse:
         """创建基于MR信息的状态响应，用于恢复workflow状态"""
         from models.web.workflow_models import WorkflowStep, StepStatus
         # 创建默认的步骤状态
@@ -269,7 +271,7 @@ class WorkflowService:
         }
         # 尝试从GitLab API获取MR信息来推断状态
         try:
-            current_step, updated_steps = self._determine_workflow_status_from_gitlab(
+            current_step, updated_steps = await self._determine_workflow_status_from_gitlab(
                 project_name, mr_id, steps
             )
         except Exception as e:
@@ -287,24 +289,40 @@ class WorkflowService:
             started_at=datetime.utcnow(),
             updated_at=datetime.utcnow()
         )
-    def _determine_workflow_status_from_gitlab(self, project_name: str, mr_id: str, steps: Dict):
+    async def _determine_workflow_status_from_gitlab(self, project_name: str, mr_id: str, steps: Dict):
         """从GitLab API确定workflow状态"""
-        from clients.gitlab.project_client import ProjectClient
-        from clients.gitlab.merge_request_client import MergeRequestClient
-        from clients.gitlab.pipeline_client import PipelineClient
+        from clients.gitlab.async_project_client import AsyncProjectClient
+        from clients.gitlab.async_merge_request_client import AsyncMergeRequestClient
+        from clients.gitlab.async_pipeline_client import AsyncPipelineClient
+        from clients.gitlab.pipeline_result_store import get_pipeline_result_store
         from models.web.workflow_models import StepStatus
+
+        async def pipeline_status(project_id: int, sha: Optional[str], ref: str, match_ref: bool = True) -> Optional[str]:
+            """
+            Status of the pipeline for sha, from the result cache when it has a verdict, else the latest on ref.
+            MR pipelines may run on refs/merge-requests/*, so callers can match the SHA on any ref.
+            """
+            if sha:
+                verdict = await asyncio.to_thread(
+                    get_pipeline_result_store(self.config.gitlab_api).get, project_id, sha, ref if match_ref else None
+                )
+                if verdict is not None:
+                    return verdict["status"]
+            latest_pipeline = await AsyncPipelineClient().get_latest_pipeline(project_id, ref=ref)
+            return latest_pipeline.status if latest_pipeline else None
+
         try:
             # 获取项目信息
-            project_client = ProjectClient()
-            project = project_client.get_project_by_name(project_name)
+            project_client = AsyncProjectClient()
+            project = await project_client.get_project_by_name(project_name)
             if not project:
                 return "prepare_project", steps
             # 项目存在，标记第一步完成
             steps["prepare_project"].status = StepStatus.COMPLETED
             # 检查MR是否存在
-            mr_client = MergeRequestClient()
+            mr_client = AsyncMergeRequestClient()
             try:
-                mr = mr_client.get_merge_request(project.id, int(mr_id))
+                mr = await mr_client.get_merge_request(project.id, int(mr_id))
                 if mr:
                     # MR存在，标记第二步完成
                     steps["create_mr"].status = StepStatus.COMPLETED
@@ -314,14 +332,12 @@ class WorkflowService:
                         steps["debug_loop"].status = StepStatus.COMPLETED
                         steps["merge_mr"].status = StepStatus.COMPLETED
                         # 检查合并后的pipeline状态
-                        pipeline_client = PipelineClient()
-                        pipelines = pipeline_client.list_pipelines(project.id, ref="dev")
-                        if pipelines:
-                            latest_pipeline = pipelines[0]
-                            if latest_pipeline.status in ["success", "passed"]:
+                        status = await pipeline_status(project.id, mr.merge_commit_sha, "dev")
+                        if status:
+                            if status in ["success", "passed"]:
                                 steps["post_merge_monitor"].status = StepStatus.COMPLETED
                                 return "post_merge_monitor", steps
-                            elif latest_pipeline.status in ["running", "pending"]:
+                            elif status in ["running", "pending"]:
                                 steps["post_merge_monitor"].status = StepStatus.RUNNING
                                 return "post_merge_monitor", steps
                             else:
@@ -330,14 +346,12 @@ class WorkflowService:
                         return "post_merge_monitor", steps
                     elif mr.state == "opened":
                         # MR打开状态，检查pipeline
-                        pipeline_client = PipelineClient()
-                        pipelines = pipeline_client.list_pipelines(project.id, ref="ai")
-                        if pipelines:
-                            latest_pipeline = pipelines[0]
-                            if latest_pipeline.status in ["success", "passed"]:
+                        status = await pipeline_status(project.id, mr.sha, "ai", match_ref=False)
+                        if status:
+                            if status in ["success", "passed"]:
                                 steps["debug_loop"].status = StepStatus.COMPLETED
                                 return "merge_mr", steps
-                            elif latest_pipeline.status in ["running", "pending"]:
+                            elif status in ["running", "pending"]:
                                 steps["debug_loop"].status = StepStatus.RUNNING
                                 return "debug_loop", steps
                             else:
@@ -12,6 +12,7 @@ sys.path.insert(0, str(src_path))
 
 from tasks.task_base import BaseTask
 from services.web.gitlab_proxy_service import GitLabProxyService
+from clients.gitlab.pipeline_watcher import pipeline_watcher, FINAL_OUTCOMES
 
 logger = logging.getLogger("pipeline_tasks")
 
@@ -27,62 +28,89 @@ class PipelineMonitorTask(BaseTask):
         self.check_interval = 5  # seconds
 
     async def execute(self) -> Dict[str, Any]:
-        """Monitor pipeline until completion"""
+        """Monitor pipeline until completion via the shared pipeline watcher"""
         try:
             self.add_log(f"Starting pipeline monitoring for pipeline {self.pipeline_id}")
-
-            while True:
-                # Get pipeline status
-                pipeline_data = self.gitlab_service.get_pipeline(self.project_id, self.pipeline_id)
-                status = pipeline_data["status"]
-
-                self.add_log(f"Pipeline status: {status}")
-
-                # Check if pipeline is completed
-                if status in ["success", "failed", "canceled", "skipped"]:
-                    self.add_log(f"Pipeline completed with status: {status}")
-
-                    # Get final job statuses
-                    jobs = self.gitlab_service.list_jobs(self.project_id, self.pipeline_id)
-
-                    return {
-                        "pipeline_id": self.pipeline_id,
-                        "status": status,
-                        "jobs": jobs,
-                        "pipeline_data": pipeline_data
-                    }
-
-                # Wait before next check
-                await asyncio.sleep(self.check_interval)
+            config = self.gitlab_service.config
+
+            subscription = pipeline_watcher.subscribe(
+                self.project_id, self.pipeline_id, self.check_interval,
+                config.gitlab_api.webhook_fallback_interval
+            )
+            with subscription:
+                updates = subscription.aupdates(
+                    timeout=config.timeout.overall_timeout_minutes * 60,
+                    stall_timeout=config.gitlab_api.pipeline_stall_timeout
+                )
+                try:
+                    async for update in updates:
+                        for job, previous_status in update.changes:
+                            self.add_log(f"Job {job.name} ({job.stage}): {previous_status} -> {job.status}")
+                        if update.outcome in FINAL_OUTCOMES:
+                            break
+                finally:
+                    await updates.aclose()
+
+            # Final pipeline status straight from GitLab
+            pipeline_data = await self.gitlab_service.get_pipeline(self.project_id, self.pipeline_id)
+            status = pipeline_data["status"]
+            if update.outcome in ("timeout", "stalled"):
+                status = update.outcome
+            self.add_log(f"Pipeline completed with status: {status}")
+
+            return {
+                "pipeline_id": self.pipeline_id,
+                "status": status,
+                "jobs": [job.dict() for job in update.jobs],
+                "pipeline_data": pipeline_data
+            }
 
         except Exception as e:
             self.add_log(f"Pipeline monitoring failed: {e}")
             raise
 
 class JobTraceCollectorTask(BaseTask):
-    """Task for collecting job traces"""
+    """
+    Task for collecting job traces
 
-    def __init__(self, session_id: str, project_id: int, job_ids: List[int], gitlab_service: GitLabProxyService):
+    With pipeline_id the pipeline's jobs are listed once so every trace is fetched with its
+    status and finished traces are archived; otherwise the service looks the status up in the
+    shared watcher / webhook state.
+    """
+
+    def __init__(self, session_id: str, project_id: int, job_ids: List[int], gitlab_service: GitLabProxyService,
+                 pipeline_id: Optional[int] = None):
         super().__init__(f"job_trace_collector_{session_id}", "Job Trace Collector")
         self.session_id = session_id
         self.project_id = project_id
         self.job_ids = job_ids
         self.gitlab_service = gitlab_service
+        self.pipeline_id = pipeline_id
 
     async def execute(self) -> Dict[str, Any]:
         """Collect traces for specified jobs"""
         try:
             self.add_log(f"Collecting traces for {len(self.job_ids)} jobs")
+            statuses: Dict[int, str] = {}
+            if self.pipeline_id is not None:
+                try:
+                    jobs = await self.gitlab_service.list_jobs(self.project_id, self.pipeline_id)
+                    statuses = {job["id"]: job["status"] for job in jobs}
+                except Exception as e:
+                    self.add_log(f"Failed to list jobs of pipeline {self.pipeline_id}: {e}")
 
-            traces = {}
-            for job_id in self.job_ids:
+            async def collect(job_id: int) -> str:
                 try:
-                    trace = self.gitlab_service.get_job_trace(self.project_id, job_id)
-                    traces[job_id] = trace
+                    trace = await self.gitlab_service.get_job_trace(self.project_id, job_id, statuses.get(job_id))
                     self.add_log(f"Collected trace for job {job_id}")
+                    return trace
                 except Exception as e:
                     self.add_log(f"Failed to collect trace for job {job_id}: {e}")
-                    traces[job_id] = f"Error collecting trace: {e}"
+                    return f"Error collecting trace: {e}"
+
+            # Fetch all traces concurrently; the shared client pool and rate limiter bound the fan-out
+            results = await asyncio.gather(*(collect(job_id) for job_id in self.job_ids))
+            traces = dict(zip(self.job_ids, results))
 
             return {"traces": traces}
 
@@ -93,38 +121,33 @@ class JobTraceCollectorTask(BaseTask):
 class PipelineRetryTask(BaseTask):
     """Task for retrying failed pipeline jobs"""
 
-    def __init__(self, session_id: str, project_id: int, pipeline_id: int, gitlab_service: GitLabProxyService):
+    def __init__(self, session_id: str, project_id: int, pipeline_id: int, gitlab_service: GitLabProxyService,
+                 infra_only: bool = False):
         super().__init__(f"pipeline_retry_{session_id}_{pipeline_id}", "Pipeline Retry")
         self.session_id = session_id
         self.project_id = project_id
         self.pipeline_id = pipeline_id
         self.gitlab_service = gitlab_service
+        self.infra_only = infra_only
 
     async def execute(self) -> Dict[str, Any]:
         """Retry failed jobs in the pipeline"""
         try:
             self.add_log(f"Retrying failed jobs for pipeline {self.pipeline_id}")
-
-            # Get job data
-            jobs = self.gitlab_service.list_jobs(self.project_id, self.pipeline_id)
-            failed_jobs = [job for job in jobs if job["status"] == "failed"]
-
-            if not failed_jobs:
+            result = await self.gitlab_service.retry_failed_jobs(
+                self.project_id, self.pipeline_id, infra_only=self.infra_only
+            )
+
+            for job in result["retried"]:
+                self.add_log(f"Retried job {job['id']}: {job['name']} -> {job['new_job_id']}")
+            for job in result["skipped"]:
+                self.add_log(f"Skipped job {job['id']}: {job['name']} ({job['category']} failure)")
+            for job in result["errors"]:
+                self.add_log(f"Failed to retry job {job['id']}: {job['error']}")
+            if not (result["retried"] or result["skipped"] or result["errors"]):
                 self.add_log("No failed jobs to retry")
-                return {"retried_jobs": []}
-
-            retried_jobs = []
-            for job in failed_jobs:
-                try:
-                    # Note: Actual job retry would require GitLab API call
-                    # This is a placeholder for the retry logic
-                    job_id = job["id"]
-                    self.add_log(f"Retrying job {job_id}: {job['name']}")
-                    retried_jobs.append(job_id)
-                except Exception as e:
-                    self.add_log(f"Failed to retry job {job['id']}: {e}")
 
-            return {"retried_jobs": retried_jobs}
+            return {"retried_jobs": [job["new_job_id"] for job in result["retried"]], **result}
 
         except Exception as e:
             self.add_log(f"Pipeline retry failed: {e}")
@@ -146,10 +169,10 @@ class PipelineStatusAggregatorTask(BaseTask):
             self.add_log(f"Aggregating status for pipeline {self.pipeline_id}")
 
             # Get pipeline data
-            pipeline_data = self.gitlab_service.get_pipeline(self.project_id, self.pipeline_id)
+            pipeline_data = await self.gitlab_service.get_pipeline(self.project_id, self.pipeline_id)
 
             # Get job data
-            jobs = self.gitlab_service.list_jobs(self.project_id, self.pipeline_id)
+            jobs = await self.gitlab_service.list_jobs(self.project_id, self.pipeline_id)
 
             # Calculate statistics
             total_jobs = len(jobs)
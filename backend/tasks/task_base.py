@@ -3,6 +3,7 @@ import logging
 from typing import Any, List, Optional
 from datetime import datetime
 from abc import ABC, abstractmethod
+from clients.gitlab.rate_limiter import RequestPriority, set_request_priority
 
 logger = logging.getLogger("task_base")
 
@@ -29,6 +30,8 @@ class BaseTask(ABC):
 
     async def run(self) -> Any:
         """Run the task with error handling and logging"""
+        # Tasks inherit the context of whoever scheduled them; always poll GitLab as background work
+        set_request_priority(RequestPriority.BACKGROUND)
         try:
             self.status = "running"
             self.started_at = datetime.utcnow()
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { LoadingSpinner } from '../common/LoadingSpinner';
 import { StatusBadge } from '../common/StatusBadge';
@@ -34,6 +34,8 @@ export const JobLogView: React.FC = () => {
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [autoScroll, setAutoScroll] = useState(true);
+  // 已读取的日志字节偏移量，轮询时只拉取新增部分
+  const logOffset = useRef(0);
   const actualProjectName = projectName?.replace('-', '/') || '';
   const jobIdNum = jobId ? parseInt(jobId) : 0;
   const fetchProjectInfo = async () => {
@@ -56,11 +58,20 @@ export const JobLogView: React.FC = () => {
       throw new Error(`Job ${jobIdNum} not found`);
     }
   };
-  const fetchJobLogs = async (projectId: number, jobIdNum: number) => {
+  const fetchJobLogs = async (projectId: number, jobIdNum: number, status?: string, incremental = false) => {
     try {
-      const logsData = await projectPipelineApi.getJobTrace(projectId, jobIdNum);
-      setLogs(logsData);
-      return logsData;
+      if (!incremental) {
+        logOffset.current = 0;
+      }
+      const chunk = await projectPipelineApi.getJobTraceSince(projectId, jobIdNum, logOffset.current, status);
+      const restarted = chunk.offset < logOffset.current;
+      logOffset.current = chunk.next_offset;
+      if (incremental && !restarted) {
+        setLogs(prev => prev + chunk.trace);
+      } else {
+        setLogs(chunk.trace);
+      }
+      return chunk.trace;
     } catch (err) {
       console.error('Failed to fetch job logs:', err);
       return 'Failed to load job logs.';
@@ -76,7 +87,7 @@ export const JobLogView: React.FC = () => {
       // 2. 获取 Job 信息
       const jobData = await fetchJobInfo(projectData.id, jobIdNum);
       // 3. 获取 Job 日志
-      const logsData = await fetchJobLogs(projectData.id, jobIdNum);
+      const logsData = await fetchJobLogs(projectData.id, jobIdNum, jobData.status);
     } catch (err) {
       const errorMessage = err instanceof Error ? err.message : 'Failed to load job data';
       setError(errorMessage);
@@ -96,7 +107,7 @@ export const JobLogView: React.FC = () => {
           // 更新 Job 状态
           const updatedJob = await fetchJobInfo(project.id, jobIdNum);
           // 更新日志
-          const updatedLogs = await fetchJobLogs(project.id, jobIdNum);
+          const updatedLogs = await fetchJobLogs(project.id, jobIdNum, updatedJob.status, true);
         } catch (err) {
           console.error('Failed to update job data:', err);
         }
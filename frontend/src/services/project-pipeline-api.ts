@@ -18,6 +18,10 @@ export const projectPipelineApi = {
   // 获取 Job 日志
   getJobTrace: (projectId: number, jobId: number) =>
     apiClient.get(`/projects/${projectId}/jobs/${jobId}/trace`),
+  // 增量获取 Job 日志（trace 为 offset 之后的新内容，另返回 offset 与 next_offset）
+  // status 为已获取的 Job 状态，Job 已结束时后端把日志写入本地归档，之后不再访问 GitLab
+  getJobTraceSince: (projectId: number, jobId: number, offset: number, status?: string) =>
+    apiClient.get(`/projects/${projectId}/jobs/${jobId}/trace?offset=${offset}${status ? `&status=${encodeURIComponent(status)}` : ''}`),
   // 创建 Merge Request
   createMergeRequest: (projectId: number, data: {
     source_branch: string;
@@ -0,0 +1,7 @@
+"""Local GitLab stand-in for offline end-to-end runs and benchmarks"""
+
+from .scenario import Scenario, load_scenario
+from .state import MockGitLab, MockError
+from .app import create_app
+
+__all__ = ["Scenario", "load_scenario", "MockGitLab", "MockError", "create_app"]
@@ -0,0 +1,324 @@
+"""
+FastAPI app serving the GitLab REST endpoints used by the workflow clients
+
+Covers projects, merge requests (create/update/close/merge, MR pipelines), pipelines
+(create/list/cancel/retry), jobs (list/cancel/retry) and traces with Range support.
+Faults from the scenario are injected in a middleware; /_mock/stats reports how many
+API calls each endpoint received so runs can be compared.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from typing import List, Optional
+import requests
+from fastapi import Body, FastAPI, Header, Request
+from fastapi.responses import JSONResponse, Response
+from .scenario import FaultSpec, WebhookSpec
+from .state import MockError, MockGitLab
+
+logger = logging.getLogger(__name__)
+
+
+class FaultInjector:
+    """Latency, 429 and 5xx injection for /api/v4 requests"""
+
+    def __init__(self, faults: FaultSpec, rng: random.Random):
+        self.faults = faults
+        self.random = rng
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+    def latency(self) -> float:
+        jitter = self.random.uniform(0, self.faults.latency_jitter_ms) if self.faults.latency_jitter_ms else 0.0
+        return (self.faults.latency_ms + jitter) / 1000.0
+
+    def inject(self) -> Optional[Response]:
+        faults = self.faults
+        with self._lock:
+            self.requests += 1
+            throttle = bool(faults.rate_limit_every) and self.requests % faults.rate_limit_every == 0
+            throttle = throttle or (faults.rate_limit_rate and self.random.random() < faults.rate_limit_rate)
+            fail = not throttle and faults.server_error_rate and self.random.random() < faults.server_error_rate
+            self.throttled += bool(throttle)
+            self.errors += bool(fail)
+        if throttle:
+            return JSONResponse(
+                {"message": "429 Too Many Requests"}, status_code=429,
+                headers={"Retry-After": f"{faults.retry_after:g}", "RateLimit-Remaining": "0"}
+            )
+        if fail:
+            return JSONResponse({"message": "502 Bad Gateway"}, status_code=502)
+        return None
+
+
+class ApiStats:
+    """API calls per (method, route) and per status code"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.calls: Counter = Counter()
+            self.statuses: Counter = Counter()
+
+    def record(self, method: str, route: str, status_code: int):
+        with self._lock:
+            self.calls[f"{method} {route}"] += 1
+            self.statuses[str(status_code)] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "since_seconds": round(time.time() - self.started, 3),
+                "total": sum(self.calls.values()),
+                "by_status": dict(self.statuses),
+                "by_route": dict(self.calls.most_common()),
+            }
+
+
+class WebhookNotifier(threading.Thread):
+    """Posts pipeline hook events to the workflow backend whenever a pipeline or job changes state"""
+
+    def __init__(self, gitlab: MockGitLab, spec: WebhookSpec):
+        super().__init__(name="mock-gitlab-webhook", daemon=True)
+        self.gitlab = gitlab
+        self.spec = spec
+        self.sent = 0
+        self.failed = 0
+        self._seen = {}
+        self._stopped = threading.Event()
+
+    def run(self):
+        headers = {"X-Gitlab-Event": "Pipeline Hook"}
+        if self.spec.token:
+            headers["X-Gitlab-Token"] = self.spec.token
+        while not self._stopped.wait(self.spec.interval):
+            for event in self.gitlab.changed_pipeline_events(self._seen):
+                try:
+                    requests.post(self.spec.url, json=event, headers=headers, timeout=5).raise_for_status()
+                    self.sent += 1
+                except requests.RequestException as e:
+                    self.failed += 1
+                    logger.warning(f"Webhook delivery for pipeline {event['object_attributes']['id']} failed: {e}")
+
+    def stop(self):
+        self._stopped.set()
+
+
+def _page(request: Request, items: list) -> JSONResponse:
+    """Offset pagination with the X-* headers GitLab sends"""
+    page = max(1, int(request.query_params.get("page", 1)))
+    per_page = min(100, max(1, int(request.query_params.get("per_page", 20))))
+    start = (page - 1) * per_page
+    has_next = start + per_page < len(items)
+    return JSONResponse(items[start:start + per_page], headers={
+        "X-Page": str(page),
+        "X-Per-Page": str(per_page),
+        "X-Total": str(len(items)),
+        "X-Next-Page": str(page + 1) if has_next else "",
+    })
+
+
+def _range_start(value: Optional[str]) -> Optional[int]:
+    if not value or not value.startswith("bytes="):
+        return None
+    start = value[len("bytes="):].split("-", 1)[0]
+    return int(start) if start.isdigit() else None
+
+
+def create_app(gitlab: MockGitLab) -> FastAPI:
+    scenario = gitlab.scenario
+    app = FastAPI(title="Mock GitLab", docs_url="/_mock/docs", openapi_url="/_mock/openapi.json")
+    faults = FaultInjector(scenario.faults, random.Random(scenario.seed))
+    stats = ApiStats()
+    notifier = WebhookNotifier(gitlab, scenario.webhook) if scenario.webhook else None
+
+    @app.on_event("startup")
+    async def start_notifier():
+        if notifier is not None:
+            notifier.start()
+
+    @app.on_event("shutdown")
+    async def stop_notifier():
+        if notifier is not None:
+            notifier.stop()
+
+    @app.exception_handler(MockError)
+    async def mock_error(request: Request, exc: MockError):
+        return JSONResponse({"message": exc.message}, status_code=exc.status_code)
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        if not request.url.path.startswith("/api/v4/"):
+            return await call_next(request)
+        delay = faults.latency()
+        if delay:
+            await asyncio.sleep(delay)
+        injected = faults.inject()
+        if injected is not None:
+            stats.record(request.method, "(injected)", injected.status_code)
+            return injected
+        response = await call_next(request)
+        route = request.scope.get("route")
+        stats.record(request.method, getattr(route, "path", request.url.path), response.status_code)
+        return response
+
+    # ---- mock control ----
+
+    @app.post("/_mock/push")
+    def push(payload: dict = Body(...)):
+        return {"pipelines": gitlab.on_push(payload["project"], payload.get("updates") or [])}
+
+    @app.get("/_mock/stats")
+    def get_stats():
+        pipelines = gitlab.advance_all()
+        return {
+            "api": stats.snapshot(),
+            "injected": {"throttled": faults.throttled, "server_errors": faults.errors},
+            "pipelines": Counter(p.status for p in pipelines),
+            "jobs": Counter(j.status for p in pipelines for j in p.jobs),
+            "webhooks": {"sent": notifier.sent, "failed": notifier.failed} if notifier else None,
+        }
+
+    @app.post("/_mock/stats/reset")
+    def reset_stats():
+        stats.reset()
+        return {"status": "reset"}
+
+    # ---- pipelines ----
+
+    @app.post("/api/v4/projects/{project_id}/pipeline", status_code=201)
+    def create_pipeline(project_id: int, request: Request, payload: Optional[dict] = Body(None)):
+        project = gitlab.project(project_id)
+        ref = (payload or {}).get("ref") or request.query_params.get("ref")
+        sha = project.repo.rev_parse(f"refs/heads/{ref}") if ref else None
+        if sha is None:
+            raise MockError(400, "Reference not found")
+        pipeline = gitlab.create_pipeline(project, ref, sha, "api")
+        if pipeline is None:
+            raise MockError(400, "No stages / jobs for this pipeline.")
+        return gitlab.pipeline_json(pipeline)
+
+    @app.get("/api/v4/projects/{project_id}/pipelines")
+    def list_pipelines(project_id: int, request: Request, ref: Optional[str] = None, sha: Optional[str] = None,
+                       status: Optional[str] = None):
+        project = gitlab.project(project_id)
+        pipelines = sorted(project.pipelines.values(), key=lambda p: p.id, reverse=True)
+        for pipeline in pipelines:
+            gitlab.pipeline(project_id, pipeline.id)
+        pipelines = [p for p in pipelines
+                     if (ref is None or p.ref == ref) and (sha is None or p.sha == sha)
+                     and (status is None or p.status == status)]
+        return _page(request, [gitlab.pipeline_json(p) for p in pipelines])
+
+    @app.get("/api/v4/projects/{project_id}/pipelines/{pipeline_id}")
+    def get_pipeline(project_id: int, pipeline_id: int):
+        return gitlab.pipeline_json(gitlab.pipeline(project_id, pipeline_id))
+
+    @app.post("/api/v4/projects/{project_id}/pipelines/{pipeline_id}/cancel")
+    def cancel_pipeline(project_id: int, pipeline_id: int):
+        return gitlab.pipeline_json(gitlab.cancel_pipeline(gitlab.pipeline(project_id, pipeline_id)))
+
+    @app.post("/api/v4/projects/{project_id}/pipelines/{pipeline_id}/retry", status_code=201)
+    def retry_pipeline(project_id: int, pipeline_id: int):
+        return gitlab.pipeline_json(gitlab.retry_pipeline(gitlab.pipeline(project_id, pipeline_id)))
+
+    @app.get("/api/v4/projects/{project_id}/pipelines/{pipeline_id}/jobs")
+    def pipeline_jobs(project_id: int, pipeline_id: int, request: Request, include_retried: bool = False):
+        pipeline = gitlab.pipeline(project_id, pipeline_id)
+        jobs = pipeline.jobs if include_retried else pipeline.active_jobs()
+        return _page(request, [gitlab.job_json(j) for j in sorted(jobs, key=lambda j: j.id, reverse=True)])
+
+    # ---- jobs ----
+
+    @app.get("/api/v4/projects/{project_id}/jobs")
+    def project_jobs(project_id: int, request: Request):
+        project = gitlab.project(project_id)
+        scope: List[str] = request.query_params.getlist("scope[]") or request.query_params.getlist("scope")
+        jobs = []
+        for pipeline in project.pipelines.values():
+            gitlab.pipeline(project_id, pipeline.id)
+            jobs.extend(pipeline.jobs)
+        jobs = [j for j in sorted(jobs, key=lambda j: j.id, reverse=True) if not scope or j.status in scope]
+        return _page(request, [gitlab.job_json(j) for j in jobs])
+
+    @app.get("/api/v4/projects/{project_id}/jobs/{job_id}")
+    def get_job(project_id: int, job_id: int):
+        return gitlab.job_json(gitlab.job(project_id, job_id))
+
+    @app.get("/api/v4/projects/{project_id}/jobs/{job_id}/trace")
+    def job_trace(project_id: int, job_id: int, range_header: Optional[str] = Header(None, alias="Range")):
+        body = gitlab.trace(gitlab.job(project_id, job_id)).encode()
+        start = _range_start(range_header)
+        if start is None:
+            return Response(body, media_type="text/plain")
+        if start >= len(body):
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{len(body)}"})
+        return Response(body[start:], status_code=206, media_type="text/plain",
+                        headers={"Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"})
+
+    @app.post("/api/v4/projects/{project_id}/jobs/{job_id}/cancel")
+    def cancel_job(project_id: int, job_id: int):
+        return gitlab.job_json(gitlab.cancel_job(gitlab.job(project_id, job_id)))
+
+    @app.post("/api/v4/projects/{project_id}/jobs/{job_id}/retry", status_code=201)
+    def retry_job(project_id: int, job_id: int):
+        return gitlab.job_json(gitlab.retry_job(gitlab.job(project_id, job_id)))
+
+    # ---- merge requests ----
+
+    @app.get("/api/v4/projects/{project_id}/merge_requests")
+    def list_merge_requests(project_id: int, request: Request, state: Optional[str] = None,
+                            source_branch: Optional[str] = None, target_branch: Optional[str] = None):
+        project = gitlab.project(project_id)
+        mrs = [mr for mr in sorted(project.merge_requests.values(), key=lambda m: m.iid, reverse=True)
+               if (state in (None, "all") or mr.state == state)
+               and (source_branch is None or mr.source_branch == source_branch)
+               and (target_branch is None or mr.target_branch == target_branch)]
+        return _page(request, [gitlab.merge_request_json(mr) for mr in mrs])
+
+    @app.post("/api/v4/projects/{project_id}/merge_requests", status_code=201)
+    def create_merge_request(project_id: int, payload: dict = Body(...)):
+        mr = gitlab.create_merge_request(
+            gitlab.project(project_id), payload.get("source_branch"), payload.get("target_branch"),
+            payload.get("title") or "Merge request"
+        )
+        return gitlab.merge_request_json(mr)
+
+    @app.get("/api/v4/projects/{project_id}/merge_requests/{mr_iid}")
+    def get_merge_request(project_id: int, mr_iid: int):
+        return gitlab.merge_request_json(gitlab.merge_request(project_id, mr_iid))
+
+    @app.put("/api/v4/projects/{project_id}/merge_requests/{mr_iid}")
+    def update_merge_request(project_id: int, mr_iid: int, payload: Optional[dict] = Body(None)):
+        mr = gitlab.update_merge_request(gitlab.merge_request(project_id, mr_iid), payload or {})
+        return gitlab.merge_request_json(mr)
+
+    @app.get("/api/v4/projects/{project_id}/merge_requests/{mr_iid}/pipelines")
+    def merge_request_pipelines(project_id: int, mr_iid: int, request: Request):
+        pipelines = gitlab.merge_pipelines(gitlab.merge_request(project_id, mr_iid))
+        return _page(request, [gitlab.pipeline_json(p) for p in pipelines])
+
+    @app.put("/api/v4/projects/{project_id}/merge_requests/{mr_iid}/merge")
+    def merge_merge_request(project_id: int, mr_iid: int, payload: Optional[dict] = Body(None)):
+        payload = payload or {}
+        mr = gitlab.merge(gitlab.merge_request(project_id, mr_iid), payload.get("sha"),
+                          bool(payload.get("should_remove_source_branch")))
+        return gitlab.merge_request_json(mr)
+
+    # ---- projects (registered last: the path form swallows every sub-path) ----
+
+    @app.get("/api/v4/projects/{project_ref:path}")
+    def get_project(project_ref: str):
+        return gitlab.project_json(gitlab.project(project_ref))
+
+    return app
@@ -0,0 +1,105 @@
+"""
+Bare git repositories backing the mock GitLab server
+
+The workflow clones and pushes to <root>/<project path>.git (services.gitlab_url = <root>).
+A post-receive hook reports every push to the server, which then starts the scripted
+pipelines for the pushed commits.
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ZERO_SHA = "0" * 40
+
+_HOOK = '''#!{python}
+import json
+import sys
+import urllib.request
+
+updates = [line.split() for line in sys.stdin if line.strip()]
+body = json.dumps({{
+    "project": {path!r},
+    "updates": [{{"before": b, "after": a, "ref": r}} for b, a, r in updates],
+}}).encode()
+request = urllib.request.Request({url!r}, data=body, headers={{"Content-Type": "application/json"}})
+try:
+    urllib.request.urlopen(request, timeout=30).read()
+except Exception as e:
+    print(f"mock gitlab: push notification failed: {{e}}", file=sys.stderr)
+'''
+
+_IDENTITY = ["-c", "user.name=Mock GitLab", "-c", "user.email=mock-gitlab@localhost"]
+
+
+class BareRepo:
+    def __init__(self, root: str, path: str):
+        self.path = path
+        self.git_dir = os.path.join(root, f"{path}.git")
+
+    def _git(self, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            ["git", *_IDENTITY, "--git-dir", self.git_dir, *args],
+            capture_output=True, text=True, check=check, timeout=60
+        )
+
+    def init(self, files: Dict[str, str], branches: List[str], default_branch: str, push_url: str):
+        """Create and seed the repository unless it already exists; (re)install the push hook"""
+        if not os.path.isdir(self.git_dir):
+            os.makedirs(self.git_dir)
+            subprocess.run(["git", "init", "--bare", "-q", "-b", default_branch, self.git_dir], check=True)
+            self._seed(files, [default_branch, *[b for b in branches if b != default_branch]])
+            logger.info(f"Created bare repository {self.git_dir}")
+        hook = os.path.join(self.git_dir, "hooks", "post-receive")
+        with open(hook, "w", encoding="utf-8") as f:
+            f.write(_HOOK.format(python=sys.executable, path=self.path, url=push_url))
+        os.chmod(hook, 0o755)
+
+    def _seed(self, files: Dict[str, str], branches: List[str]):
+        with tempfile.TemporaryDirectory() as work:
+            subprocess.run(["git", "init", "-q", work], check=True)
+            for name, content in (files or {"README.md": f"# {self.path}\n"}).items():
+                target = os.path.join(work, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "w", encoding="utf-8") as f:
+                    f.write(content)
+            subprocess.run(["git", "add", "-A"], cwd=work, check=True)
+            subprocess.run(["git", *_IDENTITY, "commit", "-q", "-m", "Initial commit"], cwd=work, check=True)
+            # The hook is installed after seeding, so the seed push starts no pipelines
+            refspecs = [f"HEAD:refs/heads/{b}" for b in branches]
+            subprocess.run(["git", "push", "-q", self.git_dir, *refspecs], cwd=work, check=True)
+
+    def rev_parse(self, ref: str) -> Optional[str]:
+        result = self._git("rev-parse", "--verify", "-q", f"{ref}^{{commit}}", check=False)
+        return result.stdout.strip() or None
+
+    def read_file(self, sha: str, name: str) -> Optional[str]:
+        result = self._git("show", f"{sha}:{name}", check=False)
+        return result.stdout if result.returncode == 0 else None
+
+    def tree(self, sha: str) -> str:
+        return self._git("rev-parse", f"{sha}^{{tree}}").stdout.strip()
+
+    def is_ancestor(self, ancestor: str, descendant: str) -> bool:
+        return self._git("merge-base", "--is-ancestor", ancestor, descendant, check=False).returncode == 0
+
+    def merge(self, source_sha: str, target_branch: str, message: str) -> str:
+        """
+        Merge source_sha into target_branch and return the merge commit SHA
+
+        The merge commit takes the source tree as is (no content merge): the workflow's
+        ai branch is always rebuilt from the target branch, so this matches what GitLab produces.
+        """
+        target_sha = self.rev_parse(f"refs/heads/{target_branch}")
+        parents = ["-p", target_sha] if target_sha else []
+        merge_sha = self._git("commit-tree", self.tree(source_sha), *parents, "-p", source_sha, "-m", message).stdout.strip()
+        self._git("update-ref", f"refs/heads/{target_branch}", merge_sha)
+        return merge_sha
+
+    def delete_branch(self, branch: str):
+        self._git("update-ref", "-d", f"refs/heads/{branch}", check=False)
@@ -0,0 +1,76 @@
+"""
+Scenario definitions for the mock GitLab server
+
+A scenario is a YAML file describing the projects the server hosts (seed files and
+branches of the backing bare repositories), the CI jobs every pipeline runs and how
+they behave, and the faults injected into the API (latency, 429s, 5xx).
+"""
+
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+import yaml
+
+
+class FailIf(BaseModel):
+    """Fail a job while a file in the pipeline's commit matches a pattern"""
+    file: str = Field(description="Path of the file inside the repository")
+    pattern: str = Field(description="Regular expression searched in the file content")
+
+
+class JobSpec(BaseModel):
+    name: str
+    stage: str = "test"
+    duration: float = Field(default=5.0, description="Seconds the job runs, before time_scale")
+    queued: float = Field(default=0.5, description="Seconds the job stays pending, before time_scale")
+    allow_failure: bool = False
+    only: Optional[List[str]] = Field(default=None, description="Refs the job runs on; all refs when omitted")
+    fail_first: int = Field(default=0, description="Fail the first N pipelines that run this job (script failure)")
+    fail_if: Optional[FailIf] = Field(default=None, description="Fail while the commit contains a pattern (script failure)")
+    flaky_rate: float = Field(default=0.0, description="Probability that a run fails with a runner system failure")
+    failure_log: str = Field(
+        default="AssertionError: expected 200, got 500",
+        description="Lines appended to the trace of a script failure"
+    )
+    log_lines: int = Field(default=50, description="Filler lines in the trace, written as the job progresses")
+
+
+class ProjectSpec(BaseModel):
+    id: int
+    path: str = Field(description="path_with_namespace, also the bare repository path")
+    default_branch: str = "main"
+    branches: List[str] = Field(default_factory=lambda: ["main", "dev"])
+    files: Dict[str, str] = Field(default_factory=dict, description="Files of the seed commit")
+    jobs: List[JobSpec] = Field(default_factory=list)
+    mr_pipelines: str = Field(
+        default="branch",
+        description="branch: pushes run branch pipelines; merge_request: MR pipelines while an MR is open; "
+                    "both: branch and MR pipelines (duplicates)"
+    )
+
+
+class FaultSpec(BaseModel):
+    latency_ms: float = Field(default=0.0, description="Latency added to every API response")
+    latency_jitter_ms: float = Field(default=0.0, description="Random extra latency, uniform in [0, jitter]")
+    rate_limit_every: int = Field(default=0, description="Answer every Nth API request with 429; 0 disables")
+    rate_limit_rate: float = Field(default=0.0, description="Probability of answering an API request with 429")
+    retry_after: float = Field(default=1.0, description="Retry-After seconds sent with 429 responses")
+    server_error_rate: float = Field(default=0.0, description="Probability of answering an API request with 502")
+
+
+class WebhookSpec(BaseModel):
+    url: str = Field(description="Receiver URL, e.g. http://127.0.0.1:8001/api/webhooks/gitlab")
+    token: Optional[str] = Field(default=None, description="Sent as X-Gitlab-Token")
+    interval: float = Field(default=0.5, description="Seconds between state checks for status changes")
+
+
+class Scenario(BaseModel):
+    projects: List[ProjectSpec]
+    faults: FaultSpec = Field(default_factory=FaultSpec)
+    webhook: Optional[WebhookSpec] = None
+    time_scale: float = Field(default=1.0, description="Multiplier applied to job durations and queue times")
+    seed: Optional[int] = Field(default=None, description="Random seed for flaky jobs and injected faults")
+
+
+def load_scenario(path: str) -> Scenario:
+    with open(path, "r", encoding="utf-8") as f:
+        return Scenario(**(yaml.safe_load(f) or {}))
@@ -0,0 +1,549 @@
+"""
+In-memory GitLab state driven by a scenario
+
+Job progress is derived from wall-clock time on every read (advance), so no background
+scheduler is needed: a job becomes pending once the previous stages finished, starts
+after its queue time and finishes after its duration with the verdict decided when the
+job was created.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from .git_backend import BareRepo, ZERO_SHA
+from .scenario import JobSpec, ProjectSpec, Scenario
+
+logger = logging.getLogger(__name__)
+
+UNFINISHED = {"created", "pending", "running"}
+FINISHED = {"success", "failed", "canceled", "skipped"}
+
+
+class MockError(Exception):
+    """Turned into a GitLab-style error response ({"message": ...}) by the API layer"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+def iso(ts: Optional[float]) -> Optional[str]:
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class MockJob:
+    __slots__ = ("id", "pipeline", "spec", "stage_index", "status", "verdict", "failure_reason",
+                 "script_failed", "created_at", "pending_at", "started_at", "finished_at", "retried")
+
+    def __init__(self, job_id: int, pipeline: "MockPipeline", spec: JobSpec, stage_index: int,
+                 verdict: str, failure_reason: Optional[str], script_failed: bool, now: float):
+        self.id = job_id
+        self.pipeline = pipeline
+        self.spec = spec
+        self.stage_index = stage_index
+        self.status = "created"
+        self.verdict = verdict
+        self.failure_reason = failure_reason
+        self.script_failed = script_failed
+        self.created_at = now
+        self.pending_at: Optional[float] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.retried = False
+
+    def finish(self, status: str, at: float):
+        self.status = status
+        self.finished_at = at
+
+
+class MockPipeline:
+    __slots__ = ("id", "project", "ref", "sha", "source", "created_at", "jobs")
+
+    def __init__(self, pipeline_id: int, project: "MockProject", ref: str, sha: str, source: str, now: float):
+        self.id = pipeline_id
+        self.project = project
+        self.ref = ref
+        self.sha = sha
+        self.source = source
+        self.created_at = now
+        self.jobs: List[MockJob] = []
+
+    def active_jobs(self) -> List[MockJob]:
+        """Latest run of every job; retried runs are hidden like in GitLab"""
+        return [j for j in self.jobs if not j.retried]
+
+    @property
+    def status(self) -> str:
+        statuses = [j.status if not (j.status == "failed" and j.spec.allow_failure) else "success"
+                    for j in self.active_jobs()]
+        if any(s == "running" for s in statuses):
+            return "running"
+        if any(s in ("created", "pending") for s in statuses):
+            return "running" if any(s in FINISHED for s in statuses) else "pending"
+        if any(s == "failed" for s in statuses):
+            return "failed"
+        if any(s == "canceled" for s in statuses):
+            return "canceled"
+        return "success"
+
+    @property
+    def updated_at(self) -> float:
+        times = [t for j in self.jobs for t in (j.finished_at, j.started_at, j.pending_at) if t is not None]
+        return max(times, default=self.created_at)
+
+
+class MockMergeRequest:
+    __slots__ = ("id", "iid", "project", "source_branch", "target_branch", "title", "description", "state",
+                 "sha", "shas", "merge_commit_sha", "created_at", "updated_at", "merged_at")
+
+    def __init__(self, mr_id: int, iid: int, project: "MockProject", source_branch: str, target_branch: str,
+                 title: str, sha: str, now: float):
+        self.id = mr_id
+        self.iid = iid
+        self.project = project
+        self.source_branch = source_branch
+        self.target_branch = target_branch
+        self.title = title
+        self.description: Optional[str] = None
+        self.state = "opened"
+        self.sha = sha
+        self.shas = {sha}
+        self.merge_commit_sha: Optional[str] = None
+        self.created_at = now
+        self.updated_at = now
+        self.merged_at: Optional[float] = None
+
+
+class MockProject:
+    def __init__(self, spec: ProjectSpec, repo: BareRepo):
+        self.spec = spec
+        self.repo = repo
+        self.pipelines: Dict[int, MockPipeline] = {}
+        self.merge_requests: Dict[int, MockMergeRequest] = {}
+        # Job name -> pipelines that have run the job so far (drives fail_first)
+        self.job_runs: Dict[str, int] = {}
+
+    @property
+    def id(self) -> int:
+        return self.spec.id
+
+
+class MockGitLab:
+    def __init__(self, scenario: Scenario, root: str, base_url: str):
+        self.scenario = scenario
+        self.base_url = base_url.rstrip("/")
+        self.random = random.Random(scenario.seed)
+        self._lock = threading.RLock()
+        self._ids = {"pipeline": 1000, "job": 5000, "mr": 300}
+        self.projects: Dict[int, MockProject] = {}
+        for spec in scenario.projects:
+            repo = BareRepo(root, spec.path)
+            repo.init(spec.files, spec.branches, spec.default_branch, f"{self.base_url}/_mock/push")
+            self.projects[spec.id] = MockProject(spec, repo)
+
+    def _next_id(self, kind: str) -> int:
+        self._ids[kind] += 1
+        return self._ids[kind]
+
+    def _scaled(self, seconds: float) -> float:
+        return seconds * self.scenario.time_scale
+
+    # ---- lookups ----
+
+    def project(self, ref) -> MockProject:
+        with self._lock:
+            if isinstance(ref, int) or str(ref).isdigit():
+                project = self.projects.get(int(ref))
+            else:
+                project = next((p for p in self.projects.values() if p.spec.path == ref), None)
+            if project is None:
+                raise MockError(404, "404 Project Not Found")
+            return project
+
+    def pipeline(self, project_id: int, pipeline_id: int) -> MockPipeline:
+        pipeline = self.project(project_id).pipelines.get(pipeline_id)
+        if pipeline is None:
+            raise MockError(404, "404 Not found")
+        self._advance(pipeline)
+        return pipeline
+
+    def job(self, project_id: int, job_id: int) -> MockJob:
+        project = self.project(project_id)
+        for pipeline in project.pipelines.values():
+            for job in pipeline.jobs:
+                if job.id == job_id:
+                    self._advance(pipeline)
+                    return job
+        raise MockError(404, "404 Not found")
+
+    def merge_request(self, project_id: int, iid: int) -> MockMergeRequest:
+        mr = self.project(project_id).merge_requests.get(iid)
+        if mr is None:
+            raise MockError(404, "404 Not found")
+        return mr
+
+    # ---- simulation ----
+
+    def _decide(self, project: MockProject, spec: JobSpec, sha: str, runs: int) -> Tuple[str, Optional[str], bool]:
+        """(verdict, failure_reason, script_failed) of a new job"""
+        script_failed = runs < spec.fail_first
+        if not script_failed and spec.fail_if is not None:
+            content = project.repo.read_file(sha, spec.fail_if.file) or ""
+            script_failed = re.search(spec.fail_if.pattern, content) is not None
+        if script_failed:
+            return "failed", "script_failure", True
+        return self._roll_flaky(spec)
+
+    def _roll_flaky(self, spec: JobSpec) -> Tuple[str, Optional[str], bool]:
+        if spec.flaky_rate and self.random.random() < spec.flaky_rate:
+            return "failed", "runner_system_failure", False
+        return "success", None, False
+
+    def create_pipeline(self, project: MockProject, ref: str, sha: str, source: str = "push") -> Optional[MockPipeline]:
+        """Start a pipeline for sha; refs without any job get no pipeline, like GitLab"""
+        branch = ref.split("/")[-1] if ref.startswith("refs/heads/") else ref
+        specs = [s for s in project.spec.jobs if s.only is None or branch in s.only]
+        if not specs:
+            return None
+        now = time.time()
+        with self._lock:
+            pipeline = MockPipeline(self._next_id("pipeline"), project, ref, sha, source, now)
+            stages: List[str] = []
+            for spec in specs:
+                if spec.stage not in stages:
+                    stages.append(spec.stage)
+                runs = project.job_runs.get(spec.name, 0)
+                project.job_runs[spec.name] = runs + 1
+                verdict, reason, script_failed = self._decide(project, spec, sha, runs)
+                pipeline.jobs.append(MockJob(self._next_id("job"), pipeline, spec, stages.index(spec.stage),
+                                             verdict, reason, script_failed, now))
+            project.pipelines[pipeline.id] = pipeline
+        logger.info(f"Pipeline {pipeline.id} created for {project.spec.path} {ref}@{sha[:8]} ({source})")
+        return pipeline
+
+    def _stage_gate(self, pipeline: MockPipeline, stage_index: int) -> Tuple[str, float]:
+        """wait / go / skip for jobs of a stage, with the time the previous stages finished"""
+        previous = [j for j in pipeline.active_jobs() if j.stage_index < stage_index]
+        if any(j.status in UNFINISHED for j in previous):
+            return "wait", 0.0
+        done_at = max((j.finished_at for j in previous if j.finished_at is not None), default=pipeline.created_at)
+        blocked = any(j.status == "canceled" or (j.status == "failed" and not j.spec.allow_failure) for j in previous)
+        return ("skip" if blocked else "go"), done_at
+
+    def _advance(self, pipeline: MockPipeline, now: Optional[float] = None):
+        now = now or time.time()
+        with self._lock:
+            changed = True
+            while changed:
+                changed = False
+                for job in pipeline.active_jobs():
+                    if job.status == "created":
+                        gate, at = self._stage_gate(pipeline, job.stage_index)
+                        if gate == "go":
+                            job.status = "pending"
+                            job.pending_at = max(at, job.created_at)
+                            changed = True
+                        elif gate == "skip":
+                            job.finish("skipped", max(at, job.created_at))
+                            changed = True
+                    if job.status == "pending" and now >= job.pending_at + self._scaled(job.spec.queued):
+                        job.status = "running"
+                        job.started_at = job.pending_at + self._scaled(job.spec.queued)
+                        changed = True
+                    if job.status == "running" and now >= job.started_at + self._scaled(job.spec.duration):
+                        job.finish(job.verdict, job.started_at + self._scaled(job.spec.duration))
+                        changed = True
+
+    def advance_all(self) -> List[MockPipeline]:
+        with self._lock:
+            pipelines = [p for project in self.projects.values() for p in project.pipelines.values()]
+            for pipeline in pipelines:
+                self._advance(pipeline)
+            return pipelines
+
+    def changed_pipeline_events(self, seen: Dict[int, tuple]) -> List[dict]:
+        """Hook payloads of pipelines whose status or job statuses changed since the last call"""
+        events = []
+        with self._lock:
+            for pipeline in self.advance_all():
+                signature = (pipeline.status, tuple((j.id, j.status) for j in pipeline.active_jobs()))
+                if seen.get(pipeline.id) != signature:
+                    seen[pipeline.id] = signature
+                    events.append(self.pipeline_event(pipeline))
+        return events
+
+    # ---- pushes and pipelines ----
+
+    def on_push(self, project_path: str, updates: List[Dict[str, str]]) -> List[int]:
+        """Called by the post-receive hook; returns the ids of the pipelines started"""
+        project = self.project(project_path)
+        started = []
+        for update in updates:
+            ref, sha = update["ref"], update["after"]
+            if sha == ZERO_SHA or not ref.startswith("refs/heads/"):
+                continue
+            started.extend(p.id for p in self._on_branch_update(project, ref[len("refs/heads/"):], sha) if p)
+        return started
+
+    def _on_branch_update(self, project: MockProject, branch: str, sha: str) -> List[Optional[MockPipeline]]:
+        with self._lock:
+            open_mrs = [mr for mr in project.merge_requests.values()
+                        if mr.state == "opened" and mr.source_branch == branch]
+            for mr in open_mrs:
+                mr.sha = sha
+                mr.shas.add(sha)
+                mr.updated_at = time.time()
+        mode = project.spec.mr_pipelines
+        pipelines = []
+        if mode in ("branch", "both") or not open_mrs:
+            pipelines.append(self.create_pipeline(project, branch, sha))
+        if mode in ("merge_request", "both"):
+            for mr in open_mrs:
+                pipelines.append(self.create_pipeline(project, f"refs/merge-requests/{mr.iid}/head", sha,
+                                                      "merge_request_event"))
+        return pipelines
+
+    def cancel_job(self, job: MockJob) -> MockJob:
+        with self._lock:
+            if job.status in UNFINISHED:
+                job.finish("canceled", time.time())
+            return job
+
+    def cancel_pipeline(self, pipeline: MockPipeline) -> MockPipeline:
+        with self._lock:
+            for job in pipeline.active_jobs():
+                self.cancel_job(job)
+            return pipeline
+
+    def retry_job(self, job: MockJob) -> MockJob:
+        with self._lock:
+            if job.retried:
+                raise MockError(403, "403 Forbidden - Job is not retryable")
+            if job.status in UNFINISHED:
+                raise MockError(403, "403 Forbidden - Job is not retryable")
+            pipeline = job.pipeline
+            if job.script_failed:
+                verdict, reason, script_failed = "failed", "script_failure", True
+            else:
+                verdict, reason, script_failed = self._roll_flaky(job.spec)
+            retry = MockJob(self._next_id("job"), pipeline, job.spec, job.stage_index,
+                            verdict, reason, script_failed, time.time())
+            job.retried = True
+            pipeline.jobs.append(retry)
+            # Later stages run again once the retried job finishes
+            for other in pipeline.active_jobs():
+                if other.stage_index > job.stage_index and other.status == "skipped":
+                    other.status = "created"
+                    other.finished_at = None
+            self._advance(pipeline)
+            return retry
+
+    def retry_pipeline(self, pipeline: MockPipeline) -> MockPipeline:
+        with self._lock:
+            for job in pipeline.active_jobs():
+                if job.status in ("failed", "canceled"):
+                    self.retry_job(job)
+            return pipeline
+
+    # ---- merge requests ----
+
+    def create_merge_request(self, project: MockProject, source_branch: str, target_branch: str, title: str) -> MockMergeRequest:
+        sha = project.repo.rev_parse(f"refs/heads/{source_branch}")
+        if sha is None:
+            raise MockError(400, f"Invalid source branch: {source_branch}")
+        if project.repo.rev_parse(f"refs/heads/{target_branch}") is None:
+            raise MockError(400, f"Invalid target branch: {target_branch}")
+        with self._lock:
+            existing = next((mr for mr in project.merge_requests.values()
+                             if mr.state == "opened" and mr.source_branch == source_branch), None)
+            if existing is not None:
+                raise MockError(409, f"Another open merge request already exists for this source branch: !{existing.iid}")
+            iid = max(project.merge_requests, default=0) + 1
+            mr = MockMergeRequest(self._next_id("mr"), iid, project, source_branch, target_branch, title, sha, time.time())
+            project.merge_requests[iid] = mr
+        if project.spec.mr_pipelines in ("merge_request", "both"):
+            self.create_pipeline(project, f"refs/merge-requests/{iid}/head", sha, "merge_request_event")
+        return mr
+
+    def update_merge_request(self, mr: MockMergeRequest, data: dict) -> MockMergeRequest:
+        with self._lock:
+            if "title" in data:
+                mr.title = data["title"]
+            if "description" in data:
+                mr.description = data["description"]
+            event = data.get("state_event")
+            if event == "close" and mr.state == "opened":
+                mr.state = "closed"
+            elif event == "reopen" and mr.state == "closed":
+                mr.state = "opened"
+            mr.updated_at = time.time()
+            return mr
+
+    def merge_status(self, mr: MockMergeRequest) -> str:
+        if mr.state != "opened":
+            return "cannot_be_merged"
+        target = mr.project.repo.rev_parse(f"refs/heads/{mr.target_branch}")
+        if target and mr.project.repo.is_ancestor(mr.sha, target):
+            # Nothing on the source branch that the target does not already have
+            return "nothing_to_merge"
+        return "can_be_merged"
+
+    def merge_pipelines(self, mr: MockMergeRequest) -> List[MockPipeline]:
+        mr_ref = f"refs/merge-requests/{mr.iid}/head"
+        pipelines = [p for p in mr.project.pipelines.values()
+                     if p.ref == mr_ref or (p.ref == mr.source_branch and p.sha in mr.shas)]
+        for pipeline in pipelines:
+            self._advance(pipeline)
+        return sorted(pipelines, key=lambda p: p.id, reverse=True)
+
+    def merge(self, mr: MockMergeRequest, sha: Optional[str] = None, remove_source_branch: bool = False) -> MockMergeRequest:
+        project = mr.project
+        with self._lock:
+            if mr.state != "opened":
+                raise MockError(405, "405 Method Not Allowed")
+            head = project.repo.rev_parse(f"refs/heads/{mr.source_branch}") or mr.sha
+            if sha and sha != head:
+                raise MockError(409, "SHA does not match HEAD of source branch: " + head)
+            if self.merge_status(mr) != "can_be_merged":
+                raise MockError(405, "405 Method Not Allowed")
+            message = f"Merge branch '{mr.source_branch}' into '{mr.target_branch}'\n\n{mr.title}\n\nSee merge request !{mr.iid}"
+            merge_sha = project.repo.merge(head, mr.target_branch, message)
+            mr.state = "merged"
+            mr.merge_commit_sha = merge_sha
+            mr.merged_at = mr.updated_at = time.time()
+            if remove_source_branch:
+                project.repo.delete_branch(mr.source_branch)
+        # update-ref does not run hooks, so start the target branch pipeline here
+        self._on_branch_update(project, mr.target_branch, merge_sha)
+        return mr
+
+    # ---- traces ----
+
+    def trace(self, job: MockJob) -> str:
+        spec = job.spec
+        lines = [f"Running with gitlab-runner 16.11.0 (mock) on mock-runner",
+                 f"Preparing the \"shell\" executor",
+                 f"Checking out {job.pipeline.sha[:8]} as detached HEAD (ref {job.pipeline.ref})..."]
+        if job.started_at is None:
+            return ""
+        if job.status == "running":
+            progress = min(1.0, (time.time() - job.started_at) / max(self._scaled(spec.duration), 1e-6))
+        else:
+            progress = 1.0 if job.status in ("success", "failed") else 0.5
+        lines.append(f"$ ./ci/{spec.name}.sh")
+        lines.extend(f"[{spec.name}] step {i + 1}/{spec.log_lines} ok" for i in range(int(spec.log_lines * progress)))
+        if job.status == "success":
+            lines.append("Job succeeded")
+        elif job.status == "failed" and job.failure_reason == "runner_system_failure":
+            lines.append("ERROR: Job failed (system failure): prepare environment: exit status 1")
+        elif job.status == "failed":
+            lines.extend(spec.failure_log.splitlines())
+            lines.append("ERROR: Job failed: exit code 1")
+        elif job.status == "canceled":
+            lines.append("ERROR: Job failed: canceled")
+        return "\n".join(lines) + "\n"
+
+    # ---- JSON views ----
+
+    def project_json(self, project: MockProject) -> dict:
+        spec = project.spec
+        return {
+            "id": spec.id,
+            "name": spec.path.split("/")[-1],
+            "path": spec.path.split("/")[-1],
+            "path_with_namespace": spec.path,
+            "visibility": "private",
+            "default_branch": spec.default_branch,
+            "web_url": f"{self.base_url}/{spec.path}",
+        }
+
+    def pipeline_json(self, pipeline: MockPipeline) -> dict:
+        return {
+            "id": pipeline.id,
+            "iid": pipeline.id,
+            "project_id": pipeline.project.id,
+            "status": pipeline.status,
+            "ref": pipeline.ref,
+            "sha": pipeline.sha,
+            "source": pipeline.source,
+            "web_url": f"{self.base_url}/{pipeline.project.spec.path}/-/pipelines/{pipeline.id}",
+            "created_at": iso(pipeline.created_at),
+            "updated_at": iso(pipeline.updated_at),
+        }
+
+    def job_json(self, job: MockJob) -> dict:
+        duration = None
+        if job.started_at is not None:
+            duration = (job.finished_at or time.time()) - job.started_at
+        queued = None
+        if job.pending_at is not None:
+            queued = (job.started_at or time.time()) - job.pending_at
+        return {
+            "id": job.id,
+            "status": job.status,
+            "stage": job.spec.stage,
+            "name": job.spec.name,
+            "ref": job.pipeline.ref,
+            "allow_failure": job.spec.allow_failure,
+            "failure_reason": job.failure_reason if job.status == "failed" else None,
+            "created_at": iso(job.created_at),
+            "started_at": iso(job.started_at),
+            "finished_at": iso(job.finished_at),
+            "duration": duration,
+            "queued_duration": queued,
+            "web_url": f"{self.base_url}/{job.pipeline.project.spec.path}/-/jobs/{job.id}",
+            "pipeline": {"id": job.pipeline.id, "ref": job.pipeline.ref, "sha": job.pipeline.sha,
+                         "status": job.pipeline.status},
+        }
+
+    def merge_request_json(self, mr: MockMergeRequest) -> dict:
+        return {
+            "id": mr.id,
+            "iid": mr.iid,
+            "project_id": mr.project.id,
+            "source_branch": mr.source_branch,
+            "target_branch": mr.target_branch,
+            "state": mr.state,
+            "title": mr.title,
+            "description": mr.description,
+            "web_url": f"{self.base_url}/{mr.project.spec.path}/-/merge_requests/{mr.iid}",
+            "author": {"id": 1, "name": "Mock User", "username": "mock"},
+            "created_at": iso(mr.created_at),
+            "updated_at": iso(mr.updated_at),
+            "merged_at": iso(mr.merged_at),
+            "sha": mr.sha,
+            "merge_commit_sha": mr.merge_commit_sha,
+            "squash_commit_sha": None,
+            "merge_status": self.merge_status(mr),
+            "has_conflicts": False,
+            "work_in_progress": False,
+            "draft": False,
+        }
+
+    def pipeline_event(self, pipeline: MockPipeline) -> dict:
+        """Pipeline hook payload in the shape GitLab sends"""
+        return {
+            "object_kind": "pipeline",
+            "object_attributes": {
+                "id": pipeline.id,
+                "ref": pipeline.ref,
+                "sha": pipeline.sha,
+                "status": pipeline.status,
+                "source": pipeline.source,
+                "url": self.pipeline_json(pipeline)["web_url"],
+            },
+            "project": {"id": pipeline.project.id, "path_with_namespace": pipeline.project.spec.path},
+            "builds": [
+                {key: self.job_json(job)[key] for key in
+                 ("id", "name", "stage", "status", "started_at", "finished_at", "duration",
+                  "queued_duration", "allow_failure", "failure_reason")}
+                for job in pipeline.active_jobs()
+            ],
+        }
@@ -0,0 +1,48 @@
+"""
+Start the mock GitLab server for offline runs and benchmarks
+
+    python run_mock_gitlab.py --scenario mock_gitlab/scenarios/debug_loop.yaml
+
+Bare repositories are created under --data-dir; point services.gitlab_url at that
+directory and services.gitlab_http_url at the server, then run the workflow as usual.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+import uvicorn
+
+root_dir = Path(__file__).resolve().parent
+sys.path.insert(0, str(root_dir))
+
+from mock_gitlab import MockGitLab, create_app, load_scenario
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock GitLab server with scriptable pipelines")
+    parser.add_argument("--scenario", default=str(root_dir / "mock_gitlab" / "scenarios" / "debug_loop.yaml"))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8929)
+    parser.add_argument("--data-dir", default=str(root_dir / "mock_gitlab_data"),
+                        help="Directory holding the bare repositories")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s][%(levelname)s] %(name)s: %(message)s")
+    base_url = f"http://{args.host}:{args.port}"
+    data_dir = os.path.abspath(args.data_dir)
+    gitlab = MockGitLab(load_scenario(args.scenario), data_dir, base_url)
+
+    print("config.yaml:")
+    print("  services:")
+    print(f"    gitlab_url: {data_dir}")
+    print(f"    gitlab_http_url: {base_url}")
+    for project in gitlab.projects.values():
+        print(f"  project: {project.spec.path} (id {project.id})")
+    print(f"API call stats: {base_url}/_mock/stats")
+    uvicorn.run(create_app(gitlab), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+# clients/cassette.py
+
+import atexit
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+import requests
+from requests.structures import CaseInsensitiveDict
+from clients.logging.logger import logger
+from config.config_models import resolve_data_path
+
+CASSETTE_VERSION = 1
+
+# 回放需要的响应头（分页、限流、Range、内容类型），其余响应头不写入录制文件
+KEPT_HEADERS = {
+    "content-type", "content-range", "accept-ranges", "location", "link", "etag", "retry-after",
+    "x-next-page", "x-page", "x-per-page", "x-prev-page", "x-total", "x-total-pages",
+}
+KEPT_HEADER_PREFIXES = ("ratelimit-",)
+
+# 键名命中即视为敏感字段：查询参数与 JSON 请求/响应体中的值会被替换
+SECRET_KEY_RE = re.compile(r"(token|secret|password|passwd|api[_-]?key|authorization)", re.IGNORECASE)
+_JSON_SECRET_KEY_RE = re.compile(r'"[^"]*(token|secret|password|passwd|api[_-]?key|authorization)[^"]*"\s*:', re.IGNORECASE)
+REDACTED = "REDACTED"
+
+class CassetteMiss(requests.ConnectionError):
+    """回放模式下录制文件中没有与请求匹配的响应"""
+
+def _redact_json(value):
+    if isinstance(value, dict):
+        return {k: (REDACTED if SECRET_KEY_RE.search(k) and isinstance(v, str) and v else _redact_json(v))
+                for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact_json(v) for v in value]
+    return value
+
+class Cassette:
+    """
+    GitLab / LLM HTTP 流量的录制与回放
+
+    - record: 请求照常发出，把（方法、路径、响应状态、必要响应头、响应体或流式分块、耗时）
+      逐条追加到 gzip 压缩的 JSON Lines 文件；Token、API Key 等敏感信息在写入前替换为 REDACTED
+    - replay: 不访问网络，按录制顺序返回同一（方法、路径 + 查询参数）的响应，并按
+      latency_scale 缩放原始耗时（0 表示不等待）；同一 GET 的录制用完后重复最后一条（轮询），
+      其它请求没有可用录制时抛出 CassetteMiss
+
+    请求体只记录摘要，不参与匹配：新版本生成的提示词或提交内容不同也能按顺序回放
+    """
+
+    def __init__(self, mode: str = "off", path: str = "", latency_scale: float = 1.0,
+                 secrets: Iterable[Optional[str]] = ()):
+        self.mode = mode
+        self.path = path
+        self.latency_scale = latency_scale
+        # 过短的值替换后会误伤正常内容
+        self._secrets = sorted({s for s in secrets if s and len(s) >= 6}, key=len, reverse=True)
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._file = None
+        self._entries: Dict[str, Deque[dict]] = {}
+        self._last: Dict[str, dict] = {}
+        self._total = 0
+        self.recorded = 0
+        self.replayed = 0
+        self.repeated = 0
+        self.misses = 0
+        if mode == "record":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+            self._write({"version": CASSETTE_VERSION, "recorded_at": datetime.now(timezone.utc).isoformat()})
+            logger.info(f"Recording HTTP traffic to cassette {path}")
+        elif mode == "replay":
+            self._load()
+            logger.info(f"Replaying HTTP traffic from cassette {path} ({self._total} responses, latency x{latency_scale})")
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    # ---- 脱敏与匹配 ----
+
+    def redact_text(self, text: str) -> str:
+        for secret in self._secrets:
+            if secret in text:
+                text = text.replace(secret, REDACTED)
+        return text
+
+    def _redact_body(self, text: str, content_type: str) -> str:
+        text = self.redact_text(text)
+        if "json" in content_type and _JSON_SECRET_KEY_RE.search(text):
+            try:
+                return json.dumps(_redact_json(json.loads(text)), ensure_ascii=False, separators=(",", ":"))
+            except ValueError:
+                pass
+        return text
+
+    def key(self, method: str, url: str) -> str:
+        """匹配键：方法 + 路径 + 排序后的查询参数（不含主机，回放时服务地址可以不同）"""
+        parts = urlsplit(url)
+        query = sorted(
+            (k, REDACTED if SECRET_KEY_RE.search(k) else self.redact_text(v))
+            for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        )
+        path = self.redact_text(parts.path)
+        return f"{method.upper()} {path}?{urlencode(query)}" if query else f"{method.upper()} {path}"
+
+    # ---- 录制 ----
+
+    def _write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + "\n")
+            # 进程被中断时已写入的条目仍可读取
+            self._file.flush()
+
+    def record(self, method: str, url: str, started: float, status: int, headers, elapsed: float,
+               chunks: List[Tuple[float, bytes]], body_digest: Optional[str] = None):
+        """
+        追加一条交互
+
+        Args:
+            started: 请求开始时间（time.monotonic()）
+            elapsed: 从发出请求到收到响应头的秒数（非流式请求为完整耗时）
+            chunks: [(距上一块的秒数, 解码后的字节)]，非流式响应为单个块
+            body_digest: 请求体摘要
+        """
+        kept = {k.lower(): v for k, v in headers.items()
+                if k.lower() in KEPT_HEADERS or k.lower().startswith(KEPT_HEADER_PREFIXES)}
+        content_type = kept.get("content-type", "")
+        try:
+            texts = [c.decode("utf-8") for _, c in chunks]
+            if len(texts) == 1:
+                texts = [self._redact_body(texts[0], content_type)]
+            else:
+                texts = [self.redact_text(t) for t in texts]
+            encoding = None
+        except UnicodeDecodeError:
+            # 二进制内容，或块边界截断了多字节字符：按 base64 原样存储
+            texts = [base64.b64encode(c).decode("ascii") for _, c in chunks]
+            encoding = "base64"
+        entry = {
+            "t": round(started - self._started, 3),
+            "key": self.key(method, url),
+            "status": status,
+            "headers": kept,
+            "elapsed": round(elapsed, 4),
+        }
+        if body_digest:
+            entry["request_sha"] = body_digest
+        if encoding:
+            entry["encoding"] = encoding
+        if len(chunks) == 1 and chunks[0][0] == 0:
+            entry["body"] = texts[0]
+        else:
+            entry["chunks"] = [[round(dt, 4), text] for (dt, _), text in zip(chunks, texts)]
+        self._write(entry)
+        with self._lock:
+            self.recorded += 1
+
+    # ---- 回放 ----
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version {header.get('version')} in {self.path}")
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._entries.setdefault(entry["key"], deque()).append(entry)
+        self._total = sum(len(q) for q in self._entries.values())
+
+    def take(self, method: str, url: str) -> dict:
+        """取出与请求匹配的下一条录制"""
+        key = self.key(method, url)
+        with self._lock:
+            queue = self._entries.get(key)
+            if queue:
+                entry = queue.popleft()
+                self._last[key] = entry
+                self.replayed += 1
+                return entry
+            if method.upper() == "GET" and key in self._last:
+                self.repeated += 1
+                return self._last[key]
+            self.misses += 1
+        raise CassetteMiss(f"No recorded response for {key} in cassette {self.path}")
+
+    def delay(self, seconds: float) -> float:
+        return max(0.0, seconds) * self.latency_scale
+
+    def chunks(self, entry: dict) -> List[Tuple[float, bytes]]:
+        """录制条目中的 [(缩放后的等待秒数, 字节)]"""
+        if "chunks" in entry:
+            pieces = entry["chunks"]
+        else:
+            pieces = [[0, entry.get("body", "")]]
+        decode = base64.b64decode if entry.get("encoding") == "base64" else (lambda s: s.encode("utf-8"))
+        return [(self.delay(dt), decode(text)) for dt, text in pieces]
+
+    # ---- requests 接入 ----
+
+    def request(self, method: str, url: str, stream: bool = False, **kwargs) -> requests.Response:
+        """requests.request 的替代：off 模式直接转发，record 模式边发边录，replay 模式从录制文件返回"""
+        if self.mode not in ("record", "replay"):
+            return requests.request(method, url, stream=stream, **kwargs)
+        full_url = requests.Request(method, url, params=kwargs.get("params")).prepare().url
+        if self.replaying:
+            return self._replay_response(method, full_url, stream)
+        started = time.monotonic()
+        resp = requests.request(method, url, stream=stream, **kwargs)
+        elapsed = time.monotonic() - started
+        digest = body_digest(kwargs.get("json"), kwargs.get("data"))
+        if stream:
+            resp.raw = _RecordingRaw(resp.raw, lambda chunks: self.record(
+                method, full_url, started, resp.status_code, resp.headers, elapsed, chunks, digest))
+        else:
+            self.record(method, full_url, started, resp.status_code, resp.headers, elapsed,
+                        [(0, resp.content)], digest)
+        return resp
+
+    def _replay_response(self, method: str, url: str, stream: bool) -> requests.Response:
+        entry = self.take(method, url)
+        time.sleep(self.delay(entry["elapsed"]))
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp.reason = _reason(entry["status"])
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+        resp.url = url
+        resp.request = requests.Request(method, url).prepare()
+        resp.elapsed = timedelta(seconds=entry["elapsed"])
+        chunks = self.chunks(entry)
+        if stream:
+            resp.raw = _ReplayRaw(chunks)
+        else:
+            for wait, _ in chunks:
+                time.sleep(wait)
+            resp._content = b"".join(c for _, c in chunks)
+        return resp
+
+    # ---- 状态 ----
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self.replaying:
+            unused = sum(len(q) for q in self._entries.values())
+            logger.info(f"Cassette replay finished: {self.replayed}/{self._total} recorded responses used, "
+                        f"{self.repeated} repeated polls, {self.misses} misses, {unused} unused")
+
+    def stats(self) -> dict:
+        with self._lock:
+            data = {"mode": self.mode}
+            if self.mode == "off":
+                return data
+            data["path"] = self.path
+            if self.recording:
+                data["recorded"] = self.recorded
+            else:
+                data.update({
+                    "latency_scale": self.latency_scale,
+                    "total": self._total,
+                    "replayed": self.replayed,
+                    "repeated": self.repeated,
+                    "misses": self.misses,
+                    "unused": sum(len(q) for q in self._entries.values()),
+                })
+            return data
+
+def body_digest(json_body=None, data=None) -> Optional[str]:
+    """请求体摘要（sha256 前 16 位），便于比对回放时请求内容是否变化"""
+    if json_body is not None:
+        raw = json.dumps(json_body, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    elif data:
+        raw = data if isinstance(data, bytes) else str(data).encode("utf-8")
+    else:
+        return None
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+def _reason(status: int) -> str:
+    try:
+        return HTTPStatus(status).phrase
+    except ValueError:
+        return ""
+
+class _RecordingRaw:
+    """包装 urllib3 响应，记录流式读取到的每个块及其间隔，读完或关闭时写入录制"""
+
+    def __init__(self, raw, on_done):
+        self._raw = raw
+        self._on_done = on_done
+        self._chunks: List[Tuple[float, bytes]] = []
+        self._last = time.monotonic()
+        self._done = False
+
+    def _add(self, chunk: bytes):
+        if chunk:
+            now = time.monotonic()
+            self._chunks.append((now - self._last, chunk))
+            self._last = now
+
+    def _finish(self):
+        if not self._done:
+            self._done = True
+            self._on_done(self._chunks or [(0, b"")])
+
+    def stream(self, amt=None, decode_content=None):
+        for chunk in self._raw.stream(amt, decode_content=decode_content):
+            self._add(chunk)
+            yield chunk
+        self._finish()
+
+    def read(self, amt=None, *args, **kwargs):
+        chunk = self._raw.read(amt, *args, **kwargs)
+        self._add(chunk)
+        if not chunk:
+            self._finish()
+        return chunk
+
+    def close(self):
+        self._finish()
+        self._raw.close()
+
+    def release_conn(self):
+        self._finish()
+        release = getattr(self._raw, "release_conn", None)
+        if release is not None:
+            release()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+class _ReplayRaw:
+    """按录制的间隔依次返回流式块（供 iter_content / iter_lines 使用）"""
+
+    def __init__(self, chunks: List[Tuple[float, bytes]]):
+        self._chunks = deque(chunks)
+
+    def stream(self, amt=None, decode_content=None):
+        while self._chunks:
+            wait, chunk = self._chunks.popleft()
+            time.sleep(wait)
+            yield chunk
+
+    def read(self, amt=None, *args, **kwargs):
+        if not self._chunks:
+            return b""
+        wait, chunk = self._chunks.popleft()
+        time.sleep(wait)
+        return chunk
+
+    def close(self):
+        self._chunks.clear()
+
+    def release_conn(self):
+        pass
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+def get_cassette(config) -> Cassette:
+    """返回进程级录制/回放实例，首次调用时按 cassette 配置初始化"""
+    global _cassette
+    with _cassette_lock:
+        if _cassette is None:
+            settings = config.cassette
+            secrets = [
+                config.authentication.gitlab_private_token,
+                config.gitlab_api.webhook_secret,
+                os.getenv("OPENAI_API_KEY"),
+            ]
+            _cassette = Cassette(settings.mode, resolve_data_path(settings.path), settings.latency_scale, secrets)
+            if settings.mode != "off":
+                atexit.register(_cassette.close)
+        return _cassette
@@ -0,0 +1,245 @@
+# clients/gitlab/async_gitlab_client.py
+
+import asyncio
+import time
+import weakref
+import zlib
+import httpx
+from config.config_manager import ConfigManager
+from clients.logging.logger import logger
+from clients.cassette import Cassette, CassetteMiss, body_digest, get_cassette
+from .project_cache import project_cache
+from .rate_limiter import get_rate_limiter, effective_priority
+from .singleflight import AsyncSingleFlight, request_key
+
+# 进程内共享：同一事件循环中相同的并发 GET 只发出一次上游请求
+request_flight = AsyncSingleFlight()
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """转发上游响应体，同时按块记录解码后的内容与间隔，读完或关闭时写入录制"""
+
+    def __init__(self, stream, encoding: str, on_done):
+        self._stream = stream
+        self._on_done = on_done
+        self._decoder = zlib.decompressobj(zlib.MAX_WBITS | 32) if encoding in ("gzip", "deflate") else None
+        self._chunks = []
+        self._last = time.monotonic()
+        self._done = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            data = self._decoder.decompress(chunk) if self._decoder else chunk
+            if data:
+                now = time.monotonic()
+                self._chunks.append((now - self._last, data))
+                self._last = now
+            yield chunk
+        self._finish()
+
+    def _finish(self):
+        if not self._done:
+            self._done = True
+            self._on_done(self._chunks or [(0, b"")])
+
+    async def aclose(self):
+        self._finish()
+        await self._stream.aclose()
+
+class _ReplayStream(httpx.AsyncByteStream):
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    async def __aiter__(self):
+        for wait, chunk in self._chunks:
+            if wait:
+                await asyncio.sleep(wait)
+            yield chunk
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """连接池的传输层包装：按 cassette 配置录制或回放所有经过连接池的请求（含流式读取）"""
+
+    def __init__(self, cassette: Cassette, transport: httpx.AsyncBaseTransport):
+        self.cassette = cassette
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        if self.cassette.replaying:
+            try:
+                entry = self.cassette.take(request.method, url)
+            except CassetteMiss as e:
+                raise httpx.ConnectError(str(e), request=request) from e
+            await asyncio.sleep(self.cassette.delay(entry["elapsed"]))
+            return httpx.Response(entry["status"], headers=entry["headers"],
+                                  stream=_ReplayStream(self.cassette.chunks(entry)), request=request)
+
+        # 只协商可以逐块解码的压缩方式，录制文件中保存解码后的内容
+        request.headers["Accept-Encoding"] = "gzip, deflate"
+        digest = body_digest(data=request.content)
+        started = time.monotonic()
+        resp = await self.transport.handle_async_request(request)
+        elapsed = time.monotonic() - started
+        encoding = resp.headers.get("Content-Encoding", "").lower()
+        stream = _RecordingStream(resp.stream, encoding, lambda chunks: self.cassette.record(
+            request.method, url, started, resp.status_code, resp.headers, elapsed, chunks, digest))
+        return httpx.Response(resp.status_code, headers=resp.headers, stream=stream,
+                              request=request, extensions=resp.extensions)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+class AsyncGitLabClient:
+    """
+    GitLabClient 的异步版本，供 Web 后端的 async 接口使用，避免阻塞事件循环
+    同一事件循环内的所有实例共享一个连接池（可用时启用 HTTP/2）
+    """
+    _pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+    def __init__(self):
+        config = ConfigManager.get_config()
+        self.base_url = getattr(config.services, "gitlab_http_url", config.services.gitlab_url).rstrip("/")
+        self.token = config.authentication.gitlab_private_token
+        self.api_config = config.gitlab_api
+        self.rate_limiter = get_rate_limiter(self.api_config)
+
+    @classmethod
+    def _pool(cls, api_config) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = cls._pools.get(loop)
+        if client is None or client.is_closed:
+            http2 = api_config.http2 and _http2_available()
+            if api_config.http2 and not http2:
+                logger.info("h2 package not installed, GitLab async client falls back to HTTP/1.1")
+            limits = httpx.Limits(
+                max_connections=api_config.max_connections,
+                max_keepalive_connections=api_config.max_connections
+            )
+            transport = None
+            cassette = get_cassette(ConfigManager.get_config())
+            if cassette.mode != "off":
+                transport = CassetteTransport(cassette, httpx.AsyncHTTPTransport(http2=http2, limits=limits))
+            client = httpx.AsyncClient(http2=http2, limits=limits, transport=transport)
+            cls._pools[loop] = client
+        return client
+
+    @classmethod
+    async def aclose(cls):
+        """关闭当前事件循环的连接池（应用关闭时调用）"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        client = cls._pools.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    def _headers(self):
+        return {
+            "Content-Type": "application/json",
+            "PRIVATE-TOKEN": self.token,
+            "Authorization": f"Bearer {self.token}"
+        }
+
+    def _url(self, endpoint: str) -> str:
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+
+    async def _request(self, method: str, endpoint: str, params=None, data=None, timeout: int = 30, headers=None) -> httpx.Response:
+        """
+        发送原始请求并返回 Response（保留响应头，供分页等场景使用）
+        并发的相同 GET 请求会被合并，调用方共享同一个 Response 并各自解析；
+        实际发出的请求经过进程级限流器，遇到 429 时按 Retry-After 等待后重试
+        """
+        url = self._url(endpoint)
+        priority = effective_priority(method)
+
+        async def send():
+            retries = self.api_config.rate_limit_max_retries
+            for attempt in range(retries + 1):
+                await self.rate_limiter.acquire_async(priority)
+                resp = await self._pool(self.api_config).request(
+                    method,
+                    url,
+                    headers={**self._headers(), **(headers or {})},
+                    params=params,
+                    json=data,
+                    timeout=timeout
+                )
+                retry_delay = self.rate_limiter.observe(resp.status_code, resp.headers)
+                if retry_delay is None or attempt == retries:
+                    return resp
+                logger.warning(f"GitLab API 429 for {method} {url}, retrying after {retry_delay:.1f}s")
+
+        if method.upper() == "GET":
+            return await request_flight.do(request_key(method, url, params, headers), send)
+        return await send()
+
+    def _handle_response(self, resp: httpx.Response):
+        if resp.status_code == 401:
+            logger.error("GitLab API unauthorized (401). Check gitlab_private_token and access scope.")
+        if resp.status_code == 403:
+            logger.error("GitLab API forbidden (403). Token may lack required permissions.")
+        if resp.status_code == 404:
+            # 项目本身可能已被删除或迁移，丢弃该项目 ID 的缓存
+            project_cache.invalidate_for_url(str(resp.url), resp.text)
+        if resp.status_code >= 400:
+            logger.error(f"GitLab API error {resp.status_code}: {resp.text}")
+        resp.raise_for_status()
+        # Some endpoints return empty body
+        if resp.headers.get("Content-Type", "").startswith("application/json"):
+            return resp.json()
+        return resp.text
+
+    async def get_page(self, endpoint: str, params=None):
+        """
+        获取列表接口的单页数据
+
+        Returns:
+            tuple: (解析后的响应体, 响应头)
+        """
+        resp = await self._request("GET", endpoint, params=params)
+        return self._handle_response(resp), resp.headers
+
+    async def get(self, endpoint: str, params=None):
+        resp = await self._request("GET", endpoint, params=params)
+        return self._handle_response(resp)
+
+    async def post(self, endpoint: str, data=None):
+        resp = await self._request("POST", endpoint, data=data, timeout=60)
+        return self._handle_response(resp)
+
+    async def put(self, endpoint: str, data=None):
+        resp = await self._request("PUT", endpoint, data=data, timeout=60)
+        return self._handle_response(resp)
+
+    async def graphql(self, query: str, variables: dict = None):
+        """
+        执行 GraphQL 查询
+
+        Returns:
+            dict: 响应中的 data 字段
+
+        Raises:
+            RuntimeError: 响应包含 errors 时
+        """
+        url = self.api_config.graphql_url or self._url("api/graphql")
+        await self.rate_limiter.acquire_async(effective_priority("GET"))
+        resp = await self._pool(self.api_config).post(
+            url,
+            headers=self._headers(),
+            json={"query": query, "variables": variables or {}},
+            timeout=30
+        )
+        self.rate_limiter.observe(resp.status_code, resp.headers)
+        body = self._handle_response(resp)
+        if not isinstance(body, dict):
+            raise RuntimeError("Unexpected GraphQL response")
+        if body.get("errors"):
+            raise RuntimeError(f"GraphQL errors: {body['errors']}")
+        return body.get("data") or {}
@@ -0,0 +1,163 @@
+# clients/gitlab/async_job_client.py
+import asyncio
+from typing import AsyncIterator
+import httpx
+from .async_gitlab_client import AsyncGitLabClient
+from .pagination import aiter_paginated
+from .trace_tail import chunk_from_response, range_headers
+from .trace_archive import FINISHED_JOB_STATUSES, get_trace_archive
+from .rate_limiter import effective_priority
+from clients.logging.logger import logger
+from models.gitlab_models import GitLabJob, JobTraceChunk
+
+# 与 JobClient 一致：这些状态码以提示文本代替日志内容返回
+TRACE_ERROR_MESSAGES = {
+    401: "Unauthorized (401): Please check gitlab_private_token in your config.",
+    403: "Forbidden (403): Token lacks required permissions to read job traces.",
+    404: "Job trace not found or job has not started yet.",
+}
+TRACE_STREAM_CHUNK_SIZE = 64 * 1024
+
+class AsyncJobClient(AsyncGitLabClient):
+    async def iter_jobs(self, project_id: int, pipeline_id: int, limit: int = None):
+        """惰性遍历Pipeline下的所有Job（该接口仅支持offset分页）"""
+        async for j in aiter_paginated(self, f"api/v4/projects/{project_id}/pipelines/{pipeline_id}/jobs", limit=limit):
+            yield GitLabJob(**j)
+
+    async def list_jobs(self, project_id: int, pipeline_id: int):
+        return [j async for j in self.iter_jobs(project_id, pipeline_id)]
+
+    async def get_job_trace(self, project_id: int, job_id: int, status: str = None) -> str:
+        """
+        获取Job的日志输出（错误时返回与 JobClient 相同的提示文本）
+        已结束 Job 的日志优先从本地归档读取，归档的磁盘读写放在线程池中执行；
+        只有调用方传入已结束的 status 时才写入归档
+        """
+        archive = get_trace_archive(self.api_config)
+        if archive.enabled:
+            archived = await asyncio.to_thread(archive.read_text, project_id, job_id)
+            if archived is not None:
+                return archived
+        try:
+            resp = await self._request("GET", f"api/v4/projects/{project_id}/jobs/{job_id}/trace")
+            if resp.status_code in TRACE_ERROR_MESSAGES:
+                return TRACE_ERROR_MESSAGES[resp.status_code]
+            resp.raise_for_status()
+            if archive.enabled and status in FINISHED_JOB_STATUSES:
+                try:
+                    await asyncio.to_thread(archive.store_stream, project_id, job_id, [resp.content])
+                except OSError as e:
+                    logger.warning(f"Failed to archive trace for job {job_id}: {e}")
+            return resp.text
+        except httpx.HTTPError as e:
+            return f"Failed to fetch job trace: {str(e)}"
+        except Exception as e:
+            return f"Error retrieving job trace: {str(e)}"
+
+    async def stream_job_trace(self, project_id: int, job_id: int, status: str = None,
+                               chunk_size: int = TRACE_STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """
+        以字节块流式读取Job日志，内存占用与日志大小无关
+
+        已归档的日志直接从本地读取（归档损坏时丢弃并改为下载）；否则边转发上游响应边写入归档（仅限调用方传入已结束 status 的 Job）。
+        迭代被中断（客户端断开、任务取消）时上游连接随之关闭，写到一半的归档会被丢弃。
+        401/403/404 时输出与 get_job_trace 相同的提示文本，其它错误在第一个块之前抛出
+        """
+        archive = get_trace_archive(self.api_config)
+        if archive.enabled:
+            chunks = await asyncio.to_thread(archive.iter_trace, project_id, job_id, chunk_size)
+            if chunks is not None:
+                sent = False
+                while True:
+                    try:
+                        chunk = await asyncio.to_thread(next, chunks, None)
+                    except (OSError, EOFError) as e:
+                        # 与 TraceArchive.read_text 一致：丢弃损坏的归档；尚未输出内容时改为从 GitLab 下载
+                        await asyncio.to_thread(archive.discard_corrupted, project_id, job_id, e)
+                        if sent:
+                            raise
+                        break
+                    if chunk is None:
+                        return
+                    sent = True
+                    yield chunk
+
+        await self.rate_limiter.acquire_async(effective_priority("GET"))
+        url = self._url(f"api/v4/projects/{project_id}/jobs/{job_id}/trace")
+        writer = None
+        try:
+            async with self._pool(self.api_config).stream("GET", url, headers=self._headers(), timeout=30) as resp:
+                self.rate_limiter.observe(resp.status_code, resp.headers)
+                if resp.status_code in TRACE_ERROR_MESSAGES:
+                    yield TRACE_ERROR_MESSAGES[resp.status_code].encode("utf-8")
+                    return
+                if resp.status_code >= 400:
+                    await resp.aread()
+                    self._handle_response(resp)
+                if archive.enabled and status in FINISHED_JOB_STATUSES:
+                    try:
+                        writer = await asyncio.to_thread(archive.open_writer, project_id, job_id)
+                    except OSError as e:
+                        logger.warning(f"Failed to archive trace for job {job_id}: {e}")
+                async for chunk in resp.aiter_bytes(chunk_size):
+                    if writer is not None:
+                        try:
+                            await asyncio.to_thread(writer.write, chunk)
+                        except OSError as e:
+                            logger.warning(f"Failed to archive trace for job {job_id}: {e}")
+                            writer.abort()
+                            writer = None
+                    yield chunk
+            if writer is not None:
+                try:
+                    await asyncio.to_thread(writer.commit)
+                except OSError as e:
+                    logger.warning(f"Failed to archive trace for job {job_id}: {e}")
+                    writer.abort()
+                writer = None
+        finally:
+            if writer is not None:
+                writer.abort()
+
+    async def get_job_trace_since(self, project_id: int, job_id: int, offset: int = 0,
+                                  status: str = None) -> JobTraceChunk:
+        """
+        从指定字节偏移量开始增量读取Job日志（Range 请求，不支持时回退为完整下载）
+        响应为完整日志（200）且调用方传入已结束的 status 时写入归档
+        """
+        archive = get_trace_archive(self.api_config)
+        if archive.enabled:
+            archived = await asyncio.to_thread(archive.read_text, project_id, job_id)
+            if archived is not None:
+                content, start, next_offset = chunk_from_response(200, archived.encode("utf-8"), offset)
+                return JobTraceChunk(content=content, offset=start, next_offset=next_offset)
+        resp = await self._request(
+            "GET",
+            f"api/v4/projects/{project_id}/jobs/{job_id}/trace",
+            headers=range_headers(offset)
+        )
+        if resp.status_code not in (200, 206, 416):
+            self._handle_response(resp)
+        if archive.enabled and resp.status_code == 200 and status in FINISHED_JOB_STATUSES:
+            try:
+                await asyncio.to_thread(archive.store_stream, project_id, job_id, [resp.content])
+            except OSError as e:
+                logger.warning(f"Failed to archive trace for job {job_id}: {e}")
+        content, start, next_offset = chunk_from_response(resp.status_code, resp.content, offset)
+        return JobTraceChunk(content=content, offset=start, next_offset=next_offset)
+
+    async def cancel_job(self, project_id: int, job_id: int):
+        """取消单个Job"""
+        return GitLabJob(**(await self.post(f"api/v4/projects/{project_id}/jobs/{job_id}/cancel")))
+
+    async def retry_job(self, project_id: int, job_id: int):
+        """重试单个Job，返回新创建的Job"""
+        return GitLabJob(**(await self.post(f"api/v4/projects/{project_id}/jobs/{job_id}/retry")))
+
+    async def get_job_details(self, project_id: int, job_id: int):
+        """获取Job的详细信息"""
+        try:
+            job = await self.get(f"api/v4/projects/{project_id}/jobs/{job_id}")
+            return GitLabJob(**job)
+        except Exception as e:
+            raise RuntimeError(f"Failed to get job details: {str(e)}")
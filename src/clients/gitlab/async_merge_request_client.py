@@ -0,0 +1,165 @@
+# clients/gitlab/async_merge_request_client.py
+import httpx
+from .async_gitlab_client import AsyncGitLabClient
+from .pagination import aiter_paginated
+from .merge_request_client import (
+    extract_existing_mr_id,
+    evaluate_merge_status,
+    merge_rejection,
+    MergeRejected,
+    MERGE_DIAGNOSE_STATUS,
+)
+from models.gitlab_models import MergeRequest
+from config.config_manager import ConfigManager
+from clients.logging.logger import logger
+
+class AsyncMergeRequestClient(AsyncGitLabClient):
+    """MergeRequestClient 的异步版本，合并状态判断与错误提示与同步客户端共用"""
+
+    def _ensure_http_base(self):
+        config = ConfigManager.get_config()
+        http_url = getattr(config.services, "gitlab_http_url", None)
+        if not http_url:
+            raise RuntimeError("config.services.gitlab_http_url is required for GitLab API access")
+        self.base_url = http_url.rstrip("/")
+
+    async def create_merge_request(self, project_id: int, source_branch: str, target_branch: str, title: str):
+        self._ensure_http_base()
+        data = {
+            "source_branch": source_branch,
+            "target_branch": target_branch,
+            "title": title,
+            "remove_source_branch": False
+        }
+        try:
+            mr = await self.post(f"api/v4/projects/{project_id}/merge_requests", data=data)
+            return MergeRequest(**mr)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 409:
+                raise
+            error_text = e.response.text
+            logger.warning(f"Merge request creation failed with 409 conflict: {error_text}")
+            existing_mr_id = extract_existing_mr_id(error_text)
+            if not existing_mr_id:
+                logger.error("Could not extract MR ID from error message")
+                raise
+            if not await self._close_existing_mr(project_id, existing_mr_id, source_branch):
+                logger.error(f"Failed to close existing MR {existing_mr_id}")
+                raise
+            logger.info(f"Successfully closed existing MR {existing_mr_id}, retrying creation")
+            mr = await self.post(f"api/v4/projects/{project_id}/merge_requests", data=data)
+            return MergeRequest(**mr)
+
+    async def _close_existing_mr(self, project_id: int, mr_iid: int, expected_source_branch: str,
+                                 mr: MergeRequest = None) -> bool:
+        """关闭指定的 MR，源分支不匹配时跳过；提供已获取的 mr 时不再请求详情"""
+        try:
+            if mr is not None:
+                mr_details = {"source_branch": mr.source_branch, "state": mr.state}
+            else:
+                mr_details = await self.get(f"api/v4/projects/{project_id}/merge_requests/{mr_iid}")
+            actual_source_branch = mr_details.get("source_branch")
+            if expected_source_branch is not None and actual_source_branch != expected_source_branch:
+                logger.warning(f"MR {mr_iid} source branch mismatch. Expected: {expected_source_branch}, Actual: {actual_source_branch}")
+                return False
+            mr_state = mr_details.get("state")
+            if mr_state != "opened":
+                logger.info(f"MR {mr_iid} is not in 'opened' state (current: {mr_state}), skipping close")
+                return True
+            result = await self.put(f"api/v4/projects/{project_id}/merge_requests/{mr_iid}", data={"state_event": "close"})
+            final_state = result.get("state")
+            if final_state == "closed":
+                logger.info(f"Successfully closed MR {mr_iid}")
+                return True
+            logger.error(f"Failed to close MR {mr_iid}, final state: {final_state}")
+            return False
+        except Exception as e:
+            logger.error(f"Error closing MR {mr_iid}: {e}")
+            return False
+
+    async def close_merge_request(self, project_id: int, mr_iid: int, expected_source_branch: str = None,
+                                  mr: MergeRequest = None) -> bool:
+        self._ensure_http_base()
+        return await self._close_existing_mr(project_id, mr_iid, expected_source_branch, mr)
+
+    async def iter_open_merge_requests(self, project_id: int, source_branch: str = None, limit: int = None):
+        """惰性遍历项目的开放 MR"""
+        self._ensure_http_base()
+        params = {"state": "opened"}
+        if source_branch:
+            params["source_branch"] = source_branch
+        async for mr in aiter_paginated(self, f"api/v4/projects/{project_id}/merge_requests", params=params, limit=limit):
+            yield MergeRequest(**mr)
+
+    async def list_open_merge_requests(self, project_id: int, source_branch: str = None) -> list:
+        try:
+            mrs = [mr async for mr in self.iter_open_merge_requests(project_id, source_branch)]
+            logger.info(f"Found {len(mrs)} open merge requests")
+            return mrs
+        except Exception as e:
+            logger.error(f"Error listing open merge requests: {e}")
+            return []
+
+    async def get_merge_request(self, project_id: int, mr_id: int):
+        self._ensure_http_base()
+        mr = await self.get(f"api/v4/projects/{project_id}/merge_requests/{mr_id}")
+        return MergeRequest(**mr)
+
+    def iter_merge_request_pipelines(self, project_id: int, mr_iid: int, per_page: int = None, limit: int = None):
+        """惰性遍历MR相关的Pipeline（最新的在前）"""
+        self._ensure_http_base()
+        endpoint = f"api/v4/projects/{project_id}/merge_requests/{mr_iid}/pipelines"
+        return aiter_paginated(self, endpoint, per_page=per_page, limit=limit)
+
+    async def get_merge_request_pipelines(self, project_id: int, mr_iid: int):
+        """获取MR相关的所有Pipeline"""
+        return [p async for p in self.iter_merge_request_pipelines(project_id, mr_iid)]
+
+    async def get_latest_mr_pipeline(self, project_id: int, mr_iid: int):
+        """获取MR的最新Pipeline"""
+        async for p in self.iter_merge_request_pipelines(project_id, mr_iid, per_page=1, limit=1):
+            return p
+        return None
+
+    async def can_merge(self, project_id: int, mr_iid: int):
+        """检查MR是否可以合并"""
+        try:
+            self._ensure_http_base()
+            mr = await self.get(f"api/v4/projects/{project_id}/merge_requests/{mr_iid}")
+            return evaluate_merge_status(mr)
+        except Exception as e:
+            logger.error(f"Error checking merge status: {e}")
+            return {
+                "can_merge": False,
+                "reason": "check_failed",
+                "error": str(e)
+            }
+
+    async def _merge_rejection(self, project_id: int, mr_iid: int, response) -> MergeRejected:
+        """合并被拒绝后才获取一次 MR 详情，细分拒绝原因"""
+        mr = None
+        if response.status_code in MERGE_DIAGNOSE_STATUS:
+            try:
+                mr = await self.get(f"api/v4/projects/{project_id}/merge_requests/{mr_iid}")
+            except Exception as e:
+                logger.warning(f"Failed to fetch MR {mr_iid} after rejected merge: {e}")
+        rejection = merge_rejection(response.status_code, response.text, mr)
+        logger.warning(f"Merge of MR {mr_iid} rejected ({rejection.reason}): {rejection}")
+        return rejection
+
+    async def merge_mr(self, project_id: int, mr_iid: int):
+        """合并MR，不预先检查状态；被拒绝时抛出 MergeRejected"""
+        self._ensure_http_base()
+        try:
+            data = {
+                "should_remove_source_branch": True,
+                "merge_when_pipeline_succeeds": False
+            }
+            result = await self.put(f"api/v4/projects/{project_id}/merge_requests/{mr_iid}/merge", data=data)
+            logger.info(f"Successfully merged MR {mr_iid}")
+            return result
+        except httpx.HTTPStatusError as e:
+            raise await self._merge_rejection(project_id, mr_iid, e.response) from e
+        except Exception as e:
+            logger.error(f"Unexpected error during merge: {e}")
+            raise ValueError(f"Merge failed due to unexpected error: {str(e)}")
@@ -0,0 +1,45 @@
+# clients/gitlab/async_pipeline_client.py
+from .async_gitlab_client import AsyncGitLabClient
+from .pagination import aiter_paginated
+from models.gitlab_models import GitLabPipeline
+
+class AsyncPipelineClient(AsyncGitLabClient):
+    async def create_pipeline(self, project_id: int, ref: str):
+        data = {"ref": ref}
+        pipeline = await self.post(f"api/v4/projects/{project_id}/pipeline", data=data)
+        return GitLabPipeline(**pipeline)
+
+    async def get_pipeline(self, project_id: int, pipeline_id: int):
+        pipeline = await self.get(f"api/v4/projects/{project_id}/pipelines/{pipeline_id}")
+        return GitLabPipeline(**pipeline)
+
+    async def iter_pipelines(self, project_id: int, ref: str = None, params: dict = None, limit: int = None):
+        """惰性遍历项目的Pipeline（最新的在前）"""
+        params = dict(params or {})
+        if ref:
+            params["ref"] = ref
+        async for p in aiter_paginated(self, f"api/v4/projects/{project_id}/pipelines", params=params, limit=limit):
+            yield GitLabPipeline(**p)
+
+    async def list_pipelines(self, project_id: int, ref: str = None, params: dict = None, limit: int = None):
+        return [p async for p in self.iter_pipelines(project_id, ref, params, limit)]
+
+    async def get_latest_pipeline(self, project_id: int, ref: str = None):
+        """获取最新的Pipeline"""
+        async for p in self.iter_pipelines(project_id, ref, {"per_page": 1}, limit=1):
+            return p
+        return None
+
+    async def cancel_pipeline(self, project_id: int, pipeline_id: int):
+        """取消Pipeline中所有未结束的Job"""
+        pipeline = await self.post(f"api/v4/projects/{project_id}/pipelines/{pipeline_id}/cancel")
+        return GitLabPipeline(**pipeline)
+
+    async def retry_pipeline(self, project_id: int, pipeline_id: int):
+        """重试Pipeline中所有失败和已取消的Job"""
+        pipeline = await self.post(f"api/v4/projects/{project_id}/pipelines/{pipeline_id}/retry")
+        return GitLabPipeline(**pipeline)
+
+    async def get_pipeline_jobs(self, project_id: int, pipeline_id: int):
+        """获取Pipeline下的所有Jobs"""
+        return [j async for j in aiter_paginated(self, f"api/v4/projects/{project_id}/pipelines/{pipeline_id}/jobs")]
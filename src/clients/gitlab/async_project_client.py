@@ -0,0 +1,49 @@
+# clients/gitlab/async_project_client.py
+
+import httpx
+from .async_gitlab_client import AsyncGitLabClient
+from .project_cache import project_cache
+from models.gitlab_models import GitLabProject
+from config.config_manager import ConfigManager
+from clients.logging.logger import logger
+from utils.url_utils import encode_project_path
+
+class AsyncProjectClient(AsyncGitLabClient):
+    async def get_project_by_name(self, name: str):
+        config = ConfigManager.get_config()
+        http_url = getattr(config.services, "gitlab_http_url", None)
+        if not http_url:
+            raise RuntimeError("config.services.gitlab_http_url is required for GitLab API access")
+        self.base_url = http_url.rstrip("/")
+
+        hit, cached = project_cache.get(name)
+        if hit:
+            return cached
+
+        encoded_path = encode_project_path(name)
+        api_endpoint = f"api/v4/projects/{encoded_path}"
+        logger.info(f"[DEBUG] Will query endpoint: {api_endpoint}")
+
+        try:
+            project = await self.get(api_endpoint)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                logger.info(f"[DEBUG] No project matched for: {name}")
+                project_cache.put_missing(name, self.api_config.project_negative_cache_ttl)
+                return None
+            logger.error(f"[DEBUG] Exception when querying GitLab API: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"[DEBUG] Exception when querying GitLab API: {e}")
+            raise
+
+        if project:
+            logger.info(f"[DEBUG] Project found by path: {project.get('path_with_namespace', '')}")
+            result = GitLabProject(**project)
+            project_cache.put(name, result, self.api_config.project_cache_ttl)
+            return result
+        logger.info(f"[DEBUG] No project matched for: {name}")
+        return None
+
+    async def check_project_exists(self, name: str) -> bool:
+        return await self.get_project_by_name(name) is not None
@@ -3,6 +3,13 @@
 import requests
 from config.config_manager import ConfigManager
 from clients.logging.logger import logger
+from clients.cassette import get_cassette
+from .project_cache import project_cache
+from .rate_limiter import get_rate_limiter, effective_priority
+from .singleflight import SingleFlight, request_key
+
+# 进程内共享：相同的并发 GET 只发出一次上游请求
+request_flight = SingleFlight()
 
 class GitLabClient:
     def __init__(self):
@@ -10,6 +17,9 @@ class GitLabClient:
         # Prefer http URL if provided for API access
         self.base_url = getattr(config.services, "gitlab_http_url", config.services.gitlab_url).rstrip("/")
         self.token = config.authentication.gitlab_private_token
+        self.api_config = config.gitlab_api
+        self.rate_limiter = get_rate_limiter(self.api_config)
+        self.cassette = get_cassette(config)
 
     def _headers(self):
         """
@@ -24,11 +34,47 @@ class GitLabClient:
         headers["Authorization"] = f"Bearer {self.token}"
         return headers
 
+    def _url(self, endpoint: str) -> str:
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+
+    def _request(self, method: str, endpoint: str, params=None, data=None, timeout: int = 30, headers=None) -> requests.Response:
+        """
+        发送原始请求并返回 Response（保留响应头，供分页等场景使用）
+        并发的相同 GET 请求会被合并，调用方共享同一个 Response 并各自解析；
+        实际发出的请求经过进程级限流器，遇到 429 时按 Retry-After 等待后重试
+        """
+        url = self._url(endpoint)
+        priority = effective_priority(method)
+
+        def send():
+            retries = self.api_config.rate_limit_max_retries
+            for attempt in range(retries + 1):
+                self.rate_limiter.acquire(priority)
+                resp = self.cassette.request(
+                    method,
+                    url,
+                    headers={**self._headers(), **(headers or {})},
+                    params=params,
+                    json=data,
+                    timeout=timeout
+                )
+                retry_delay = self.rate_limiter.observe(resp.status_code, resp.headers)
+                if retry_delay is None or attempt == retries:
+                    return resp
+                logger.warning(f"GitLab API 429 for {method} {url}, retrying after {retry_delay:.1f}s")
+
+        if method.upper() == "GET":
+            return request_flight.do(request_key(method, url, params, headers), send)
+        return send()
+
     def _handle_response(self, resp: requests.Response):
         if resp.status_code == 401:
             logger.error("GitLab API unauthorized (401). Check gitlab_private_token and access scope.")
         if resp.status_code == 403:
             logger.error("GitLab API forbidden (403). Token may lack required permissions.")
+        if resp.status_code == 404:
+            # 项目本身可能已被删除或迁移，丢弃该项目 ID 的缓存
+            project_cache.invalidate_for_url(resp.url, resp.text)
         if resp.status_code >= 400:
             try:
                 logger.error(f"GitLab API error {resp.status_code}: {resp.text}")
@@ -40,17 +86,24 @@ class GitLabClient:
             return resp.json()
         return resp.text
 
+    def get_page(self, endpoint: str, params=None):
+        """
+        获取列表接口的单页数据
+
+        Returns:
+            tuple: (解析后的响应体, 响应头)
+        """
+        resp = self._request("GET", endpoint, params=params)
+        return self._handle_response(resp), resp.headers
+
     def get(self, endpoint: str, params=None):
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        resp = requests.get(url, headers=self._headers(), params=params, timeout=30)
+        resp = self._request("GET", endpoint, params=params)
         return self._handle_response(resp)
 
     def post(self, endpoint: str, data=None):
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        resp = requests.post(url, headers=self._headers(), json=data, timeout=60)
+        resp = self._request("POST", endpoint, data=data, timeout=60)
         return self._handle_response(resp)
 
     def put(self, endpoint: str, data=None):
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        resp = requests.put(url, headers=self._headers(), json=data, timeout=60)
-        return self._handle_response(resp)
\ No newline at end of file
+        resp = self._request("PUT", endpoint, data=data, timeout=60)
+        return self._handle_response(resp)
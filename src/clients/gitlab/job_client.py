@@ -1,23 +1,49 @@
 # clients/gitlab/job_client.py
 import requests
 from .gitlab_client import GitLabClient
-from models.gitlab_models import GitLabJob
+from .pagination import iter_paginated
+from .trace_tail import chunk_from_response, range_headers
+from .trace_archive import FINISHED_JOB_STATUSES, get_trace_archive
+from clients.logging.logger import logger
+from models.gitlab_models import GitLabJob, JobTraceChunk
 
 class JobClient(GitLabClient):
+    def iter_jobs(self, project_id: int, pipeline_id: int, limit: int = None):
+        """惰性遍历Pipeline下的所有Job（该接口仅支持offset分页）"""
+        for j in iter_paginated(self, f"api/v4/projects/{project_id}/pipelines/{pipeline_id}/jobs", limit=limit):
+            yield GitLabJob(**j)
+
     def list_jobs(self, project_id: int, pipeline_id: int):
-        jobs = self.get(f"api/v4/projects/{project_id}/pipelines/{pipeline_id}/jobs")
-        return [GitLabJob(**j) for j in jobs]
+        return list(self.iter_jobs(project_id, pipeline_id))
+
+    def get_job_trace(self, project_id: int, job_id: int, status: str = None) -> str:
+        """
+        获取Job的日志输出
+
+        已结束 Job 的日志从本地归档读取；未归档时下载并在 Job 已结束的情况下写入归档
 
-    def get_job_trace(self, project_id: int, job_id: int) -> str:
-        """获取Job的日志输出"""
+        Args:
+            project_id: 项目 ID
+            job_id: Job ID
+            status: 调用方已知的 Job 状态；未提供时只读取归档，不写入归档（不为确认状态额外请求）
+        """
+        archive = get_trace_archive(self.api_config)
+        if archive.enabled:
+            archived = archive.read_text(project_id, job_id)
+            if archived is not None:
+                return archived
         try:
-            url = f"{self.base_url}/api/v4/projects/{project_id}/jobs/{job_id}/trace"
-            resp = requests.get(url, headers=self._headers(), timeout=30)
+            resp = self._request("GET", f"api/v4/projects/{project_id}/jobs/{job_id}/trace")
             if resp.status_code == 401:
                 return "Unauthorized (401): Please check gitlab_private_token in your config."
             if resp.status_code == 403:
                 return "Forbidden (403): Token lacks required permissions to read job traces."
             resp.raise_for_status()
+            if archive.enabled and status in FINISHED_JOB_STATUSES:
+                try:
+                    archive.store_stream(project_id, job_id, [resp.content])
+                except OSError as e:
+                    logger.warning(f"Failed to archive trace for job {job_id}: {e}")
             return resp.text
         except requests.exceptions.RequestException as e:
             if hasattr(e, 'response') and e.response is not None:
@@ -29,6 +55,49 @@ class JobClient(GitLabClient):
         except Exception as e:
             return f"Error retrieving job trace: {str(e)}"
 
+    def get_job_trace_since(self, project_id: int, job_id: int, offset: int = 0, status: str = None) -> JobTraceChunk:
+        """
+        从指定字节偏移量开始增量读取Job日志
+
+        优先使用 HTTP Range 请求只下载新增字节；服务端不支持 Range 时回退为完整下载并在本地截取
+
+        Args:
+            project_id: 项目 ID
+            job_id: Job ID
+            offset: 已读取的字节数
+            status: 调用方已知的 Job 状态；Job 已结束且响应为完整日志（200）时写入归档
+
+        Returns:
+            JobTraceChunk: 新增内容及下一次读取使用的偏移量
+        """
+        archive = get_trace_archive(self.api_config)
+        archived = archive.read_text(project_id, job_id) if archive.enabled else None
+        if archived is not None:
+            content, start, next_offset = chunk_from_response(200, archived.encode("utf-8"), offset)
+            return JobTraceChunk(content=content, offset=start, next_offset=next_offset)
+        resp = self._request(
+            "GET",
+            f"api/v4/projects/{project_id}/jobs/{job_id}/trace",
+            headers=range_headers(offset)
+        )
+        if resp.status_code not in (200, 206, 416):
+            self._handle_response(resp)
+        if archive.enabled and resp.status_code == 200 and status in FINISHED_JOB_STATUSES:
+            try:
+                archive.store_stream(project_id, job_id, [resp.content])
+            except OSError as e:
+                logger.warning(f"Failed to archive trace for job {job_id}: {e}")
+        content, start, next_offset = chunk_from_response(resp.status_code, resp.content, offset)
+        return JobTraceChunk(content=content, offset=start, next_offset=next_offset)
+
+    def cancel_job(self, project_id: int, job_id: int):
+        """取消单个Job"""
+        return GitLabJob(**self.post(f"api/v4/projects/{project_id}/jobs/{job_id}/cancel"))
+
+    def retry_job(self, project_id: int, job_id: int):
+        """重试单个Job，返回新创建的Job"""
+        return GitLabJob(**self.post(f"api/v4/projects/{project_id}/jobs/{job_id}/retry"))
+
     def get_job_details(self, project_id: int, job_id: int):
         """获取Job的详细信息"""
         try:
@@ -0,0 +1,218 @@
+# clients/gitlab/job_duration_store.py
+
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from clients.logging.logger import logger
+from config.config_models import resolve_data_path
+from models.gitlab_models import GitLabJob
+
+FINISHED_STATUSES = {"success", "failed", "canceled"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_runs (
+    project_id INTEGER NOT NULL,
+    job_id INTEGER NOT NULL,
+    job_name TEXT NOT NULL,
+    stage TEXT,
+    status TEXT NOT NULL,
+    duration REAL,
+    queued_duration REAL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (project_id, job_id)
+);
+CREATE INDEX IF NOT EXISTS idx_job_runs_name ON job_runs (project_id, job_name, recorded_at);
+"""
+
+def parse_gitlab_time(value: Optional[str]) -> Optional[datetime]:
+    """解析 GitLab 时间：REST 接口为 ISO 8601，Webhook 为 "2024-01-01 10:00:00 UTC" 格式"""
+    if not value:
+        return None
+    text = value.strip()
+    if text.endswith(" UTC"):
+        text = text[:-4].replace(" ", "T") + "+00:00"
+    elif text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def job_duration(job: GitLabJob) -> Optional[float]:
+    """已结束 Job 的运行时长（秒）：优先使用 GitLab 返回的 duration，否则按起止时间计算"""
+    if job.duration is not None:
+        return float(job.duration)
+    started = parse_gitlab_time(job.started_at)
+    finished = parse_gitlab_time(job.finished_at)
+    if started is None or finished is None:
+        return None
+    return max(0.0, (finished - started).total_seconds())
+
+def _percentile(values: List[float], pct: float) -> float:
+    """线性插值百分位数，values 需已排序"""
+    if len(values) == 1:
+        return values[0]
+    rank = (len(values) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+class JobDurationStore:
+    """
+    已结束 Job 的运行时长与排队时长记录（本地 SQLite）
+
+    由 Pipeline 监控写入，供自适应轮询、进度估算与调度查询。
+    每个 (project_id, Job 名称) 只保留最近 samples 条记录
+    """
+
+    def __init__(self, db_path: str, samples: int = 50):
+        self.db_path = db_path
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # 进程内的小缓存，避免轮询时反复查询同一 Job 名称
+        self._expected: Dict[tuple, Optional[float]] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        """持锁调用"""
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def record_job(self, project_id: int, job: GitLabJob) -> bool:
+        """记录一个已结束的 Job，返回是否写入（未结束或已记录过的 Job 忽略）"""
+        if job.status not in FINISHED_STATUSES:
+            return False
+        duration = job_duration(job)
+        if duration is None and job.queued_duration is None:
+            return False
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO job_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (project_id, job.id, job.name, job.stage, job.status,
+                         duration, job.queued_duration, time.time())
+                    )
+                    if cursor.rowcount == 0:
+                        return False
+                    conn.execute(
+                        """DELETE FROM job_runs WHERE project_id = ? AND job_name = ? AND job_id NOT IN (
+                               SELECT job_id FROM job_runs WHERE project_id = ? AND job_name = ?
+                               ORDER BY recorded_at DESC LIMIT ?)""",
+                        (project_id, job.name, project_id, job.name, self.samples)
+                    )
+                self._expected.pop((project_id, job.name), None)
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to record duration of job {job.id}: {e}")
+            return False
+
+    def record_jobs(self, project_id: int, jobs: Iterable[GitLabJob]) -> int:
+        return sum(1 for job in jobs if self.record_job(project_id, job))
+
+    def _values(self, project_id: int, job_name: str, column: str, successful_only: bool) -> List[float]:
+        query = f"SELECT {column} FROM job_runs WHERE project_id = ? AND job_name = ? AND {column} IS NOT NULL"
+        if successful_only:
+            query += " AND status = 'success'"
+        try:
+            with self._lock:
+                rows = self._connect().execute(query, (project_id, job_name)).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to query job durations: {e}")
+            return []
+        return sorted(row[0] for row in rows)
+
+    def durations(self, project_id: int, job_name: str) -> List[float]:
+        """成功运行的时长（秒，升序）；失败/取消的运行时长不具代表性，不计入"""
+        return self._values(project_id, job_name, "duration", successful_only=True)
+
+    def queue_times(self, project_id: int, job_name: str) -> List[float]:
+        """排队时长（秒，升序），包含所有已结束的运行"""
+        return self._values(project_id, job_name, "queued_duration", successful_only=False)
+
+    def expected(self, project_id: int, job_name: str) -> Optional[float]:
+        """预期运行时长（历史中位数），没有记录时返回 None"""
+        key = (project_id, job_name)
+        if key not in self._expected:
+            values = self.durations(project_id, job_name)
+            self._expected[key] = statistics.median(values) if values else None
+        return self._expected[key]
+
+    def percentiles(self, project_id: int, job_name: str, pcts=(50, 90, 95)) -> Dict[str, float]:
+        """运行时长的百分位数，如 {"p50": 61.0, "p90": 95.5, "p95": 120.0}；没有记录时返回空字典"""
+        values = self.durations(project_id, job_name)
+        if not values:
+            return {}
+        return {f"p{p}": round(_percentile(values, p), 1) for p in pcts}
+
+    def summary(self, project_id: int) -> List[Dict[str, object]]:
+        """项目下每个 Job 名称的样本数、运行时长百分位数与排队时长中位数"""
+        try:
+            with self._lock:
+                names = [row[0] for row in self._connect().execute(
+                    "SELECT DISTINCT job_name FROM job_runs WHERE project_id = ? ORDER BY job_name", (project_id,)
+                )]
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to query job durations: {e}")
+            return []
+        result = []
+        for name in names:
+            durations = self.durations(project_id, name)
+            queue = self.queue_times(project_id, name)
+            result.append({
+                "job_name": name,
+                "samples": len(durations),
+                "duration": self.percentiles(project_id, name),
+                "queued_p50": round(statistics.median(queue), 1) if queue else None
+            })
+        return result
+
+    def progress(self, project_id: int, jobs: List[GitLabJob], now: Optional[datetime] = None) -> Optional[float]:
+        """
+        按预期时长加权的 Pipeline 完成比例（0~1）
+        已结束的 Job 计满，运行中的 Job 按已运行时间计（不超过预期），任一 Job 没有历史时返回 None
+        """
+        now = now or datetime.now(timezone.utc)
+        total = done = 0.0
+        for job in jobs:
+            if job.status in ("skipped", "manual"):
+                continue
+            expected = self.expected(project_id, job.name)
+            if expected is None:
+                return None
+            total += expected
+            if job.status in FINISHED_STATUSES:
+                done += expected
+            elif job.status == "running":
+                started = parse_gitlab_time(job.started_at)
+                if started is not None:
+                    done += min(expected, max(0.0, (now - started).total_seconds()))
+        return done / total if total > 0 else None
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+_store: Optional[JobDurationStore] = None
+_store_lock = threading.Lock()
+
+def get_job_duration_store(api_config) -> JobDurationStore:
+    """返回进程级时长记录，首次调用时按 gitlab_api 配置初始化"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobDurationStore(resolve_data_path(api_config.job_duration_db), api_config.job_duration_samples)
+        return _store
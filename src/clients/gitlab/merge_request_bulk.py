@@ -0,0 +1,40 @@
+# clients/gitlab/merge_request_bulk.py
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Union
+from models.gitlab_models import MergeRequest
+from .merge_request_client import MergeRequestClient
+
+MrRef = Union[MergeRequest, int]
+
+def _split(mr: MrRef):
+    """MergeRequest（列表接口的结果已带 state 与 source_branch，关闭前无需再请求详情）或 iid"""
+    if isinstance(mr, MergeRequest):
+        return mr.iid, mr
+    return int(mr), None
+
+def close_merge_requests(mr_client: MergeRequestClient, project_id: int, mrs: Iterable[MrRef],
+                         expected_source_branch: Optional[str] = None,
+                         max_workers: Optional[int] = None) -> Dict[int, bool]:
+    """
+    并发关闭多个 MR
+
+    请求都经过进程级限流器（写操作按 MUTATION 优先级），并发数不超过 max_connections；
+    传入 MergeRequest 时直接用其状态与源分支校验，每个 MR 只需一次关闭请求
+
+    Args:
+        mrs: MergeRequest 或 MR iid
+        expected_source_branch: 期望的源分支，不匹配的 MR 不关闭
+
+    Returns:
+        dict: iid -> 是否成功关闭
+    """
+    items = [_split(mr) for mr in mrs]
+    if not items:
+        return {}
+    workers = min(len(items), max_workers or mr_client.api_config.max_connections)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            lambda item: mr_client.close_merge_request(project_id, item[0], expected_source_branch, item[1]), items
+        ))
+    return {iid: ok for (iid, _), ok in zip(items, results)}
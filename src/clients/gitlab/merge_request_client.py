@@ -1,11 +1,171 @@
 # clients/gitlab/merge_request_client.py
+import json
 import requests
 import re
 from .gitlab_client import GitLabClient
+from .pagination import iter_paginated
 from models.gitlab_models import MergeRequest
 from config.config_manager import ConfigManager
 from clients.logging.logger import logger
 
+def extract_existing_mr_id(error_text: str) -> int:
+    """
+    从 GitLab API 错误消息中提取现有 MR 的 ID
+    错误消息格式通常为: "Another open merge request already exists for this source branch: !21"
+    """
+    try:
+        # 使用正则表达式匹配 MR ID
+        # 匹配模式: !数字 或者 #数字
+        pattern = r'[!#](\d+)'
+        matches = re.findall(pattern, error_text)
+        
+        if matches:
+            mr_id = int(matches[0])
+            logger.debug(f"Extracted MR ID from error message: {mr_id}")
+            return mr_id
+        
+        # 备用匹配模式，直接查找数字
+        pattern2 = r'merge request.*?(\d+)'
+        matches2 = re.findall(pattern2, error_text, re.IGNORECASE)
+        if matches2:
+            mr_id = int(matches2[0])
+            logger.debug(f"Extracted MR ID using backup pattern: {mr_id}")
+            return mr_id
+            
+        logger.warning(f"Could not extract MR ID from error message: {error_text}")
+        return None
+        
+    except Exception as e:
+        logger.error(f"Error extracting MR ID from error message: {e}")
+        return None
+
+def evaluate_merge_status(mr: dict) -> dict:
+    """根据 MR 详情判断是否可以合并，返回包含 can_merge 与 reason 的字典"""
+    merge_status = {
+        "can_merge": False,
+        "reason": "unknown",
+        "state": mr.get("state", "unknown"),
+        "merge_status": mr.get("merge_status", "unknown"),
+        "has_conflicts": mr.get("has_conflicts", False),
+        "work_in_progress": mr.get("work_in_progress", False)
+    }
+    if mr.get("state") == "merged":
+        merge_status["reason"] = "already_merged"
+        return merge_status
+    if mr.get("state") == "closed":
+        merge_status["reason"] = "closed"
+        return merge_status
+    if mr.get("work_in_progress", False):
+        merge_status["reason"] = "work_in_progress"
+        return merge_status
+    if mr.get("has_conflicts", False):
+        merge_status["reason"] = "has_conflicts"
+        return merge_status
+    if mr.get("merge_status") == "cannot_be_merged":
+        merge_status["reason"] = "cannot_be_merged"
+        return merge_status
+    if mr.get("source_branch") == mr.get("target_branch"):
+        merge_status["reason"] = "same_branch"
+        return merge_status
+    if mr.get("merge_status") in ["can_be_merged", "unchecked"]:
+        merge_status["can_merge"] = True
+        merge_status["reason"] = "can_merge"
+    else:
+        merge_status["reason"] = "no_changes"
+    return merge_status
+
+class MergeRejected(ValueError):
+    """
+    合并被拒绝；reason 与 evaluate_merge_status 的 reason 取值一致（另有 sha_mismatch、not_found 等），
+    status_code 为合并接口返回的 HTTP 状态码（合并前检查失败时为 None）
+    """
+
+    def __init__(self, reason: str, message: str, status_code: int = None):
+        super().__init__(message)
+        self.reason = reason
+        self.status_code = status_code
+
+def merge_failure_message(reason: str, error: str = None) -> str:
+    """拒绝原因对应的友好提示"""
+    if reason == "already_merged":
+        return "Merge Request has already been merged"
+    elif reason == "closed":
+        return "Merge Request is closed and cannot be merged"
+    elif reason == "work_in_progress":
+        return "Merge Request is marked as Work in Progress"
+    elif reason == "has_conflicts":
+        return "Merge Request has conflicts that must be resolved"
+    elif reason == "cannot_be_merged":
+        return "Merge Request cannot be merged due to GitLab restrictions"
+    elif reason == "same_branch":
+        return "Source and target branches are the same"
+    elif reason == "no_changes":
+        return "No changes detected between source and target branches. The merge request may not have any differences to merge."
+    elif reason == "sha_mismatch":
+        return "Source branch has changed since the merge was requested"
+    elif reason == "check_failed":
+        return f"Failed to check merge status: {error or 'Unknown error'}"
+    return f"Merge Request cannot be merged: {reason}"
+
+def raise_for_merge_status(merge_check: dict) -> None:
+    """将 evaluate_merge_status 的结果转换为友好的 MergeRejected（ValueError 子类）"""
+    if not merge_check["can_merge"]:
+        reason = merge_check["reason"]
+        raise MergeRejected(reason, merge_failure_message(reason, merge_check.get("error")))
+
+def merge_http_error_message(status_code: int):
+    """合并接口 HTTP 错误码对应的友好提示，未知错误码返回 None"""
+    if status_code == 405:
+        return "Merge not allowed: No changes detected or merge conditions not met"
+    elif status_code in (406, 409):
+        return "Merge conflict: The merge request has conflicts that must be resolved"
+    elif status_code == 422:
+        return "Merge validation failed: The merge request cannot be merged"
+    return None
+
+# 合并接口错误码直接对应的拒绝原因
+MERGE_HTTP_REASONS = {
+    401: "unauthorized",
+    403: "forbidden",
+    404: "not_found",
+    405: "not_allowed",
+    406: "has_conflicts",
+    409: "has_conflicts",
+    422: "cannot_be_merged",
+}
+
+# 这些错误码可能由多种原因导致（已关闭、Draft、冲突、无差异、Pipeline 未通过等），需要结合 MR 详情细分
+MERGE_DIAGNOSE_STATUS = {405, 406, 422}
+
+def _error_detail(response_text: str) -> str:
+    """GitLab 错误响应体中的 message 字段"""
+    try:
+        body = json.loads(response_text or "")
+    except ValueError:
+        return response_text or ""
+    if isinstance(body, dict):
+        return str(body.get("message") or body.get("error") or "")
+    return str(body)
+
+def merge_rejection(status_code: int, response_text: str = "", mr: dict = None) -> MergeRejected:
+    """
+    把合并接口的错误响应转换为 MergeRejected
+
+    Args:
+        status_code: 合并接口返回的 HTTP 状态码
+        response_text: 错误响应体
+        mr: 合并失败后获取的 MR 详情，提供时按 evaluate_merge_status 细分原因
+    """
+    detail = _error_detail(response_text)
+    if mr is not None:
+        check = evaluate_merge_status(mr)
+        if not check["can_merge"]:
+            return MergeRejected(check["reason"], merge_failure_message(check["reason"]), status_code)
+    if status_code == 409 and "sha" in detail.lower():
+        return MergeRejected("sha_mismatch", merge_failure_message("sha_mismatch"), status_code)
+    message = merge_http_error_message(status_code) or f"Merge failed with HTTP error {status_code}: {detail}"
+    return MergeRejected(MERGE_HTTP_REASONS.get(status_code, "http_error"), message, status_code)
+
 class MergeRequestClient(GitLabClient):
     def _ensure_http_base(self):
         config = ConfigManager.get_config()
@@ -56,56 +216,33 @@ class MergeRequestClient(GitLabClient):
                 raise
 
     def _extract_existing_mr_id(self, error_text: str) -> int:
-        """
-        从 GitLab API 错误消息中提取现有 MR 的 ID
-        错误消息格式通常为: "Another open merge request already exists for this source branch: !21"
-        """
-        try:
-            # 使用正则表达式匹配 MR ID
-            # 匹配模式: !数字 或者 #数字
-            pattern = r'[!#](\d+)'
-            matches = re.findall(pattern, error_text)
-            
-            if matches:
-                mr_id = int(matches[0])
-                logger.debug(f"Extracted MR ID from error message: {mr_id}")
-                return mr_id
-            
-            # 备用匹配模式，直接查找数字
-            pattern2 = r'merge request.*?(\d+)'
-            matches2 = re.findall(pattern2, error_text, re.IGNORECASE)
-            if matches2:
-                mr_id = int(matches2[0])
-                logger.debug(f"Extracted MR ID using backup pattern: {mr_id}")
-                return mr_id
-                
-            logger.warning(f"Could not extract MR ID from error message: {error_text}")
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error extracting MR ID from error message: {e}")
-            return None
+        return extract_existing_mr_id(error_text)
 
-    def _close_existing_mr(self, project_id: int, mr_iid: int, expected_source_branch: str) -> bool:
+    def _close_existing_mr(self, project_id: int, mr_iid: int, expected_source_branch: str,
+                           mr: MergeRequest = None) -> bool:
         """
         关闭指定的 MR
         
         Args:
             project_id: 项目 ID
             mr_iid: MR 的 IID (internal ID)
-            expected_source_branch: 期望的源分支名称，用于验证
+            expected_source_branch: 期望的源分支名称，用于验证；为 None 时不验证
+            mr: 已获取的 MR（如列表接口的结果），提供时直接用其状态与源分支验证，不再请求详情
             
         Returns:
             bool: 是否成功关闭
         """
         try:
-            # 首先获取 MR 详情进行验证
-            logger.info(f"Getting details for MR {mr_iid} to verify before closing")
-            mr_details = self.get(f"api/v4/projects/{project_id}/merge_requests/{mr_iid}")
+            if mr is not None:
+                mr_details = {"source_branch": mr.source_branch, "state": mr.state, "title": mr.title}
+            else:
+                # 获取 MR 详情进行验证
+                logger.info(f"Getting details for MR {mr_iid} to verify before closing")
+                mr_details = self.get(f"api/v4/projects/{project_id}/merge_requests/{mr_iid}")
             
             # 验证源分支是否匹配
             actual_source_branch = mr_details.get("source_branch")
-            if actual_source_branch != expected_source_branch:
+            if expected_source_branch is not None and actual_source_branch != expected_source_branch:
                 logger.warning(f"MR {mr_iid} source branch mismatch. Expected: {expected_source_branch}, Actual: {actual_source_branch}")
                 print(f"⚠️ MR {mr_iid} 源分支不匹配，跳过关闭", flush=True)
                 return False
@@ -142,19 +279,52 @@ class MergeRequestClient(GitLabClient):
             print(f"❌ 关闭 MR {mr_iid} 时出错: {e}", flush=True)
             return False
 
-    def close_merge_request(self, project_id: int, mr_iid: int) -> bool:
+    def close_merge_request(self, project_id: int, mr_iid: int, expected_source_branch: str = None,
+                            mr: MergeRequest = None) -> bool:
         """
         公共方法：关闭指定的 MR
         
         Args:
             project_id: 项目 ID
             mr_iid: MR 的 IID
+            expected_source_branch: 期望的源分支，不匹配时不关闭
+            mr: 已获取的 MR，提供时省去关闭前的详情请求
             
         Returns:
             bool: 是否成功关闭
         """
         self._ensure_http_base()
-        return self._close_existing_mr(project_id, mr_iid, None)
+        return self._close_existing_mr(project_id, mr_iid, expected_source_branch, mr)
+
+    def update_merge_request(self, project_id: int, mr_iid: int, title: str = None, description: str = None):
+        """更新 MR 的标题和/或描述，返回更新后的 MR"""
+        self._ensure_http_base()
+        data = {}
+        if title is not None:
+            data["title"] = title
+        if description is not None:
+            data["description"] = description
+        mr = self.put(f"api/v4/projects/{project_id}/merge_requests/{mr_iid}", data=data)
+        return MergeRequest(**mr)
+
+    def iter_open_merge_requests(self, project_id: int, source_branch: str = None, limit: int = None):
+        """
+        惰性遍历项目的开放 MR
+
+        Args:
+            project_id: 项目 ID
+            source_branch: 可选的源分支过滤
+            limit: 最多返回的 MR 数量
+
+        Yields:
+            MergeRequest: MR 对象
+        """
+        self._ensure_http_base()
+        params = {"state": "opened"}
+        if source_branch:
+            params["source_branch"] = source_branch
+        for mr in iter_paginated(self, f"api/v4/projects/{project_id}/merge_requests", params=params, limit=limit):
+            yield MergeRequest(**mr)
 
     def list_open_merge_requests(self, project_id: int, source_branch: str = None) -> list:
         """
@@ -167,18 +337,10 @@ class MergeRequestClient(GitLabClient):
         Returns:
             list: MR 列表
         """
-        self._ensure_http_base()
         try:
-            params = {
-                "state": "opened",
-                "per_page": 100
-            }
-            if source_branch:
-                params["source_branch"] = source_branch
-                
-            mrs = self.get(f"api/v4/projects/{project_id}/merge_requests", params=params)
+            mrs = list(self.iter_open_merge_requests(project_id, source_branch))
             logger.info(f"Found {len(mrs)} open merge requests")
-            return [MergeRequest(**mr) for mr in mrs]
+            return mrs
             
         except Exception as e:
             logger.error(f"Error listing open merge requests: {e}")
@@ -189,56 +351,27 @@ class MergeRequestClient(GitLabClient):
         mr = self.get(f"api/v4/projects/{project_id}/merge_requests/{mr_id}")
         return MergeRequest(**mr)
 
+    def iter_merge_request_pipelines(self, project_id: int, mr_iid: int, per_page: int = None, limit: int = None):
+        """惰性遍历MR相关的Pipeline（最新的在前）"""
+        self._ensure_http_base()
+        endpoint = f"api/v4/projects/{project_id}/merge_requests/{mr_iid}/pipelines"
+        return iter_paginated(self, endpoint, per_page=per_page, limit=limit)
+
     def get_merge_request_pipelines(self, project_id: int, mr_iid: int):
         """获取MR相关的所有Pipeline"""
-        self._ensure_http_base()
-        pipelines = self.get(f"api/v4/projects/{project_id}/merge_requests/{mr_iid}/pipelines")
-        return pipelines
+        return list(self.iter_merge_request_pipelines(project_id, mr_iid))
 
     def get_latest_mr_pipeline(self, project_id: int, mr_iid: int):
         """获取MR的最新Pipeline"""
-        pipelines = self.get_merge_request_pipelines(project_id, mr_iid)
-        if pipelines:
-            return pipelines[0]  # 最新的Pipeline通常在第一个
-        return None
+        # 最新的Pipeline通常在第一个，只请求一条即可
+        return next(self.iter_merge_request_pipelines(project_id, mr_iid, per_page=1, limit=1), None)
 
     def can_merge(self, project_id: int, mr_iid: int):
         """检查MR是否可以合并"""
         try:
             self._ensure_http_base()
             mr = self.get(f"api/v4/projects/{project_id}/merge_requests/{mr_iid}")
-            merge_status = {
-                "can_merge": False,
-                "reason": "unknown",
-                "state": mr.get("state", "unknown"),
-                "merge_status": mr.get("merge_status", "unknown"),
-                "has_conflicts": mr.get("has_conflicts", False),
-                "work_in_progress": mr.get("work_in_progress", False)
-            }
-            if mr.get("state") == "merged":
-                merge_status["reason"] = "already_merged"
-                return merge_status
-            if mr.get("state") == "closed":
-                merge_status["reason"] = "closed"
-                return merge_status
-            if mr.get("work_in_progress", False):
-                merge_status["reason"] = "work_in_progress"
-                return merge_status
-            if mr.get("has_conflicts", False):
-                merge_status["reason"] = "has_conflicts"
-                return merge_status
-            if mr.get("merge_status") == "cannot_be_merged":
-                merge_status["reason"] = "cannot_be_merged"
-                return merge_status
-            if mr.get("source_branch") == mr.get("target_branch"):
-                merge_status["reason"] = "same_branch"
-                return merge_status
-            if mr.get("merge_status") in ["can_be_merged", "unchecked"]:
-                merge_status["can_merge"] = True
-                merge_status["reason"] = "can_merge"
-            else:
-                merge_status["reason"] = "no_changes"
-            return merge_status
+            return evaluate_merge_status(mr)
         except Exception as e:
             logger.error(f"Error checking merge status: {e}")
             return {
@@ -247,31 +380,26 @@ class MergeRequestClient(GitLabClient):
                 "error": str(e)
             }
 
+    def _merge_rejection(self, project_id: int, mr_iid: int, response) -> MergeRejected:
+        """合并被拒绝后才获取一次 MR 详情，细分拒绝原因"""
+        mr = None
+        if response.status_code in MERGE_DIAGNOSE_STATUS:
+            try:
+                mr = self.get(f"api/v4/projects/{project_id}/merge_requests/{mr_iid}")
+            except Exception as e:
+                logger.warning(f"Failed to fetch MR {mr_iid} after rejected merge: {e}")
+        rejection = merge_rejection(response.status_code, response.text, mr)
+        logger.warning(f"Merge of MR {mr_iid} rejected ({rejection.reason}): {rejection}")
+        return rejection
+
     def merge_mr(self, project_id: int, mr_iid: int):
-        """合并MR，带有友好的错误处理"""
+        """
+        合并MR，带有友好的错误处理
+
+        不预先检查 MR 状态，直接调用合并接口：GitLab 会做同样的检查，成功时只需一次请求；
+        被拒绝时抛出 MergeRejected（ValueError 子类），reason 给出结构化的原因
+        """
         self._ensure_http_base()
-        merge_check = self.can_merge(project_id, mr_iid)
-        if not merge_check["can_merge"]:
-            reason = merge_check["reason"]
-            if reason == "already_merged":
-                raise ValueError("Merge Request has already been merged")
-            elif reason == "closed":
-                raise ValueError("Merge Request is closed and cannot be merged")
-            elif reason == "work_in_progress":
-                raise ValueError("Merge Request is marked as Work in Progress")
-            elif reason == "has_conflicts":
-                raise ValueError("Merge Request has conflicts that must be resolved")
-            elif reason == "cannot_be_merged":
-                raise ValueError("Merge Request cannot be merged due to GitLab restrictions")
-            elif reason == "same_branch":
-                raise ValueError("Source and target branches are the same")
-            elif reason == "no_changes":
-                raise ValueError("No changes detected between source and target branches. The merge request may not have any differences to merge.")
-            elif reason == "check_failed":
-                error_msg = merge_check.get("error", "Unknown error")
-                raise ValueError(f"Failed to check merge status: {error_msg}")
-            else:
-                raise ValueError(f"Merge Request cannot be merged: {reason}")
         try:
             data = {
                 "should_remove_source_branch": True,
@@ -282,13 +410,8 @@ class MergeRequestClient(GitLabClient):
             return result
         except requests.exceptions.HTTPError as e:
             if e.response is not None:
-                if e.response.status_code == 405:
-                    raise ValueError("Merge not allowed: No changes detected or merge conditions not met")
-                elif e.response.status_code == 409:
-                    raise ValueError("Merge conflict: The merge request has conflicts that must be resolved")
-                elif e.response.status_code == 422:
-                    raise ValueError("Merge validation failed: The merge request cannot be merged")
+                raise self._merge_rejection(project_id, mr_iid, e.response) from e
             raise ValueError(f"Merge failed with HTTP error: {str(e)}")
         except Exception as e:
             logger.error(f"Unexpected error during merge: {e}")
-            raise ValueError(f"Merge failed due to unexpected error: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Merge failed due to unexpected error: {str(e)}")
@@ -0,0 +1,168 @@
+# clients/gitlab/pagination.py
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse, parse_qsl
+from clients.logging.logger import logger
+
+_prefetch_executor: Optional[ThreadPoolExecutor] = None
+_prefetch_lock = threading.Lock()
+
+def _get_prefetch_executor() -> ThreadPoolExecutor:
+    global _prefetch_executor
+    with _prefetch_lock:
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gitlab-prefetch")
+        return _prefetch_executor
+
+def _parse_next_link(link_header: str) -> Optional[Dict[str, str]]:
+    """
+    从 Link 响应头中解析 rel="next" 的查询参数
+    只取查询参数而不直接使用链接地址，避免 GitLab external_url 与 API 地址不一致
+    """
+    for part in link_header.split(","):
+        segments = part.strip().split(";")
+        if len(segments) < 2:
+            continue
+        url = segments[0].strip().strip("<>")
+        if any(seg.strip() == 'rel="next"' for seg in segments[1:]):
+            return dict(parse_qsl(urlparse(url).query))
+    return None
+
+def next_page_params(headers, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    根据响应头计算下一页请求参数，没有下一页时返回 None
+    优先使用 Link 头中的 rel="next"，没有时使用 X-Next-Page
+    """
+    link_header = headers.get("Link") or headers.get("link")
+    if link_header:
+        link_params = _parse_next_link(link_header)
+        if link_params:
+            return link_params
+    next_page = headers.get("X-Next-Page") or headers.get("x-next-page")
+    if next_page:
+        return {**params, "page": next_page}
+    return None
+
+def iter_paginated(
+    client,
+    endpoint: str,
+    params: Optional[Dict[str, Any]] = None,
+    per_page: Optional[int] = None,
+    limit: Optional[int] = None,
+    prefetch: Optional[bool] = None,
+) -> Iterator[Any]:
+    """
+    惰性遍历 GitLab 列表接口的所有分页
+
+    Args:
+        client: GitLabClient 实例（需提供 get_page）
+        endpoint: API 路径
+        params: 查询参数
+        per_page: 每页条数，默认取 gitlab_api.per_page
+        limit: 最多返回的条目数
+        prefetch: 是否在消费当前页时预取下一页，默认取 gitlab_api.prefetch_pages
+
+    Yields:
+        列表中的每个条目
+
+    调用方提前停止迭代（如 next() 只取第一条）时不会再请求后续分页；
+    预取只在调用方继续索取当前页第一条之后的数据时才会发起。
+    """
+    api_config = client.api_config
+    request_params = dict(params or {})
+    request_params.setdefault("per_page", per_page or api_config.per_page)
+    if prefetch is None:
+        prefetch = api_config.prefetch_pages
+    if limit is not None and limit <= 0:
+        return
+
+    def fetch(page_params: Dict[str, Any]) -> Tuple[list, Optional[Dict[str, Any]]]:
+        items, headers = client.get_page(endpoint, params=page_params)
+        if not isinstance(items, list):
+            logger.warning(f"Unexpected non-list response from {endpoint}: {type(items).__name__}")
+            return [], None
+        if not items:
+            return [], None
+        return items, next_page_params(headers, page_params)
+
+    yielded = 0
+    pending = None
+    try:
+        items, next_params = fetch(request_params)
+        while True:
+            for index, item in enumerate(items):
+                yield item
+                yielded += 1
+                if limit is not None and yielded >= limit:
+                    return
+                if index == 0 and prefetch and next_params and pending is None:
+                    remaining_here = len(items) - 1
+                    if limit is None or yielded + remaining_here < limit:
+                        pending = _get_prefetch_executor().submit(fetch, next_params)
+            if not next_params:
+                return
+            if pending is not None:
+                future, pending = pending, None
+                items, next_params = future.result()
+            else:
+                items, next_params = fetch(next_params)
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+async def aiter_paginated(
+    client,
+    endpoint: str,
+    params: Optional[Dict[str, Any]] = None,
+    per_page: Optional[int] = None,
+    limit: Optional[int] = None,
+    prefetch: Optional[bool] = None,
+) -> AsyncIterator[Any]:
+    """
+    iter_paginated 的异步版本，client 为 AsyncGitLabClient 实例
+    预取通过 asyncio 任务完成，提前停止迭代时会取消未完成的预取
+    """
+    api_config = client.api_config
+    request_params = dict(params or {})
+    request_params.setdefault("per_page", per_page or api_config.per_page)
+    if prefetch is None:
+        prefetch = api_config.prefetch_pages
+    if limit is not None and limit <= 0:
+        return
+
+    async def fetch(page_params: Dict[str, Any]) -> Tuple[list, Optional[Dict[str, Any]]]:
+        items, headers = await client.get_page(endpoint, params=page_params)
+        if not isinstance(items, list):
+            logger.warning(f"Unexpected non-list response from {endpoint}: {type(items).__name__}")
+            return [], None
+        if not items:
+            return [], None
+        return items, next_page_params(headers, page_params)
+
+    yielded = 0
+    pending = None
+    try:
+        items, next_params = await fetch(request_params)
+        while True:
+            for index, item in enumerate(items):
+                yield item
+                yielded += 1
+                if limit is not None and yielded >= limit:
+                    return
+                if index == 0 and prefetch and next_params and pending is None:
+                    remaining_here = len(items) - 1
+                    if limit is None or yielded + remaining_here < limit:
+                        pending = asyncio.ensure_future(fetch(next_params))
+            if not next_params:
+                return
+            if pending is not None:
+                task, pending = pending, None
+                items, next_params = await task
+            else:
+                items, next_params = await fetch(next_params)
+    finally:
+        if pending is not None:
+            pending.cancel()
@@ -1,5 +1,6 @@
 # clients/gitlab/pipeline_client.py
 from .gitlab_client import GitLabClient
+from .pagination import iter_paginated
 from models.gitlab_models import GitLabPipeline
 class PipelineClient(GitLabClient):
     def create_pipeline(self, project_id: int, ref: str):
@@ -9,23 +10,26 @@ class PipelineClient(GitLabClient):
     def get_pipeline(self, project_id: int, pipeline_id: int):
         pipeline = self.get(f"api/v4/projects/{project_id}/pipelines/{pipeline_id}")
         return GitLabPipeline(**pipeline)
-    def list_pipelines(self, project_id: int, ref: str = None, params: dict = None):
-        if params is None:
-            params = {}
+    def iter_pipelines(self, project_id: int, ref: str = None, params: dict = None, limit: int = None):
+        """惰性遍历项目的Pipeline（按GitLab默认顺序，最新的在前）"""
+        params = dict(params or {})
         if ref:
             params["ref"] = ref
-        pipelines = self.get(f"api/v4/projects/{project_id}/pipelines", params=params)
-        return [GitLabPipeline(**p) for p in pipelines]
+        for p in iter_paginated(self, f"api/v4/projects/{project_id}/pipelines", params=params, limit=limit):
+            yield GitLabPipeline(**p)
+    def list_pipelines(self, project_id: int, ref: str = None, params: dict = None, limit: int = None):
+        return list(self.iter_pipelines(project_id, ref, params, limit))
     def get_latest_pipeline(self, project_id: int, ref: str = None):
         """获取最新的Pipeline"""
-        params = {"per_page": 1}
-        if ref:
-            params["ref"] = ref
-        pipelines = self.get(f"api/v4/projects/{project_id}/pipelines", params=params)
-        if pipelines:
-            return GitLabPipeline(**pipelines[0])
-        return None
+        return next(self.iter_pipelines(project_id, ref, {"per_page": 1}, limit=1), None)
+    def cancel_pipeline(self, project_id: int, pipeline_id: int):
+        """取消Pipeline中所有未结束的Job"""
+        pipeline = self.post(f"api/v4/projects/{project_id}/pipelines/{pipeline_id}/cancel")
+        return GitLabPipeline(**pipeline)
+    def retry_pipeline(self, project_id: int, pipeline_id: int):
+        """重试Pipeline中所有失败和已取消的Job"""
+        pipeline = self.post(f"api/v4/projects/{project_id}/pipelines/{pipeline_id}/retry")
+        return GitLabPipeline(**pipeline)
     def get_pipeline_jobs(self, project_id: int, pipeline_id: int):
         """获取Pipeline下的所有Jobs"""
-        jobs = self.get(f"api/v4/projects/{project_id}/pipelines/{pipeline_id}/jobs")
-        return jobs
\ No newline at end of file
+        return list(iter_paginated(self, f"api/v4/projects/{project_id}/pipelines/{pipeline_id}/jobs"))
@@ -0,0 +1,108 @@
+# clients/gitlab/pipeline_discovery.py
+
+import random
+import time
+from typing import Optional
+from clients.logging.logger import logger
+from models.gitlab_models import GitLabPipeline
+from .pipeline_client import PipelineClient
+from .pipeline_events import pipeline_events
+from .pipeline_result_store import get_pipeline_result_store
+
+MR_REF_PREFIX = "refs/merge-requests/"
+
+def _matches(pipeline: GitLabPipeline, sha: str, ref: Optional[str]) -> bool:
+    return pipeline.sha == sha and (ref is None or pipeline.ref == ref)
+
+def is_mr_pipeline(pipeline: GitLabPipeline) -> bool:
+    """MR Pipeline（refs/merge-requests/<iid>/head 或 /merge），即 MR 的 head pipeline，决定能否合并"""
+    return (pipeline.ref or "").startswith(MR_REF_PREFIX)
+
+def _poll(pipeline_client: PipelineClient, project_id: int, sha: str, ref: Optional[str],
+          mr_client=None, mr_iid: Optional[int] = None) -> Optional[GitLabPipeline]:
+    """查询一次 API，返回匹配的最新 Pipeline；指定 mr_iid 时同一提交优先返回 MR Pipeline"""
+    if mr_iid is not None:
+        candidates = [GitLabPipeline(**p) for p in mr_client.iter_merge_request_pipelines(project_id, mr_iid, per_page=5, limit=5)]
+        matched = [p for p in candidates if _matches(p, sha, None)]
+        return next((p for p in matched if is_mr_pipeline(p)), None) or next(iter(matched), None)
+    candidates = pipeline_client.iter_pipelines(project_id, ref, {"sha": sha, "per_page": 5}, limit=5)
+    return next((p for p in candidates if _matches(p, sha, ref)), None)
+
+def _cached(api_config, project_id: int, sha: str, ref: Optional[str]) -> Optional[GitLabPipeline]:
+    """同一提交已有结论时直接由结论记录构造 Pipeline，不必等待或查询"""
+    verdict = get_pipeline_result_store(api_config).get(project_id, sha, ref)
+    if verdict is None:
+        return None
+    logger.info(f"Pipeline {verdict['pipeline_id']} for {sha[:8]} already finished: {verdict['status']}")
+    return GitLabPipeline(id=verdict["pipeline_id"], status=verdict["status"], ref=verdict["ref"],
+                          sha=sha, web_url=verdict["web_url"])
+
+def _lookup(pipeline_client: PipelineClient, project_id: int, sha: str, ref: Optional[str],
+            mr_client=None, mr_iid: Optional[int] = None) -> Optional[GitLabPipeline]:
+    """
+    先查 Webhook 事件，没有时查询一次 API
+
+    指定 mr_iid 时事件只认该 MR 的 MR Pipeline：推送触发的分支 Pipeline 通常先出现，
+    若先返回它，MR Pipeline 会被当成重复的 Pipeline 取消
+    """
+    if mr_iid is not None:
+        pipeline_id = pipeline_events.find_pipeline(project_id, sha, ref_prefix=f"{MR_REF_PREFIX}{mr_iid}/")
+    else:
+        pipeline_id = pipeline_events.find_pipeline(project_id, sha, ref)
+    if pipeline_id is not None:
+        return pipeline_client.get_pipeline(project_id, pipeline_id)
+    return _poll(pipeline_client, project_id, sha, ref, mr_client, mr_iid)
+
+def find_pipeline(project_id: int, sha: str, ref: Optional[str] = None, mr_iid: Optional[int] = None,
+                  mr_client=None, pipeline_client: Optional[PipelineClient] = None) -> Optional[GitLabPipeline]:
+    """查找提交 sha（分支为 ref）对应的 Pipeline，不等待；参数同 wait_for_pipeline"""
+    pipeline_client = pipeline_client or PipelineClient()
+    ref_filter = None if mr_iid is not None else ref
+    return (_cached(pipeline_client.api_config, project_id, sha, ref_filter)
+            or _lookup(pipeline_client, project_id, sha, ref, mr_client, mr_iid))
+
+def wait_for_pipeline(project_id: int, sha: str, ref: Optional[str] = None, timeout: Optional[float] = None,
+                      mr_iid: Optional[int] = None, mr_client=None,
+                      pipeline_client: Optional[PipelineClient] = None) -> Optional[GitLabPipeline]:
+    """
+    等待提交 sha（分支为 ref）对应的 Pipeline 出现，返回该 Pipeline；超过 timeout 仍未出现时返回 None
+
+    只认 SHA 匹配的 Pipeline，不会拿到同一分支上更早的旧 Pipeline。
+    项目的 Webhook 可用时收到事件立即返回；否则从 pipeline_discovery_interval 开始快速轮询，
+    每次按 poll_backoff 退避（带 poll_jitter 抖动），最长 poll_max_interval
+
+    Args:
+        timeout: 最长等待秒数，默认取 pipeline_discovery_timeout
+        mr_iid: 指定时查询该 MR 的 Pipeline（包含 refs/merge-requests/* 上的 MR Pipeline），不再按 ref 过滤
+        mr_client: 指定 mr_iid 时使用的 MergeRequestClient
+    """
+    pipeline_client = pipeline_client or PipelineClient()
+    api_config = pipeline_client.api_config
+    deadline = time.monotonic() + (timeout or api_config.pipeline_discovery_timeout)
+    delay = api_config.pipeline_discovery_interval
+    pipeline = _cached(api_config, project_id, sha, None if mr_iid is not None else ref)
+    if pipeline is not None:
+        return pipeline
+    polls = 0
+    while True:
+        version = pipeline_events.project_version(project_id)
+        try:
+            polls += 1
+            pipeline = _lookup(pipeline_client, project_id, sha, ref, mr_client, mr_iid)
+        except Exception as e:
+            # 查询失败不中断等待，下一轮重试，直到超时
+            logger.warning(f"Failed to look up pipeline for {sha[:8]}: {e}")
+        if pipeline is not None:
+            logger.info(f"Found pipeline {pipeline.id} for {sha[:8]} ({pipeline.ref}) after {polls} lookups")
+            return pipeline
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.warning(f"No pipeline for {sha[:8]} (ref={ref}) appeared within the deadline")
+            return None
+        if pipeline_events.project_active(project_id):
+            wait = api_config.webhook_fallback_interval
+        else:
+            wait = delay * random.uniform(1 - api_config.poll_jitter, 1 + api_config.poll_jitter)
+            delay = min(api_config.poll_max_interval, delay * api_config.poll_backoff)
+        pipeline_events.wait_project(project_id, version, min(wait, remaining))
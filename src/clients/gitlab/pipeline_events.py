@@ -0,0 +1,314 @@
+# clients/gitlab/pipeline_events.py
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from clients.logging.logger import logger
+from models.gitlab_models import GitLabJob
+
+# 已结束的 Job 状态；乱序到达的旧事件不能把它们改回运行中
+_FINAL_JOB_STATUSES = {"success", "failed", "canceled", "skipped"}
+
+class _PipelineState:
+    __slots__ = ("status", "ref", "sha", "updated", "version", "jobs")
+
+    def __init__(self):
+        self.status: Optional[str] = None
+        self.ref: Optional[str] = None
+        self.sha: Optional[str] = None
+        self.updated = 0.0
+        self.version = 0
+        # job_id -> (job 字段, 收到事件的 monotonic 时间)
+        self.jobs: Dict[int, Tuple[dict, float]] = {}
+
+class PipelineEventStore:
+    """
+    GitLab Webhook 事件的进程内状态存储（Pipeline / Job / Merge Request）
+
+    Webhook 接口写入，监控循环订阅：同步线程通过 wait 阻塞等待，协程通过 wait_async 等待，
+    某条 Pipeline 有更新时立即唤醒。只保留最近 max_pipelines 条 Pipeline 的状态
+    """
+
+    # 项目在该时间内收到过事件，才认为其 Webhook 可用，监控可以放慢兜底轮询
+    ACTIVE_WINDOW = 600
+
+    def __init__(self, max_pipelines: int = 500):
+        self.max_pipelines = max_pipelines
+        self._cond = threading.Condition()
+        self._pipelines: "OrderedDict[Tuple[int, int], _PipelineState]" = OrderedDict()
+        self._merge_requests: "OrderedDict[Tuple[int, int], dict]" = OrderedDict()
+        self._project_seen: Dict[int, float] = {}
+        # 项目下任意 Pipeline / Job 事件的计数，供等待新 Pipeline 出现的一方使用
+        self._project_versions: Dict[int, int] = {}
+        self._async_waiters: Dict[Tuple[int, int], List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self.received: Dict[str, int] = {}
+
+    def _state(self, key: Tuple[int, int]) -> _PipelineState:
+        """持锁调用"""
+        state = self._pipelines.get(key)
+        if state is None:
+            state = _PipelineState()
+            self._pipelines[key] = state
+            while len(self._pipelines) > self.max_pipelines:
+                self._pipelines.popitem(last=False)
+        else:
+            self._pipelines.move_to_end(key)
+        return state
+
+    def _apply_job(self, state: _PipelineState, job: dict, now: float):
+        job_id = job.get("id")
+        if job_id is None:
+            return
+        previous = state.jobs.get(job_id)
+        if previous and previous[0].get("status") in _FINAL_JOB_STATUSES and job.get("status") not in _FINAL_JOB_STATUSES:
+            return
+        state.jobs[job_id] = (job, now)
+
+    def _notify(self, key: Tuple[int, int]):
+        """持锁调用"""
+        self._project_versions[key[0]] = self._project_versions.get(key[0], 0) + 1
+        self._cond.notify_all()
+        for loop, event in self._async_waiters.get(key, []):
+            loop.call_soon_threadsafe(event.set)
+
+    def apply(self, payload: dict) -> Optional[str]:
+        """
+        写入一条 Webhook 事件
+
+        Returns:
+            事件类型（pipeline / build / merge_request），不支持的事件返回 None
+        """
+        kind = payload.get("object_kind")
+        project_id = (payload.get("project") or {}).get("id") or payload.get("project_id")
+        if kind not in ("pipeline", "build", "merge_request") or project_id is None:
+            return None
+        now = time.monotonic()
+        with self._cond:
+            self.received[kind] = self.received.get(kind, 0) + 1
+            self._project_seen[project_id] = now
+            if kind == "pipeline":
+                attrs = payload.get("object_attributes") or {}
+                key = (project_id, attrs.get("id"))
+                state = self._state(key)
+                state.status = attrs.get("status")
+                state.ref = attrs.get("ref")
+                state.sha = attrs.get("sha")
+                for build in payload.get("builds") or []:
+                    self._apply_job(state, {
+                        "id": build.get("id"),
+                        "name": build.get("name"),
+                        "stage": build.get("stage"),
+                        "status": build.get("status"),
+                        "ref": attrs.get("ref"),
+                        "started_at": build.get("started_at"),
+                        "finished_at": build.get("finished_at"),
+                        "duration": build.get("duration"),
+                        "queued_duration": build.get("queued_duration"),
+                        "allow_failure": build.get("allow_failure"),
+                        "failure_reason": build.get("failure_reason"),
+                    }, now)
+            elif kind == "build":
+                key = (project_id, payload.get("pipeline_id"))
+                state = self._state(key)
+                state.ref = state.ref or payload.get("ref")
+                state.sha = state.sha or payload.get("sha")
+                self._apply_job(state, {
+                    "id": payload.get("build_id"),
+                    "name": payload.get("build_name"),
+                    "stage": payload.get("build_stage"),
+                    "status": payload.get("build_status"),
+                    "ref": payload.get("ref"),
+                    "started_at": payload.get("build_started_at"),
+                    "finished_at": payload.get("build_finished_at"),
+                    "duration": payload.get("build_duration"),
+                    "queued_duration": payload.get("build_queued_duration"),
+                    "allow_failure": payload.get("build_allow_failure"),
+                    "failure_reason": payload.get("build_failure_reason"),
+                }, now)
+            else:
+                attrs = payload.get("object_attributes") or {}
+                mr_key = (project_id, attrs.get("iid"))
+                self._merge_requests[mr_key] = {
+                    "iid": attrs.get("iid"),
+                    "state": attrs.get("state"),
+                    "action": attrs.get("action"),
+                    "merge_status": attrs.get("merge_status"),
+                    "merge_commit_sha": attrs.get("merge_commit_sha"),
+                    "source_branch": attrs.get("source_branch"),
+                    "target_branch": attrs.get("target_branch"),
+                    "sha": (attrs.get("last_commit") or {}).get("id"),
+                    "received": now,
+                }
+                self._merge_requests.move_to_end(mr_key)
+                while len(self._merge_requests) > self.max_pipelines:
+                    self._merge_requests.popitem(last=False)
+                self._cond.notify_all()
+                return kind
+            state.updated = now
+            state.version += 1
+            self._notify(key)
+        logger.debug(f"GitLab {kind} event for project {project_id} pipeline {key[1]}")
+        return kind
+
+    def project_active(self, project_id: int) -> bool:
+        with self._cond:
+            seen = self._project_seen.get(project_id)
+        return seen is not None and time.monotonic() - seen < self.ACTIVE_WINDOW
+
+    def version(self, project_id: int, pipeline_id: int) -> int:
+        with self._cond:
+            state = self._pipelines.get((project_id, pipeline_id))
+            return state.version if state else 0
+
+    def pipeline_status(self, project_id: int, pipeline_id: int, since: float = 0.0) -> Optional[str]:
+        """返回 since（monotonic 时间）之后由事件得到的 Pipeline 状态，没有更新的事件时返回 None"""
+        with self._cond:
+            state = self._pipelines.get((project_id, pipeline_id))
+            if state is None or state.status is None or state.updated <= since:
+                return None
+            return state.status
+
+    def job_status(self, project_id: int, job_id: int) -> Optional[str]:
+        """事件中该 Job 的最新状态，没有收到过该 Job 的事件时返回 None"""
+        with self._cond:
+            for (pid, _), state in reversed(self._pipelines.items()):
+                if pid == project_id and job_id in state.jobs:
+                    return state.jobs[job_id][0].get("status")
+        return None
+
+    def find_pipeline(self, project_id: int, sha: str, ref: Optional[str] = None,
+                      ref_prefix: Optional[str] = None) -> Optional[int]:
+        """返回事件中该项目最近一条提交为 sha（且分支为 ref / 以 ref_prefix 开头）的 Pipeline id，没有时返回 None"""
+        with self._cond:
+            for (pid, pipeline_id), state in reversed(self._pipelines.items()):
+                if pid != project_id or pipeline_id is None or state.sha != sha:
+                    continue
+                if (ref is None or state.ref == ref) and (ref_prefix is None or (state.ref or "").startswith(ref_prefix)):
+                    return pipeline_id
+        return None
+
+    def project_version(self, project_id: int) -> int:
+        with self._cond:
+            return self._project_versions.get(project_id, 0)
+
+    def wait_project(self, project_id: int, version: int, timeout: float) -> int:
+        """阻塞到该项目收到新的 Pipeline / Job 事件或超时，返回当前计数"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                current = self._project_versions.get(project_id, 0)
+                remaining = deadline - time.monotonic()
+                if current != version or remaining <= 0:
+                    return current
+                self._cond.wait(timeout=remaining)
+
+    def merge_request(self, project_id: int, iid: int) -> Optional[dict]:
+        with self._cond:
+            mr = self._merge_requests.get((project_id, iid))
+            return dict(mr) if mr else None
+
+    def overlay_jobs(self, project_id: int, pipeline_id: int, jobs: List[GitLabJob], since: float) -> List[GitLabJob]:
+        """
+        用 since 之后收到的 Job 事件更新 API 拿到的 Job 列表；列表中没有的新 Job（如重试）追加在末尾
+        """
+        with self._cond:
+            state = self._pipelines.get((project_id, pipeline_id))
+            updates = {job_id: data for job_id, (data, received) in state.jobs.items() if received > since} if state else {}
+        if not updates:
+            return jobs
+        merged = []
+        for job in jobs:
+            data = updates.pop(job.id, None)
+            if data is not None and not (job.status in _FINAL_JOB_STATUSES and data.get("status") not in _FINAL_JOB_STATUSES):
+                job = job.copy(update={k: v for k, v in data.items() if v is not None})
+            merged.append(job)
+        for data in updates.values():
+            if data.get("name") and data.get("status"):
+                merged.append(GitLabJob(**{k: v for k, v in data.items() if v is not None}))
+        return merged
+
+    def wait(self, project_id: int, pipeline_id: int, version: int, timeout: float) -> int:
+        """阻塞到该 Pipeline 的版本号变化或超时，返回当前版本号"""
+        deadline = time.monotonic() + timeout
+        key = (project_id, pipeline_id)
+        with self._cond:
+            while True:
+                state = self._pipelines.get(key)
+                current = state.version if state else 0
+                remaining = deadline - time.monotonic()
+                if current != version or remaining <= 0:
+                    return current
+                self._cond.wait(timeout=remaining)
+
+    async def wait_async(self, project_id: int, pipeline_id: int, version: int, timeout: float) -> int:
+        """wait 的协程版本"""
+        key = (project_id, pipeline_id)
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._cond:
+            if self.version(project_id, pipeline_id) != version:
+                return self.version(project_id, pipeline_id)
+            self._async_waiters.setdefault(key, []).append(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                waiters = self._async_waiters.get(key, [])
+                if waiter in waiters:
+                    waiters.remove(waiter)
+                if not waiters:
+                    self._async_waiters.pop(key, None)
+        return self.version(project_id, pipeline_id)
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "received": dict(self.received),
+                "pipelines": len(self._pipelines),
+                "merge_requests": len(self._merge_requests),
+                "active_projects": sum(1 for seen in self._project_seen.values() if now - seen < self.ACTIVE_WINDOW),
+            }
+
+# 进程内共享：Webhook 接口写入，CLI 监控线程与后台任务读取
+pipeline_events = PipelineEventStore()
+
+class JobStatusFeed:
+    """
+    为同步监控循环提供 Job 列表
+
+    项目的 Webhook 可用时，两次 API 查询之间用事件更新 Job 状态，有事件立即唤醒；
+    只有等待超过 fallback_interval 仍无事件时才重新调用 API 兜底。
+    Webhook 不可用时按 interval 正常轮询
+    """
+
+    def __init__(self, job_client, project_id: int, pipeline_id: int, interval: float, fallback_interval: float):
+        self.job_client = job_client
+        self.project_id = project_id
+        self.pipeline_id = pipeline_id
+        self.interval = interval
+        self.fallback_interval = fallback_interval
+        self._jobs: Optional[List[GitLabJob]] = None
+        self._fetched_at = 0.0
+        self._version = pipeline_events.version(project_id, pipeline_id)
+        self._woken = False
+
+    def jobs(self) -> List[GitLabJob]:
+        stale = time.monotonic() - self._fetched_at >= self.fallback_interval
+        if self._jobs is None or not self._woken or stale:
+            self._fetched_at = time.monotonic()
+            self._version = pipeline_events.version(self.project_id, self.pipeline_id)
+            self._jobs = self.job_client.list_jobs(self.project_id, self.pipeline_id)
+            return self._jobs
+        return pipeline_events.overlay_jobs(self.project_id, self.pipeline_id, self._jobs, self._fetched_at)
+
+    def wait(self):
+        """等待下一次检查：有事件时立即返回，否则等到轮询间隔"""
+        timeout = self.fallback_interval if pipeline_events.project_active(self.project_id) else self.interval
+        version = pipeline_events.wait(self.project_id, self.pipeline_id, self._version, timeout)
+        self._woken = version != self._version
+        self._version = version
@@ -0,0 +1,172 @@
+# clients/gitlab/pipeline_result_store.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from clients.logging.logger import logger
+from config.config_models import resolve_data_path
+from models.gitlab_models import GitLabJob
+
+# 可以作为结论的结果；running / manual 等中间状态不记录
+VERDICTS = {"success", "failed"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pipeline_results (
+    project_id INTEGER NOT NULL,
+    sha TEXT NOT NULL,
+    ref TEXT NOT NULL,
+    pipeline_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    web_url TEXT,
+    failed_jobs TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (project_id, sha, ref)
+);
+CREATE INDEX IF NOT EXISTS idx_pipeline_results_id ON pipeline_results (project_id, pipeline_id);
+"""
+
+def failed_job_summary(jobs: Iterable[GitLabJob]) -> List[Dict[str, object]]:
+    """失败 Job 摘要（不含 allow_failure 的失败）"""
+    return [
+        {"id": j.id, "name": j.name, "stage": j.stage, "failure_reason": j.failure_reason}
+        for j in jobs if j.status == "failed" and not j.allow_failure
+    ]
+
+class PipelineResultStore:
+    """
+    (project_id, 提交 SHA, 分支) -> Pipeline 最终结论的本地记录（SQLite）
+
+    监控与 Webhook 在 Pipeline 得出结论时写入；同一提交已有结论时，调试循环与监控可以直接使用，
+    状态恢复接口也不必再查询 GitLab。Pipeline 被重试或重新运行时应调用 forget 作废
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """持锁调用"""
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def record(self, project_id: int, sha: str, ref: str, pipeline_id: int, status: str,
+               failed_jobs: Optional[List[Dict[str, object]]] = None, web_url: Optional[str] = None) -> bool:
+        """写入一条结论，同一 (项目, SHA, 分支) 只保留最新的；status 不是结论时忽略"""
+        if status not in VERDICTS or not sha or not ref:
+            return False
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO pipeline_results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (project_id, sha, ref, pipeline_id, status, web_url,
+                         json.dumps(failed_jobs or [], ensure_ascii=False), time.time())
+                    )
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to record result of pipeline {pipeline_id}: {e}")
+            return False
+
+    def record_event(self, payload: dict) -> bool:
+        """
+        根据 Webhook 的 Pipeline 事件更新结论：结束时写入，重新运行（running / pending 等）时作废
+        """
+        if payload.get("object_kind") != "pipeline":
+            return False
+        attrs = payload.get("object_attributes") or {}
+        project_id = (payload.get("project") or {}).get("id")
+        pipeline_id = attrs.get("id")
+        if project_id is None or pipeline_id is None:
+            return False
+        status = attrs.get("status")
+        if status not in VERDICTS:
+            return self.forget(project_id, pipeline_id)
+        failed = [
+            {"id": b.get("id"), "name": b.get("name"), "stage": b.get("stage"), "failure_reason": b.get("failure_reason")}
+            for b in payload.get("builds") or [] if b.get("status") == "failed" and not b.get("allow_failure")
+        ]
+        return self.record(project_id, attrs.get("sha"), attrs.get("ref"), pipeline_id, status, failed, attrs.get("url"))
+
+    def _one(self, query: str, args: tuple) -> Optional[Dict[str, object]]:
+        try:
+            with self._lock:
+                row = self._connect().execute(query, args).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to query pipeline results: {e}")
+            return None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        result = dict(row)
+        result["failed_jobs"] = json.loads(result["failed_jobs"])
+        return result
+
+    def get(self, project_id: int, sha: str, ref: Optional[str] = None) -> Optional[Dict[str, object]]:
+        """返回该提交（可限定分支）最近的结论，没有时返回 None"""
+        if ref is None:
+            return self._one(
+                "SELECT * FROM pipeline_results WHERE project_id = ? AND sha = ? ORDER BY recorded_at DESC LIMIT 1",
+                (project_id, sha)
+            )
+        return self._one(
+            "SELECT * FROM pipeline_results WHERE project_id = ? AND sha = ? AND ref = ?", (project_id, sha, ref)
+        )
+
+    def get_pipeline(self, project_id: int, pipeline_id: int) -> Optional[Dict[str, object]]:
+        """按 Pipeline id 查询结论"""
+        return self._one(
+            "SELECT * FROM pipeline_results WHERE project_id = ? AND pipeline_id = ?", (project_id, pipeline_id)
+        )
+
+    def forget(self, project_id: int, pipeline_id: int) -> bool:
+        """Pipeline 被重试后作废其结论"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    cursor = conn.execute(
+                        "DELETE FROM pipeline_results WHERE project_id = ? AND pipeline_id = ?", (project_id, pipeline_id)
+                    )
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to forget result of pipeline {pipeline_id}: {e}")
+            return False
+
+    def stats(self) -> dict:
+        try:
+            with self._lock:
+                count = self._connect().execute("SELECT COUNT(*) FROM pipeline_results").fetchone()[0]
+        except sqlite3.Error:
+            count = None
+        return {"results": count, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+_store: Optional[PipelineResultStore] = None
+_store_lock = threading.Lock()
+
+def get_pipeline_result_store(api_config) -> PipelineResultStore:
+    """返回进程级结论记录，首次调用时按 gitlab_api 配置初始化"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PipelineResultStore(resolve_data_path(api_config.pipeline_result_db))
+        return _store
@@ -0,0 +1,351 @@
+# clients/gitlab/pipeline_watcher.py
+
+import asyncio
+import threading
+import time
+from typing import Dict, Iterator, AsyncIterator, List, Optional, Tuple
+from clients.logging.logger import logger
+from models.gitlab_models import GitLabJob
+from .job_client import JobClient
+from .pipeline_client import PipelineClient
+from .pipeline_events import JobStatusFeed, pipeline_events
+from .poll_schedule import AdaptivePollSchedule
+from .job_duration_store import get_job_duration_store
+from .pipeline_result_store import VERDICTS, failed_job_summary, get_pipeline_result_store
+
+SUCCESS_STATES = {"success", "skipped", "canceled"}
+FAILED_STATES = {"failed"}
+MANUAL_STATES = {"manual"}
+
+# 订阅方会结束监控的结果
+FINAL_OUTCOMES = {"success", "failed", "timeout", "stalled"}
+
+def pipeline_outcome(jobs: List[GitLabJob]) -> str:
+    """
+    根据 Job 状态判断 Pipeline 进展
+
+    Returns:
+        success（全部成功/跳过/取消）、failed（有 Job 失败）、manual（等待人工操作）或 running
+        Job 列表为空（Pipeline 刚创建）时视为 running；allow_failure 的 Job 失败不影响结果
+    """
+    statuses = ["success" if j.status in FAILED_STATES and j.allow_failure else j.status for j in jobs]
+    if statuses and all(s in SUCCESS_STATES for s in statuses):
+        return "success"
+    if any(s in FAILED_STATES for s in statuses):
+        return "failed"
+    if any(s in MANUAL_STATES for s in statuses):
+        return "manual"
+    return "running"
+
+def pipeline_verdict(jobs: List[GitLabJob]) -> Optional[str]:
+    """
+    可以持久化的结论：failed，或没有必需 Job 被取消的 success
+
+    pipeline_outcome 把全部取消的 Pipeline 视为结束（success），但取消可能来自 fail-fast、
+    被取代的 Pipeline 或人工操作，代码是否通过并不确定，不能作为该提交的结论写入记录
+    """
+    outcome = pipeline_outcome(jobs)
+    if outcome == "failed":
+        return outcome
+    if outcome == "success" and not any(j.status == "canceled" and not j.allow_failure for j in jobs):
+        return outcome
+    return None
+
+def job_key(job: GitLabJob) -> str:
+    return f"{job.stage}-{job.name}" if job.stage else job.name
+
+class PipelineUpdate:
+    """
+    一次检查的结果；changes 为相对该订阅者上一次看到的状态发生变化的 Job 及其旧状态，
+    eta 为根据历史时长预测的运行中 Job 剩余秒数（无历史时为 None）
+    """
+    __slots__ = ("jobs", "outcome", "changes", "tick", "eta")
+
+    def __init__(self, jobs: List[GitLabJob], outcome: str, changes: List[Tuple[GitLabJob, Optional[str]]],
+                 tick: int, eta: Optional[float] = None):
+        self.jobs = jobs
+        self.outcome = outcome
+        self.changes = changes
+        self.tick = tick
+        self.eta = eta
+
+class _Watch:
+    def __init__(self, project_id: int, pipeline_id: int):
+        self.project_id = project_id
+        self.pipeline_id = pipeline_id
+        self.intervals: Dict[int, float] = {}
+        self.fallback_interval = 60.0
+        self.jobs: List[GitLabJob] = []
+        self.eta: Optional[float] = None
+        self.tick = 0
+        self.error: Optional[BaseException] = None
+        # 已写入结论记录的结果，重试后结果变化时重新写入
+        self.verdict: Optional[str] = None
+        self.pipeline = None
+        self.thread: Optional[threading.Thread] = None
+        self.async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+class PipelineWatcher:
+    """
+    进程级 Pipeline 监控引擎
+
+    每个 (project_id, pipeline_id) 只有一个后台线程检查（结合 Webhook 事件），间隔由 AdaptivePollSchedule 决定，
+    关闭 adaptive_polling 时取订阅者中最短的间隔；
+    结果广播给所有订阅者；CLI 监控、Web 工作流与后台任务共用，同一 Pipeline 被多个会话监控时不会重复请求。
+    最后一个订阅者退出后线程结束
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._watches: Dict[Tuple[int, int], _Watch] = {}
+        self._next_id = 0
+        self.polls = 0
+
+    def subscribe(self, project_id: int, pipeline_id: int, interval: float,
+                  fallback_interval: float = 60.0) -> "PipelineSubscription":
+        key = (project_id, pipeline_id)
+        with self._cond:
+            self._next_id += 1
+            sub_id = self._next_id
+            watch = self._watches.get(key)
+            if watch is None:
+                watch = _Watch(project_id, pipeline_id)
+                self._watches[key] = watch
+            watch.intervals[sub_id] = interval
+            watch.fallback_interval = fallback_interval
+            if watch.thread is None:
+                watch.thread = threading.Thread(
+                    target=self._run, args=(watch,), name=f"pipeline-watch-{pipeline_id}", daemon=True
+                )
+                watch.thread.start()
+        return PipelineSubscription(self, watch, sub_id)
+
+    def _unsubscribe(self, watch: _Watch, sub_id: int):
+        with self._cond:
+            watch.intervals.pop(sub_id, None)
+            self._cond.notify_all()
+
+    def _publish(self, watch: _Watch, jobs: List[GitLabJob] = None, error: BaseException = None, eta: float = None):
+        with self._cond:
+            if jobs is not None:
+                watch.jobs = jobs
+                watch.eta = eta
+            watch.error = error
+            watch.tick += 1
+            self._cond.notify_all()
+            for loop, event in watch.async_waiters:
+                loop.call_soon_threadsafe(event.set)
+
+    def _run(self, watch: _Watch):
+        key = (watch.project_id, watch.pipeline_id)
+        feed = None
+        schedule = None
+        try:
+            while True:
+                with self._cond:
+                    if not watch.intervals:
+                        self._watches.pop(key, None)
+                        return
+                    interval = min(watch.intervals.values())
+                try:
+                    if feed is None:
+                        job_client = JobClient()
+                        feed = JobStatusFeed(job_client, watch.project_id, watch.pipeline_id,
+                                             interval, watch.fallback_interval)
+                        api_config = job_client.api_config
+                        durations = get_job_duration_store(api_config)
+                        if api_config.adaptive_polling:
+                            schedule = AdaptivePollSchedule(
+                                durations, api_config.poll_min_interval, api_config.poll_max_interval,
+                                api_config.poll_backoff, api_config.poll_jitter
+                            )
+                    self.polls += 1
+                    jobs = feed.jobs()
+                    if schedule is not None:
+                        # 状态变化后快速检查，平稳期退避，临近预计结束时提前检查
+                        feed.interval = schedule.next_delay(watch.project_id, jobs)
+                        eta = schedule.eta(watch.project_id, jobs)
+                    else:
+                        # 固定间隔时也记录已结束 Job 的时长
+                        durations.record_jobs(watch.project_id, jobs)
+                        feed.interval = interval
+                        eta = None
+                    self._publish(watch, jobs=jobs, eta=eta)
+                    verdict = pipeline_verdict(jobs)
+                    if verdict in VERDICTS and verdict != watch.verdict:
+                        self._record_verdict(watch, jobs, verdict, api_config)
+                except Exception as e:
+                    logger.error(f"Failed to check pipeline {watch.pipeline_id}: {e}")
+                    self._publish(watch, error=e)
+                    with self._cond:
+                        # 等订阅者取走错误并退出，避免对同一错误反复请求
+                        self._cond.wait(timeout=interval)
+                    continue
+                feed.wait()
+        finally:
+            with self._cond:
+                if self._watches.get(key) is watch and not watch.intervals:
+                    self._watches.pop(key, None)
+                watch.thread = None
+
+    def _record_verdict(self, watch: _Watch, jobs: List[GitLabJob], outcome: str, api_config):
+        """把结论按 (项目, SHA, 分支) 写入记录，同一提交以后不必再等 Pipeline"""
+        watch.verdict = outcome
+        try:
+            if watch.pipeline is None:
+                watch.pipeline = PipelineClient().get_pipeline(watch.project_id, watch.pipeline_id)
+            pipeline = watch.pipeline
+            get_pipeline_result_store(api_config).record(
+                watch.project_id, pipeline.sha, pipeline.ref, watch.pipeline_id, outcome,
+                failed_job_summary(jobs), pipeline.web_url
+            )
+        except Exception as e:
+            logger.warning(f"Failed to record verdict of pipeline {watch.pipeline_id}: {e}")
+
+    def job_status(self, project_id: int, job_id: int) -> Optional[str]:
+        """正在监控的 Pipeline 最近一次检查到的 Job 状态，不在监控中时返回 None"""
+        with self._cond:
+            for watch in self._watches.values():
+                if watch.project_id != project_id:
+                    continue
+                for job in watch.jobs:
+                    if job.id == job_id:
+                        return job.status
+        return None
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "watched_pipelines": len(self._watches),
+                "subscribers": sum(len(w.intervals) for w in self._watches.values()),
+                "polls": self.polls
+            }
+
+class PipelineSubscription:
+    """
+    单个订阅者对一条 Pipeline 的监控视图，可作为上下文管理器使用
+
+    updates() / aupdates() 每次检查产出一个 PipelineUpdate，结果为 success / failed 时结束；
+    超过 timeout 产出 outcome=timeout，连续 stall_timeout 秒没有任何 Job 状态变化（且不在等待人工操作）
+    产出 outcome=stalled
+    """
+
+    def __init__(self, watcher: PipelineWatcher, watch: _Watch, sub_id: int):
+        self.watcher = watcher
+        self.watch = watch
+        self.sub_id = sub_id
+        self._seen_tick = 0
+        self._last_statuses: Dict[str, str] = {}
+        self._last_change = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.watcher._unsubscribe(self.watch, self.sub_id)
+
+    def _take(self) -> Optional[PipelineUpdate]:
+        """持锁调用；有新的检查结果时返回 PipelineUpdate"""
+        watch = self.watch
+        if watch.tick == self._seen_tick:
+            return None
+        self._seen_tick = watch.tick
+        if watch.error is not None:
+            raise watch.error
+        changes = []
+        for job in watch.jobs:
+            key = job_key(job)
+            previous = self._last_statuses.get(key)
+            if previous != job.status:
+                changes.append((job, previous))
+                self._last_statuses[key] = job.status
+        if changes:
+            self._last_change = time.monotonic()
+        return PipelineUpdate(watch.jobs, pipeline_outcome(watch.jobs), changes, watch.tick, watch.eta)
+
+    def _check_limits(self, update: Optional[PipelineUpdate], deadline: Optional[float],
+                      stall_timeout: Optional[float]) -> Optional[PipelineUpdate]:
+        now = time.monotonic()
+        jobs = update.jobs if update else self.watch.jobs
+        outcome = update.outcome if update else pipeline_outcome(jobs)
+        if outcome in FINAL_OUTCOMES:
+            return None
+        if deadline is not None and now >= deadline:
+            logger.warning(f"Pipeline {self.watch.pipeline_id} monitoring timed out")
+            return PipelineUpdate(jobs, "timeout", [], self._seen_tick)
+        if stall_timeout and outcome != "manual" and now - self._last_change >= stall_timeout:
+            logger.warning(f"Pipeline {self.watch.pipeline_id} has no job status change for {stall_timeout}s")
+            return PipelineUpdate(jobs, "stalled", [], self._seen_tick)
+        return None
+
+    def _wait_timeout(self, deadline: Optional[float], stall_timeout: Optional[float]) -> float:
+        wake = [60.0]
+        now = time.monotonic()
+        if deadline is not None:
+            wake.append(deadline - now)
+        if stall_timeout:
+            wake.append(self._last_change + stall_timeout - now)
+        return max(0.0, min(wake))
+
+    def updates(self, timeout: Optional[float] = None, stall_timeout: Optional[float] = None) -> Iterator[PipelineUpdate]:
+        deadline = time.monotonic() + timeout if timeout else None
+        cond = self.watcher._cond
+        while True:
+            with cond:
+                update = self._take()
+                if update is None:
+                    cond.wait(timeout=self._wait_timeout(deadline, stall_timeout))
+                    update = self._take()
+            limit = self._check_limits(update, deadline, stall_timeout)
+            if update is not None:
+                yield update
+                if update.outcome in FINAL_OUTCOMES:
+                    return
+            if limit is not None:
+                yield limit
+                return
+
+    async def aupdates(self, timeout: Optional[float] = None, stall_timeout: Optional[float] = None) -> AsyncIterator[PipelineUpdate]:
+        """updates 的协程版本，等待时不占用线程"""
+        deadline = time.monotonic() + timeout if timeout else None
+        cond = self.watcher._cond
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with cond:
+            self.watch.async_waiters.append(waiter)
+        try:
+            while True:
+                with cond:
+                    event.clear()
+                    update = self._take()
+                if update is None:
+                    try:
+                        await asyncio.wait_for(event.wait(), self._wait_timeout(deadline, stall_timeout))
+                    except asyncio.TimeoutError:
+                        pass
+                    with cond:
+                        update = self._take()
+                limit = self._check_limits(update, deadline, stall_timeout)
+                if update is not None:
+                    yield update
+                    if update.outcome in FINAL_OUTCOMES:
+                        return
+                if limit is not None:
+                    yield limit
+                    return
+        finally:
+            with cond:
+                if waiter in self.watch.async_waiters:
+                    self.watch.async_waiters.remove(waiter)
+
+pipeline_watcher = PipelineWatcher()
+
+def known_job_status(project_id: int, job_id: int) -> Optional[str]:
+    """
+    不发请求获取 Job 状态：先查共享监控最近一次检查的结果，再查 Webhook 事件，都没有时返回 None
+    供日志读取接口判断 Job 是否已结束、日志能否写入归档
+    """
+    return pipeline_watcher.job_status(project_id, job_id) or pipeline_events.job_status(project_id, job_id)
@@ -0,0 +1,74 @@
+# clients/gitlab/poll_schedule.py
+
+import random
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from models.gitlab_models import GitLabJob
+from .job_duration_store import JobDurationStore, parse_gitlab_time
+
+def predicted_remaining(project_id: int, jobs: List[GitLabJob], history: JobDurationStore,
+                        now: Optional[datetime] = None) -> List[float]:
+    """运行中且有历史记录的 Job 预计还需多少秒结束（已超出预期的 Job 不计入）"""
+    now = now or datetime.now(timezone.utc)
+    remaining = []
+    for job in jobs:
+        if job.status != "running":
+            continue
+        started = parse_gitlab_time(job.started_at)
+        expected = history.expected(project_id, job.name)
+        if started is None or expected is None:
+            continue
+        left = expected - (now - started).total_seconds()
+        if left > 0:
+            remaining.append(left)
+    return remaining
+
+class AdaptivePollSchedule:
+    """
+    自适应轮询间隔
+
+    - 有 Job 状态变化后立即回到 min_interval，尽快发现紧接着的下一次变化
+    - 状态持续不变时按 backoff 倍数逐步放慢，最长 max_interval
+    - 有历史时长的运行中 Job 预计快结束时，把下一次检查提前到预计结束时间附近
+    - 每次间隔叠加 ±jitter 比例的随机抖动，避免多个监控同时打到 GitLab
+    """
+
+    def __init__(self, history: JobDurationStore, min_interval: float, max_interval: float,
+                 backoff: float = 1.5, jitter: float = 0.2):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff = max(1.0, backoff)
+        self.jitter = jitter
+        self.history = history
+        self.current = min_interval
+        self._statuses: Dict[int, str] = {}
+
+    def _observe(self, project_id: int, jobs: List[GitLabJob]) -> bool:
+        """把刚结束的 Job 写入时长记录，返回本次是否有状态变化"""
+        changed = False
+        for job in jobs:
+            if self._statuses.get(job.id) == job.status:
+                continue
+            changed = True
+            self._statuses[job.id] = job.status
+            self.history.record_job(project_id, job)
+        return changed
+
+    def next_delay(self, project_id: int, jobs: List[GitLabJob]) -> float:
+        """根据本次检查到的 Job 列表计算到下一次检查的等待秒数"""
+        if self._observe(project_id, jobs):
+            self.current = self.min_interval
+        else:
+            self.current = min(self.max_interval, self.current * self.backoff)
+        delay = self.current
+        remaining = predicted_remaining(project_id, jobs, self.history)
+        if remaining:
+            delay = min(delay, max(self.min_interval, min(remaining)))
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(self.min_interval * (1 - self.jitter), delay)
+
+    def eta(self, project_id: int, jobs: List[GitLabJob]) -> Optional[float]:
+        """运行中 Job 全部结束的预计剩余秒数，没有可用历史时返回 None"""
+        remaining = predicted_remaining(project_id, jobs, self.history)
+        return max(remaining) if remaining else None
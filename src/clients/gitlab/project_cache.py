@@ -0,0 +1,87 @@
+# clients/gitlab/project_cache.py
+
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+from typing import Dict, Optional, Tuple
+from models.gitlab_models import GitLabProject
+from clients.logging.logger import logger
+
+_PROJECT_ID_IN_URL = re.compile(r"/api/v4/projects/(\d+)(/.*)?$")
+
+class ProjectCache:
+    """
+    项目路径 → GitLabProject 的进程内缓存（同步与异步客户端共用）
+    找不到的项目也会缓存（较短的 TTL），避免反复请求不存在的路径
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Optional[GitLabProject], float]] = {}
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return path.strip("/").lower()
+
+    def get(self, path: str) -> Tuple[bool, Optional[GitLabProject]]:
+        """
+        Returns:
+            tuple: (是否命中, 项目对象；命中的负缓存返回 None)
+        """
+        key = self._key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            project, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return False, None
+            return True, project
+
+    def put(self, path: str, project: GitLabProject, ttl: int):
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[self._key(path)] = (project, time.monotonic() + ttl)
+            # 同时按 path_with_namespace 缓存，调用方大小写或别名不同时也能命中
+            self._entries[self._key(project.path_with_namespace)] = (project, time.monotonic() + ttl)
+
+    def put_missing(self, path: str, ttl: int):
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[self._key(path)] = (None, time.monotonic() + ttl)
+
+    def invalidate(self, path: str):
+        with self._lock:
+            self._entries.pop(self._key(path), None)
+
+    def invalidate_id(self, project_id: int):
+        """移除指向该项目 ID 的所有条目（项目被删除、迁移或改名时）"""
+        with self._lock:
+            stale = [k for k, (p, _) in self._entries.items() if p is not None and p.id == project_id]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            logger.info(f"Invalidated cached project entries for id {project_id}: {stale}")
+
+    def invalidate_for_url(self, url: str, body: str = ""):
+        """
+        根据返回 404 的请求失效对应项目
+
+        只有项目本身不存在时才失效：请求的就是 /projects/<id>，或响应体为 "404 Project Not Found"；
+        项目下的 MR、Pipeline、Job 等子资源不存在不影响项目缓存
+        """
+        match = _PROJECT_ID_IN_URL.search(urlsplit(url).path)
+        if not match:
+            return
+        if match.group(2) in (None, "/") or "404 Project Not Found" in (body or ""):
+            self.invalidate_id(int(match.group(1)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+project_cache = ProjectCache()
@@ -1,6 +1,8 @@
 # clients/gitlab/project_client.py
 
+import requests
 from .gitlab_client import GitLabClient
+from .project_cache import project_cache
 from models.gitlab_models import GitLabProject
 from config.config_manager import ConfigManager
 from clients.logging.logger import logger
@@ -16,6 +18,10 @@ class ProjectClient(GitLabClient):
         api_base_url = http_url.rstrip("/")
         self.base_url = api_base_url
 
+        hit, cached = project_cache.get(name)
+        if hit:
+            return cached
+
         encoded_path = encode_project_path(name)
         api_endpoint = f"api/v4/projects/{encoded_path}"
         logger.info(f"[DEBUG] Will query endpoint: {api_endpoint}")
@@ -23,6 +29,15 @@ class ProjectClient(GitLabClient):
 
         try:
             project = self.get(api_endpoint)
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                logger.info(f"[DEBUG] No project matched for: {name}")
+                project_cache.put_missing(name, self.api_config.project_negative_cache_ttl)
+                return None
+            logger.error(f"[DEBUG] Exception when querying GitLab API: {e}")
+            sys.stdout.flush()
+            sys.stderr.flush()
+            raise
         except Exception as e:
             logger.error(f"[DEBUG] Exception when querying GitLab API: {e}")
             sys.stdout.flush()
@@ -31,7 +46,9 @@ class ProjectClient(GitLabClient):
 
         if project:
             logger.info(f"[DEBUG] Project found by path: {project.get('path_with_namespace', '')}")
-            return GitLabProject(**project)
+            result = GitLabProject(**project)
+            project_cache.put(name, result, self.api_config.project_cache_ttl)
+            return result
         logger.info(f"[DEBUG] No project matched for: {name}")
         return None
 
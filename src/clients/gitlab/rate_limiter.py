@@ -0,0 +1,217 @@
+# clients/gitlab/rate_limiter.py
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Optional
+from models.constants import GITLAB_API_RATE_LIMIT
+from clients.logging.logger import logger
+
+class RequestPriority(IntEnum):
+    """数值越小优先级越高"""
+    INTERACTIVE = 0   # Web 界面发起的请求
+    MUTATION = 1      # 创建/合并/关闭 MR、触发 Pipeline 等写操作
+    BACKGROUND = 2    # 后台轮询
+
+_current_priority: contextvars.ContextVar[RequestPriority] = contextvars.ContextVar(
+    "gitlab_request_priority", default=RequestPriority.BACKGROUND
+)
+
+def current_priority() -> RequestPriority:
+    return _current_priority.get()
+
+def set_request_priority(priority: RequestPriority):
+    """为当前上下文（线程 / asyncio 任务）设置请求优先级，返回可用于 reset 的 token"""
+    return _current_priority.set(priority)
+
+@contextmanager
+def request_priority(priority: RequestPriority):
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+def effective_priority(method: str) -> RequestPriority:
+    """写操作至少按 MUTATION 处理，不会被后台轮询挤占"""
+    priority = current_priority()
+    if method.upper() != "GET":
+        return min(priority, RequestPriority.MUTATION)
+    return priority
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucketRateLimiter:
+    """
+    进程级令牌桶，同步线程与协程共用
+    等待者按 (优先级, 到达顺序) 排队，令牌只发给队首，因此后台轮询无法饿死交互请求；
+    同时根据 GitLab 返回的 RateLimit-Remaining / Retry-After 暂停发放
+    """
+
+    def __init__(self, rate_per_minute: int = GITLAB_API_RATE_LIMIT, burst: int = 20):
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._seq = itertools.count()
+        self.configure(rate_per_minute, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self.throttled = 0
+
+    def configure(self, rate_per_minute: int, burst: int):
+        with self._cond:
+            self.rate = rate_per_minute / 60.0 if rate_per_minute > 0 else 0.0
+            self.capacity = max(1, burst)
+            if hasattr(self, "_tokens"):
+                self._tokens = min(self._tokens, float(self.capacity))
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self, now: float):
+        self._tokens = min(float(self.capacity), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _try_take(self, ticket) -> float:
+        """持锁调用；成功返回 0，否则返回建议等待的秒数"""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self._waiters[0] is not ticket:
+            return 0.05
+        if self._tokens >= 1:
+            self._tokens -= 1
+            heapq.heappop(self._waiters)
+            self._cond.notify_all()
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def _enqueue(self, priority: RequestPriority):
+        ticket = [int(priority), next(self._seq)]
+        heapq.heappush(self._waiters, ticket)
+        return ticket
+
+    def _dequeue(self, ticket):
+        if ticket in self._waiters:
+            self._waiters.remove(ticket)
+            heapq.heapify(self._waiters)
+            self._cond.notify_all()
+
+    def acquire(self, priority: RequestPriority = RequestPriority.BACKGROUND):
+        if not self.enabled:
+            return
+        with self._cond:
+            ticket = self._enqueue(priority)
+            try:
+                waited = False
+                while True:
+                    wait = self._try_take(ticket)
+                    if wait <= 0:
+                        if waited:
+                            self.throttled += 1
+                        return
+                    waited = True
+                    self._cond.wait(timeout=wait)
+            except BaseException:
+                self._dequeue(ticket)
+                raise
+
+    async def acquire_async(self, priority: RequestPriority = RequestPriority.BACKGROUND):
+        if not self.enabled:
+            return
+        with self._cond:
+            ticket = self._enqueue(priority)
+        try:
+            waited = False
+            while True:
+                with self._cond:
+                    wait = self._try_take(ticket)
+                if wait <= 0:
+                    if waited:
+                        self.throttled += 1
+                    return
+                waited = True
+                await asyncio.sleep(min(wait, 0.5))
+        except BaseException:
+            with self._cond:
+                self._dequeue(ticket)
+            raise
+
+    def observe(self, status_code: int, headers) -> Optional[float]:
+        """
+        根据响应头调整令牌桶
+
+        Returns:
+            429 时建议的重试等待秒数，否则 None
+        """
+        retry_after = _parse_retry_after(headers.get("Retry-After"))
+        remaining = headers.get("RateLimit-Remaining")
+        reset_at = headers.get("RateLimit-Reset")
+        with self._cond:
+            now = time.monotonic()
+            if status_code == 429 or retry_after is not None:
+                if retry_after is not None:
+                    delay = retry_after
+                else:
+                    # 没有 Retry-After 时，暂停到令牌桶重新攒满
+                    delay = self.capacity / self.rate if self.rate else 1.0
+                self._blocked_until = max(self._blocked_until, now + delay)
+                self._tokens = 0.0
+                logger.warning(f"GitLab rate limit hit (status {status_code}), pausing requests for {delay:.1f}s")
+                self._cond.notify_all()
+                return delay if status_code == 429 else None
+            if remaining is not None:
+                try:
+                    remaining = int(remaining)
+                except ValueError:
+                    return None
+                self._refill(now)
+                self._tokens = min(self._tokens, float(remaining))
+                if remaining <= 0 and reset_at:
+                    try:
+                        delay = max(0.0, float(reset_at) - time.time())
+                    except ValueError:
+                        delay = 0.0
+                    self._blocked_until = max(self._blocked_until, now + delay)
+        return None
+
+    def stats(self) -> dict:
+        with self._cond:
+            self._refill(time.monotonic())
+            return {
+                "rate_per_minute": round(self.rate * 60),
+                "tokens": round(self._tokens, 2),
+                "waiting": len(self._waiters),
+                "throttled": self.throttled,
+                "paused_for": round(max(0.0, self._blocked_until - time.monotonic()), 2)
+            }
+
+rate_limiter = TokenBucketRateLimiter()
+_configured = False
+
+def get_rate_limiter(api_config=None) -> TokenBucketRateLimiter:
+    """返回进程级限流器，首次调用时按 gitlab_api 配置初始化"""
+    global _configured
+    if api_config is not None and not _configured:
+        rate = api_config.rate_limit_per_minute
+        rate_limiter.configure(GITLAB_API_RATE_LIMIT if rate is None else rate, api_config.rate_limit_burst)
+        _configured = True
+    return rate_limiter
@@ -0,0 +1,108 @@
+# clients/gitlab/singleflight.py
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+def request_key(method: str, url: str, params: Optional[Dict[str, Any]] = None,
+                headers: Optional[Dict[str, str]] = None) -> Hashable:
+    """按 method、URL、查询参数及额外请求头（如 Range）生成合并请求用的键（顺序无关）"""
+    items = tuple(sorted((str(k), repr(v)) for k, v in (params or {}).items()))
+    extra = tuple(sorted((k.lower(), v) for k, v in (headers or {}).items()))
+    return method.upper(), url, items, extra
+
+class _Call:
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    线程安全的请求合并：同一时刻相同键的调用只执行一次，其余调用等待并共享结果
+    供同步 GitLabClient 在 CLI 主线程与预取线程池之间使用
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._calls)}
+
+class AsyncSingleFlight:
+    """
+    SingleFlight 的协程版本，按事件循环隔离在途请求
+    等待方被取消不会影响执行方，执行方被取消时等待方收到 CancelledError
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        self.calls += 1
+        future = self._calls.get(loop_key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = loop.create_future()
+        self._calls[loop_key] = future
+        try:
+            result = await fn()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # 避免无人等待时出现 "exception was never retrieved" 警告
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._calls.pop(loop_key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._calls)}
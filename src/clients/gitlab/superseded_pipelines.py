@@ -0,0 +1,147 @@
+# clients/gitlab/superseded_pipelines.py
+
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from clients.logging.logger import logger
+from models.gitlab_models import GitLabJob, GitLabPipeline
+from .job_client import JobClient
+from .pipeline_client import PipelineClient
+from .job_duration_store import get_job_duration_store, parse_gitlab_time
+from .pipeline_discovery import is_mr_pipeline
+
+# 仍会占用或即将占用 Runner 的 Pipeline / Job 状态
+ACTIVE_STATES = {"created", "waiting_for_resource", "preparing", "pending", "running", "scheduled"}
+
+def remaining_runner_seconds(project_id: int, jobs: List[GitLabJob], history, now: Optional[datetime] = None) -> float:
+    """按历史时长估算未结束 Job 还要占用的 Runner 秒数；没有历史的 Job 不计入"""
+    now = now or datetime.now(timezone.utc)
+    total = 0.0
+    for job in jobs:
+        if job.status not in ACTIVE_STATES:
+            continue
+        expected = history.expected(project_id, job.name)
+        if expected is None:
+            continue
+        started = parse_gitlab_time(job.started_at) if job.status == "running" else None
+        elapsed = (now - started).total_seconds() if started else 0.0
+        total += max(0.0, expected - elapsed)
+    return total
+
+class SupersededPipelineCanceller:
+    """
+    记录编排流程自己触发的 Pipeline，有更新的 Pipeline 出现时取消被取代的那些
+
+    - 同一项目中此前跟踪的、提交 SHA 不同的 Pipeline（上一轮修复留下的）
+    - 与当前 Pipeline 提交相同的其他 Pipeline（推送 ai 触发的分支 Pipeline 与 MR Pipeline 重复）
+
+    只取消仍在运行/排队的 Pipeline，当前跟踪的 Pipeline 与合并后的部署 Pipeline 不受影响；
+    取消在后台线程执行，并按历史时长估算节省的 Runner 时间
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # project_id -> [GitLabPipeline]，按跟踪顺序
+        self._tracked: Dict[int, List[GitLabPipeline]] = {}
+        self.canceled: List[Dict[str, object]] = []
+
+    def track(self, project_id: int, pipeline: GitLabPipeline) -> Optional[threading.Thread]:
+        """
+        把 pipeline 设为该项目当前跟踪的 Pipeline，并在后台取消被它取代的 Pipeline
+
+        Returns:
+            执行取消的线程；未开启 cancel_superseded_pipelines 时返回 None
+        """
+        pipeline_client = PipelineClient()
+        if not pipeline_client.api_config.cancel_superseded_pipelines:
+            return None
+        with self._lock:
+            tracked = self._tracked.setdefault(project_id, [])
+            older = [p for p in tracked if p.id != pipeline.id]
+            tracked[:] = [p for p in tracked if p.id == pipeline.id] or [pipeline]
+        thread = threading.Thread(
+            target=self._cancel_superseded, args=(pipeline_client, project_id, pipeline, older),
+            name=f"supersede-{pipeline.id}", daemon=True
+        )
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _duplicate(current: GitLabPipeline, other: GitLabPipeline) -> bool:
+        """
+        other 是否为 current 的可取消重复：同一提交，且不是在 current 为分支 Pipeline 时的 MR Pipeline
+        （MR Pipeline 是 MR 的 head pipeline，"Pipeline 成功才能合并" 依据的是它，只取消分支那条）
+        """
+        return other.sha == current.sha and not (is_mr_pipeline(other) and not is_mr_pipeline(current))
+
+    def _cancel_superseded(self, pipeline_client: PipelineClient, project_id: int, current: GitLabPipeline,
+                           older: List[GitLabPipeline]):
+        candidates: Dict[int, str] = {}
+        for p in older:
+            if p.sha != current.sha:
+                candidates[p.id] = "superseded"
+            elif self._duplicate(current, p):
+                candidates[p.id] = "duplicate"
+        try:
+            # 同一提交的其他 Pipeline（分支 Pipeline 与 MR Pipeline）
+            for p in pipeline_client.iter_pipelines(project_id, params={"sha": current.sha, "per_page": 20}, limit=20):
+                if p.id != current.id and self._duplicate(current, p):
+                    candidates.setdefault(p.id, "duplicate")
+        except Exception as e:
+            logger.warning(f"Failed to list duplicate pipelines of {current.sha[:8]}: {e}")
+        if not candidates:
+            return
+        job_client = JobClient()
+        history = get_job_duration_store(pipeline_client.api_config)
+        for pid, reason in candidates.items():
+            self._cancel(pipeline_client, job_client, history, project_id, pid, reason, current.id)
+
+    def _cancel(self, pipeline_client: PipelineClient, job_client: JobClient, history, project_id: int,
+                pipeline_id: int, reason: str, replaced_by: int):
+        try:
+            jobs = job_client.list_jobs(project_id, pipeline_id)
+            if not any(j.status in ACTIVE_STATES for j in jobs):
+                return
+            saved = remaining_runner_seconds(project_id, jobs, history)
+            pipeline = pipeline_client.cancel_pipeline(project_id, pipeline_id)
+        except Exception as e:
+            logger.warning(f"Failed to cancel {reason} pipeline {pipeline_id}: {e}")
+            return
+        entry = {
+            "project_id": project_id,
+            "pipeline_id": pipeline_id,
+            "ref": pipeline.ref,
+            "sha": pipeline.sha,
+            "reason": reason,
+            "replaced_by": replaced_by,
+            "saved_seconds": round(saved, 1),
+        }
+        with self._lock:
+            self.canceled.append(entry)
+        logger.info(f"Canceled {reason} pipeline {pipeline_id} ({pipeline.ref}@{pipeline.sha[:8]}), "
+                    f"replaced by {replaced_by}, ~{saved:.0f}s runner time saved")
+
+    def forget(self, project_id: int):
+        """项目的编排流程结束后清除跟踪记录"""
+        with self._lock:
+            self._tracked.pop(project_id, None)
+
+    def report(self, project_id: Optional[int] = None) -> Dict[str, object]:
+        """已取消的 Pipeline 与估算节省的 Runner 时间"""
+        with self._lock:
+            entries = [dict(e) for e in self.canceled if project_id is None or e["project_id"] == project_id]
+        return {
+            "canceled_pipelines": len(entries),
+            "saved_runner_seconds": round(sum(e["saved_seconds"] for e in entries), 1),
+            "pipelines": entries,
+        }
+
+    def stats(self) -> dict:
+        report = self.report()
+        with self._lock:
+            tracked = sum(len(v) for v in self._tracked.values())
+        return {"tracked": tracked, "canceled": report["canceled_pipelines"],
+                "saved_runner_seconds": report["saved_runner_seconds"]}
+
+# 进程内共享：CLI 各步骤与 Web 工作流共用同一份跟踪记录
+superseded_pipelines = SupersededPipelineCanceller()
@@ -0,0 +1,236 @@
+# clients/gitlab/trace_archive.py
+
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+from clients.logging.logger import logger
+from config.config_models import resolve_data_path
+
+# Job 处于这些状态后日志不会再变化，可以归档
+FINISHED_JOB_STATUSES = {"success", "failed", "canceled", "skipped"}
+
+class TraceArchive:
+    """
+    已结束 Job 日志的本地归档（gzip 压缩、按内容寻址）
+
+    目录结构:
+        blobs/<sha256[:2]>/<sha256>.gz   日志内容，相同内容只存一份
+        jobs/<project_id>/<job_id>       指向 blob 的 sha256
+    总大小超过上限时按最近访问时间（blob 的 mtime）淘汰
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, root_dir: str, max_bytes: int):
+        self.root = Path(root_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / f"{digest}.gz"
+
+    def _job_path(self, project_id: int, job_id: int) -> Path:
+        return self.root / "jobs" / str(project_id) / str(job_id)
+
+    def _lookup(self, project_id: int, job_id: int) -> Optional[Path]:
+        try:
+            digest = self._job_path(project_id, job_id).read_text().strip()
+        except OSError:
+            return None
+        blob = self._blob_path(digest)
+        if not blob.exists():
+            return None
+        try:
+            # 以 mtime 作为 LRU 的访问时间
+            os.utime(blob, None)
+        except OSError:
+            pass
+        return blob
+
+    def contains(self, project_id: int, job_id: int) -> bool:
+        return self.enabled and self._lookup(project_id, job_id) is not None
+
+    def iter_trace(self, project_id: int, job_id: int, chunk_size: int = CHUNK_SIZE) -> Optional[Iterator[bytes]]:
+        """
+        以流的方式读取归档日志（解压后的字节块），未归档时返回 None
+        """
+        if not self.enabled:
+            return None
+        blob = self._lookup(project_id, job_id)
+        if blob is None:
+            return None
+
+        def chunks():
+            with gzip.open(blob, "rb") as f:
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        break
+                    yield data
+        return chunks()
+
+    def read_text(self, project_id: int, job_id: int) -> Optional[str]:
+        chunks = self.iter_trace(project_id, job_id)
+        if chunks is None:
+            return None
+        try:
+            return b"".join(chunks).decode("utf-8", errors="replace")
+        except (OSError, EOFError) as e:
+            self.discard_corrupted(project_id, job_id, e)
+            return None
+
+    def open_writer(self, project_id: int, job_id: int) -> "TraceArchiveWriter":
+        """打开一个增量写入器，边写边压缩；commit 之前读取方看不到该日志"""
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=tmp_dir, suffix=".gz")
+        return TraceArchiveWriter(self, project_id, job_id, fd, Path(tmp_name))
+
+    def store_stream(self, project_id: int, job_id: int, chunks: Iterable[bytes]) -> Optional[str]:
+        """
+        边读边压缩写入归档，返回内容的 sha256；用于不把整份日志放进内存的调用方
+        """
+        if not self.enabled:
+            return None
+        writer = self.open_writer(project_id, job_id)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+            return writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+
+    def store(self, project_id: int, job_id: int, trace: str) -> Optional[str]:
+        return self.store_stream(project_id, job_id, [trace.encode("utf-8")])
+
+    def _commit(self, project_id: int, job_id: int, digest: str, tmp_path: Path) -> str:
+        blob = self._blob_path(digest)
+        with self._lock:
+            if blob.exists():
+                tmp_path.unlink()
+                os.utime(blob, None)
+            else:
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, blob)
+                if self._total_bytes is not None:
+                    self._total_bytes += blob.stat().st_size
+            job_path = self._job_path(project_id, job_id)
+            job_path.parent.mkdir(parents=True, exist_ok=True)
+            job_path.write_text(digest)
+            self._evict_locked()
+        logger.debug(f"Archived trace for project {project_id} job {job_id} as {digest[:12]}")
+        return digest
+
+    def discard(self, project_id: int, job_id: int):
+        try:
+            self._job_path(project_id, job_id).unlink()
+        except OSError:
+            pass
+
+    def discard_corrupted(self, project_id: int, job_id: int, error: BaseException):
+        """
+        丢弃无法解压的归档：除 Job 记录外同时删除其 blob，
+        否则按内容寻址重新归档相同内容时会继续指向损坏的 blob
+        """
+        logger.warning(f"Corrupted trace archive for job {job_id}, discarding: {error}")
+        with self._lock:
+            try:
+                digest = self._job_path(project_id, job_id).read_text().strip()
+            except OSError:
+                digest = None
+            self.discard(project_id, job_id)
+            if digest:
+                blob = self._blob_path(digest)
+                try:
+                    size = blob.stat().st_size
+                    blob.unlink()
+                    if self._total_bytes is not None:
+                        self._total_bytes -= size
+                except OSError:
+                    pass
+
+    def _evict_locked(self):
+        blobs_dir = self.root / "blobs"
+        if self._total_bytes is None:
+            self._total_bytes = sum(p.stat().st_size for p in blobs_dir.glob("*/*.gz"))
+        if self._total_bytes <= self.max_bytes:
+            return
+        entries = sorted(
+            ((p.stat().st_mtime, p.stat().st_size, p) for p in blobs_dir.glob("*/*.gz")),
+            key=lambda e: e[0]
+        )
+        evicted = 0
+        for _, size, path in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                self._total_bytes -= size
+                evicted += 1
+            except OSError:
+                continue
+        # 指向已淘汰 blob 的 jobs 记录在读取时会被视为未命中
+        logger.info(f"Trace archive over {self.max_bytes} bytes, evicted {evicted} blobs")
+
+    def stats(self) -> dict:
+        with self._lock:
+            if self._total_bytes is None and (self.root / "blobs").exists():
+                self._total_bytes = sum(p.stat().st_size for p in (self.root / "blobs").glob("*/*.gz"))
+            return {"enabled": self.enabled, "bytes": self._total_bytes or 0, "max_bytes": self.max_bytes}
+
+class TraceArchiveWriter:
+    def __init__(self, archive: TraceArchive, project_id: int, job_id: int, fd: int, tmp_path: Path):
+        self.archive = archive
+        self.project_id = project_id
+        self.job_id = job_id
+        self.tmp_path = tmp_path
+        self._raw = os.fdopen(fd, "wb")
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode="wb", mtime=0)
+        self._digest = hashlib.sha256()
+        self._closed = False
+
+    def write(self, chunk: bytes):
+        self._digest.update(chunk)
+        self._gz.write(chunk)
+
+    def _close(self):
+        if not self._closed:
+            self._closed = True
+            self._gz.close()
+            self._raw.close()
+
+    def commit(self) -> str:
+        self._close()
+        return self.archive._commit(self.project_id, self.job_id, self._digest.hexdigest(), self.tmp_path)
+
+    def abort(self):
+        """放弃写入（如下载中断、客户端断开），不会留下不完整的归档"""
+        try:
+            self._close()
+        except OSError:
+            pass
+        try:
+            os.unlink(self.tmp_path)
+        except OSError:
+            pass
+
+_archive: Optional[TraceArchive] = None
+_archive_lock = threading.Lock()
+
+def get_trace_archive(api_config) -> TraceArchive:
+    """返回进程级归档实例，首次调用时按 gitlab_api 配置初始化"""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = TraceArchive(resolve_data_path(api_config.trace_archive_dir), api_config.trace_archive_max_mb * 1024 * 1024)
+        return _archive
@@ -0,0 +1,57 @@
+# clients/gitlab/trace_tail.py
+
+from typing import Dict, Optional, Tuple
+from clients.logging.logger import logger
+
+def utf8_complete_length(data: bytes) -> int:
+    """
+    返回 data 中以完整 UTF-8 字符结尾的前缀长度
+    Range 请求可能在多字节字符中间截断，未完成的尾部留到下一次读取
+    """
+    end = len(data)
+    # 最多回看 3 个字节寻找多字节字符的起始字节
+    for back in range(1, min(4, end) + 1):
+        byte = data[end - back]
+        if byte & 0xC0 == 0x80:
+            continue  # 续字节
+        if byte & 0x80 == 0:
+            return end  # ASCII
+        if byte & 0xE0 == 0xC0:
+            needed = 2
+        elif byte & 0xF0 == 0xE0:
+            needed = 3
+        elif byte & 0xF8 == 0xF0:
+            needed = 4
+        else:
+            return end  # 非法字节，交给 decode 的 replace 处理
+        return end if back >= needed else end - back
+    return end
+
+def range_headers(offset: int) -> Optional[Dict[str, str]]:
+    return {"Range": f"bytes={offset}-"} if offset > 0 else None
+
+def chunk_from_response(status_code: int, body: bytes, offset: int) -> Tuple[str, int, int]:
+    """
+    根据 Range 请求的响应计算新增内容与下一次的偏移量
+
+    Args:
+        status_code: 206 表示服务端按 Range 返回；200 表示服务端忽略了 Range，返回完整日志
+        body: 响应体字节
+        offset: 请求时的偏移量
+
+    Returns:
+        tuple: (新增文本, 实际起始偏移量（日志被重置时为 0）, 下一次请求使用的偏移量)
+    """
+    if status_code == 416:
+        # 偏移量已到达末尾，没有新内容
+        return "", offset, offset
+    if status_code == 206:
+        new_bytes = body
+    else:
+        if offset > len(body):
+            # 日志被截断或重置（如 Job 重试），从头开始
+            logger.info(f"Trace shorter than offset {offset}, restarting from 0")
+            offset = 0
+        new_bytes = body[offset:]
+    complete = utf8_complete_length(new_bytes)
+    return new_bytes[:complete].decode("utf-8", errors="replace"), offset, offset + complete
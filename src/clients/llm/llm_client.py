@@ -1,5 +1,4 @@
 # clients/llm/llm_client.py
-import requests
 import json
 import os
 from config.config_manager import ConfigManager
@@ -7,6 +6,7 @@ from models.llm_models import LLMRequest, LLMResponse
 from operations.template.template_manager import TemplateManager
 from typing import Iterator, Dict, Any, Optional
 from clients.logging.logger import logger
+from clients.cassette import get_cassette
 
 class LLMClient:
     def __init__(self):
@@ -15,6 +15,7 @@ class LLMClient:
         self.default_models = config.services.get_llm_models()
         self.api_key = os.getenv("OPENAI_API_KEY", "sk-test-key-for-compatibility-Test")
         self.template_manager = TemplateManager()
+        self.cassette = get_cassette(config)
 
     def fix_code(self, prompt: str, model: Optional[str] = None) -> str:
         """
@@ -47,8 +48,9 @@ class LLMClient:
             "Content-Type": "application/json"
         }
         logger.info(f"Sending non-streaming chat completion request with model: {selected_model}")
-        resp = requests.post(
-            f"{self.api_url}/chat/completions", 
+        resp = self.cassette.request(
+            "POST",
+            f"{self.api_url}/chat/completions",
             json=request.dict(), 
             headers=headers,
             timeout=120
@@ -96,7 +98,8 @@ class LLMClient:
             # 记录即将发起请求的日志
             logger.info(f"正在连接AI服务器，使用模型: {selected_model}")
 
-            with requests.post(
+            with self.cassette.request(
+                "POST",
                 f"{self.api_url}/chat/completions",
                 json=request_data,
                 headers=headers,
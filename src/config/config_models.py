@@ -1,8 +1,20 @@
 # config/config_models.py
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Literal
+from pathlib import Path
 import logging
 
+# 项目根目录：缓存、归档等本地数据的相对路径都相对于这里，与当前工作目录无关，
+# 这样从 src/ 运行的 CLI 与从项目根目录运行的 Web 后端共用同一份数据
+APP_ROOT = Path(__file__).resolve().parent.parent.parent
+
+def resolve_data_path(path: str) -> str:
+    """把配置中的本地数据路径解析为绝对路径（相对路径相对于项目根目录）"""
+    resolved = Path(path).expanduser()
+    if not resolved.is_absolute():
+        resolved = APP_ROOT / resolved
+    return str(resolved)
+
 class PathsConfig(BaseModel):
     git_work_dir: str
     ai_work_dir: str
@@ -42,17 +54,185 @@ class RetryConfig(BaseModel):
         default=10,
         description="调试循环间隔时间（秒）"
     )
+    reuse_mr: bool = Field(
+        default=False,
+        description="调试循环复用同一个 MR：修复提交直接推送到 ai 分支并更新 MR 标题/描述，不再关闭后重建"
+    )
 
 class TimeoutConfig(BaseModel):
     overall_timeout_minutes: int
     pipeline_check_interval: int
 
+class GitLabApiConfig(BaseModel):
+    per_page: int = Field(
+        default=100,
+        ge=1,
+        le=100,
+        description="GitLab 列表接口每页条数（GitLab 上限为 100）"
+    )
+    prefetch_pages: bool = Field(
+        default=True,
+        description="调用方消费当前页时是否并发预取下一页"
+    )
+    http2: bool = Field(
+        default=True,
+        description="异步客户端是否启用 HTTP/2（需安装 h2，未安装时回退到 HTTP/1.1）"
+    )
+    max_connections: int = Field(
+        default=20,
+        ge=1,
+        description="异步客户端连接池的最大连接数"
+    )
+    graphql_ci_status: bool = Field(
+        default=False,
+        description="MR CI 状态接口是否优先使用 GraphQL 单次查询（失败时回退到 REST）"
+    )
+    graphql_url: Optional[str] = Field(
+        default=None,
+        description="GraphQL 接口地址，默认为 <gitlab_http_url>/api/graphql"
+    )
+    project_cache_ttl: int = Field(
+        default=600,
+        ge=0,
+        description="项目路径到项目信息的缓存时间（秒），0 表示不缓存"
+    )
+    project_negative_cache_ttl: int = Field(
+        default=30,
+        ge=0,
+        description="项目不存在时的负缓存时间（秒），0 表示不缓存"
+    )
+    rate_limit_per_minute: Optional[int] = Field(
+        default=None,
+        ge=0,
+        description="进程内 GitLab 请求速率上限（次/分钟），默认取 GITLAB_API_RATE_LIMIT，0 表示不限流"
+    )
+    rate_limit_burst: int = Field(
+        default=20,
+        ge=1,
+        description="令牌桶容量，即允许的瞬时突发请求数"
+    )
+    rate_limit_max_retries: int = Field(
+        default=2,
+        ge=0,
+        description="收到 429 后按 Retry-After 等待并重试的次数"
+    )
+    trace_archive_dir: str = Field(
+        default="cache/trace_archive",
+        description="已结束 Job 日志的本地压缩归档目录（相对路径相对于项目根目录）"
+    )
+    trace_archive_max_mb: int = Field(
+        default=512,
+        ge=0,
+        description="日志归档的最大磁盘占用（MB），超出后按最近访问时间淘汰，0 表示关闭归档"
+    )
+    webhook_secret: Optional[str] = Field(
+        default=None,
+        description="GitLab Webhook 的 Secret Token，未配置时不接收 Webhook"
+    )
+    webhook_fallback_interval: int = Field(
+        default=60,
+        ge=1,
+        description="项目 Webhook 可用时监控的兜底轮询间隔（秒），期间依靠事件即时更新状态"
+    )
+    adaptive_polling: bool = Field(
+        default=True,
+        description="Pipeline 监控是否使用自适应轮询间隔；关闭时按 pipeline_check_interval 固定间隔轮询"
+    )
+    poll_min_interval: float = Field(
+        default=2.0,
+        gt=0,
+        description="自适应轮询的最短间隔（秒），Job 状态变化后使用"
+    )
+    poll_max_interval: float = Field(
+        default=60.0,
+        gt=0,
+        description="自适应轮询的最长间隔（秒），状态长时间不变时逐步退避到该值"
+    )
+    poll_backoff: float = Field(
+        default=1.5,
+        ge=1.0,
+        description="状态无变化时每次轮询间隔的放大倍数"
+    )
+    poll_jitter: float = Field(
+        default=0.2,
+        ge=0,
+        lt=1,
+        description="轮询间隔的随机抖动比例，避免多个监控同时请求"
+    )
+    job_duration_db: str = Field(
+        default="cache/job_durations.sqlite3",
+        description="Job 运行/排队时长记录的 SQLite 文件路径（相对路径相对于项目根目录）"
+    )
+    pipeline_result_db: str = Field(
+        default="cache/pipeline_results.sqlite3",
+        description="按提交 SHA 记录 Pipeline 结论的 SQLite 文件路径（相对路径相对于项目根目录）"
+    )
+    job_duration_samples: int = Field(
+        default=50,
+        ge=1,
+        description="每个 Job 名称保留的最近时长记录条数"
+    )
+    failed_trace_token_budget: int = Field(
+        default=8000,
+        ge=100,
+        description="合并所有失败 Job 日志后放入提示词的 token 上限（按约 4 字符/token 估算）"
+    )
+    fail_fast: Optional[Literal["jobs", "pipeline"]] = Field(
+        default=None,
+        description="出现非 allow_failure 的 Job 失败时立即取消：jobs 取消其余未结束的 Job，pipeline 取消整个 Pipeline；默认不取消"
+    )
+    pipeline_stall_timeout: int = Field(
+        default=1800,
+        ge=0,
+        description="Pipeline 连续多久（秒）没有任何 Job 状态变化即判定为卡住并结束监控，0 表示不检测"
+    )
+    pipeline_discovery_timeout: int = Field(
+        default=180,
+        ge=1,
+        description="推送或合并后等待对应提交（SHA + 分支）的 Pipeline 出现的最长时间（秒）"
+    )
+    pipeline_discovery_interval: float = Field(
+        default=1.0,
+        gt=0,
+        description="等待 Pipeline 出现时的首次轮询间隔（秒），之后按 poll_backoff 退避，最长 poll_max_interval"
+    )
+    cancel_superseded_pipelines: bool = Field(
+        default=True,
+        description="自动取消被取代的 Pipeline（上一轮修复的旧提交、同一提交重复的分支/MR Pipeline）"
+    )
+    infra_retry_max: int = Field(
+        default=2,
+        ge=0,
+        description="Runner/网络等基础设施类失败直接重试 Job 的次数上限（按 Job 名称计），超过后交给 LLM 修复，0 表示不重试"
+    )
+    infra_failure_patterns: List[str] = Field(
+        default_factory=list,
+        description="额外判定为基础设施类失败的日志正则（匹配日志末尾的任一行）"
+    )
+
+class CassetteConfig(BaseModel):
+    mode: Literal["off", "record", "replay"] = Field(
+        default="off",
+        description="GitLab/LLM HTTP 流量录制回放：record 录制真实请求与响应，replay 从录制文件回放而不访问网络"
+    )
+    path: str = Field(
+        default="cache/cassettes/session.jsonl.gz",
+        description="录制文件路径（gzip 压缩的 JSON Lines，敏感信息已脱敏；相对路径相对于项目根目录）"
+    )
+    latency_scale: float = Field(
+        default=1.0,
+        ge=0,
+        description="回放时对录制耗时的缩放倍数，1 为原始耗时，0 表示不等待"
+    )
+
 class AppConfig(BaseModel):
     paths: PathsConfig
     services: ServicesConfig
     authentication: AuthConfig
     retry_config: RetryConfig
     timeout: TimeoutConfig
+    gitlab_api: GitLabApiConfig = Field(default_factory=GitLabApiConfig)
+    cassette: CassetteConfig = Field(default_factory=CassetteConfig)
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "AppConfig":
@@ -62,4 +242,6 @@ class AppConfig(BaseModel):
             authentication=AuthConfig(**data["authentication"]),
             retry_config=RetryConfig(**data.get("retry_config", {})),
             timeout=TimeoutConfig(**data["timeout"]),
+            gitlab_api=GitLabApiConfig(**(data.get("gitlab_api") or {})),
+            cassette=CassetteConfig(**(data.get("cassette") or {})),
         )
\ No newline at end of file
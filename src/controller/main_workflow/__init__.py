@@ -20,6 +20,7 @@ from .step_preparation_phase import (
     git_add_and_show_changes,
     git_commit_with_note,
     git_push_changes,
+    check_noop,
     run_preparation_phase
 )
 from .step_extract_project_info import (
@@ -76,6 +77,7 @@ __all__ = [
     "git_add_and_show_changes",
     "git_commit_with_note",
     "git_push_changes",
+    "check_noop",
     "run_preparation_phase",
     
     # Project info extraction steps
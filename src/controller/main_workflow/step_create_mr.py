@@ -1,9 +1,10 @@
 # controller/main_workflow/step_create_mr.py
 
-import time
 import datetime
 from controller.mr_create_controller import MrCreateController
 from clients.gitlab.pipeline_client import PipelineClient
+from clients.gitlab.pipeline_discovery import wait_for_pipeline
+from clients.gitlab.superseded_pipelines import superseded_pipelines
 from clients.logging.logger import logger
 
 def create_merge_request(config, project_info):
@@ -25,16 +26,21 @@ def create_merge_request(config, project_info):
     )
 
     print("准备编译中，请等待...")
-    time.sleep(10)
 
-    # 获取 MR 创建后的 pipeline
-    pipelines = pipeline_client.list_pipelines(project_info["project_id"], ref="ai")
-    if not pipelines:
+    # 获取 MR 源分支当前提交对应的 pipeline
+    if mr.sha:
+        # 按 MR 查询，同一提交同时有分支与 MR Pipeline 时跟踪 MR Pipeline
+        latest_pipeline = wait_for_pipeline(project_info["project_id"], mr.sha, ref="ai", mr_iid=mr.iid,
+                                            mr_client=mr_ctrl.mr_client, pipeline_client=pipeline_client)
+    else:
+        latest_pipeline = pipeline_client.get_latest_pipeline(project_info["project_id"], ref="ai")
+    if not latest_pipeline:
         logger.error("No pipeline found for 'ai' branch.")
         raise Exception("No pipeline found for 'ai' branch.")
-    project_info["pipeline_id"] = pipelines[0].id
+    project_info["pipeline_id"] = latest_pipeline.id
+    superseded_pipelines.track(project_info["project_id"], latest_pipeline)
 
-    logger.info(f"MR created successfully with pipeline {pipelines[0].id}")
-    print(f"✅ MR 创建完成，Pipeline ID: {pipelines[0].id}", flush=True)
+    logger.info(f"MR created successfully with pipeline {latest_pipeline.id}")
+    print(f"✅ MR 创建完成，Pipeline ID: {latest_pipeline.id}", flush=True)
     
     return mr
\ No newline at end of file
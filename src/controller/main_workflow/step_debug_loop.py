@@ -11,6 +11,9 @@ from controller.loop_controller import LoopController
 from controller.mr_create_controller import MrCreateController
 from clients.gitlab.merge_request_client import MergeRequestClient
 from clients.gitlab.pipeline_client import PipelineClient
+from clients.gitlab.pipeline_discovery import wait_for_pipeline
+from clients.gitlab.superseded_pipelines import superseded_pipelines
+from operations.git.git_commands import get_head_sha
 from clients.logging.logger import logger
 
 def run_debug_loop(config, project_info, mr):
@@ -26,13 +29,13 @@ def run_debug_loop(config, project_info, mr):
     pipeline_client = PipelineClient()
 
     # 修复前关闭当前 MR（GitLab v4 无删除接口，仅支持关闭）
-    def close_mr_if_exists(project_id, mr_iid):
+    def close_mr_if_exists(project_id, mr_iid, mr_obj=None):
         if not mr_iid:
             return
         try:
             logger.info(f"尝试关闭 MR iid={mr_iid}")
             print(f"🔒 关闭当前 MR iid={mr_iid}", flush=True)
-            result = mr_ctrl.mr_client.close_merge_request(project_id, mr_iid)
+            result = mr_ctrl.mr_client.close_merge_request(project_id, mr_iid, mr=mr_obj)
             if result:
                 logger.info(f"MR {mr_iid} 已关闭")
                 print(f"✅ 成功关闭 MR {mr_iid}", flush=True)
@@ -47,6 +50,13 @@ def run_debug_loop(config, project_info, mr):
     debug_interval = getattr(config.retry_config, 'debug_loop_interval', 10)
     logger.info(f"调试循环间隔时间: {debug_interval} 秒")
     print(f"⏱️ 调试循环间隔时间: {debug_interval} 秒", flush=True)
+    reuse_mr = getattr(config.retry_config, 'reuse_mr', False)
+    if reuse_mr:
+        logger.info("调试循环复用同一个 MR")
+        print("♻️ 调试循环复用同一个 MR，修复提交直接推送到 ai 分支", flush=True)
+
+    def reusable(mr_obj):
+        return reuse_mr and mr_obj is not None and getattr(mr_obj, "state", "opened") == "opened"
 
     # 当前活跃的MR变量
     current_mr = mr
@@ -68,7 +78,8 @@ def run_debug_loop(config, project_info, mr):
         # 构建修复提示词
         print("📝 构建修复提示词...", flush=True)
         try:
-            prompt = prompt_ctrl.build_fix_prompt(trace, source_code)
+            # trace 已由 TraceController 按 Job 截取并合并，不再整体截取
+            prompt = prompt_ctrl.build_fix_prompt(trace, source_code, extract_failed=False)
             logger.info("修复提示词构建成功")
             print(f"✅ 修复提示词构建成功，长度: {len(prompt)}", flush=True)
         except Exception as e:
@@ -211,17 +222,26 @@ def run_debug_loop(config, project_info, mr):
             project_info["current_mr_pipeline_id"] = current_mr_pipeline_id
             return True
 
+        if status in ("timeout", "stalled"):
+            print(f"⚠️ MR Pipeline监控结束（{status}），继续下一次循环", flush=True)
+            logger.warning(f"MR Pipeline {current_mr_pipeline_id} 监控结束: {status}")
+            return False
+
         if status == "failed":
             print("❌ MR Pipeline执行失败，开始错误分析...", flush=True)
             logger.info("MR Pipeline执行失败，开始错误分析")
 
-            # 修复前关闭当前MR
+            # 2. 获取失败的Job日志 (Trace)；全部是基础设施类失败时直接重试 Job，不调用 LLM
+            entries = trace_ctrl.collect_failed_traces(project_info["project_id"], jobs)
+            if pipeline_monitor.retry_infra_failures(project_info["project_id"], current_mr_pipeline_id, entries):
+                return False
+
+            # 修复前关闭当前MR（复用模式下保留）
             current_mr_iid = getattr(current_mr, "iid", None) if current_mr else None
-            if current_mr_iid:
-                close_mr_if_exists(project_info["project_id"], current_mr_iid)
+            if current_mr_iid and not reusable(current_mr):
+                close_mr_if_exists(project_info["project_id"], current_mr_iid, current_mr)
 
-            # 2. 获取失败的Job日志 (Trace)
-            trace = trace_ctrl.get_failed_trace(project_info["project_id"], jobs)
+            trace = trace_ctrl.get_failed_trace(project_info["project_id"], jobs, entries)
             if not trace:
                 print("⚠️ 未找到失败的Job日志", flush=True)
                 logger.warning("未找到失败的Job日志")
@@ -257,8 +277,8 @@ def run_debug_loop(config, project_info, mr):
                 return False
 
             # 8. 执行git操作（add, commit, push）
-            print("🔄 修复完成，推送代码并创建新MR", flush=True)
-            logger.info("修复完成，推送代码并创建新MR")
+            print("🔄 修复完成，推送代码并更新MR", flush=True)
+            logger.info("修复完成，推送代码并更新MR")
 
             from controller.main_workflow.step_preparation_phase import (
                 git_add_and_show_changes,
@@ -292,49 +312,72 @@ def run_debug_loop(config, project_info, mr):
                 logger.error(f"git push 失败: {push_result['message']}")
                 return False
 
-            # 9. 创建新的MR
-            print("📝 创建新的 MR...", flush=True)
-            logger.info("创建新的 MR")
-            try:
-                now = datetime.datetime.now().strftime("%H%M%S")
-                current_model = llm_ctrl.get_current_model() or "UnknownModel"
-                mr_title = f"LLM Auto Merge ai->dev [Fix-{debug_idx + 1}-{current_model}-{now}]"
-                
-                # 使用带冲突解决的创建方法
-                new_mr = mr_ctrl.create_mr_with_conflict_resolution(
-                    project_info["project_id"], 
-                    "ai", 
-                    "dev", 
-                    mr_title
-                )
-                current_mr = new_mr
-                logger.info(f"新MR创建成功: iid={new_mr.iid}")
-                print(f"✅ 新MR创建成功: iid={new_mr.iid}", flush=True)
-            except Exception as e:
-                error_msg = f"创建MR失败: {e}"
-                logger.error(error_msg)
-                print(f"❌ {error_msg}", flush=True)
-                return False
+            now = datetime.datetime.now().strftime("%H%M%S")
+            current_model = llm_ctrl.get_current_model() or "UnknownModel"
+            mr_title = f"LLM Auto Merge ai->dev [Fix-{debug_idx + 1}-{current_model}-{now}]"
 
-            # 10. 等待并获取新MR的Pipeline
-            print("⏳ 等待新MR的Pipeline启动...", flush=True)
-            time.sleep(30)  # 等待Pipeline启动
+            # 9. 复用模式下更新当前MR，推送的提交会自动成为它的新 head；否则创建新的MR
+            new_mr = None
+            if reusable(current_mr):
+                try:
+                    new_mr = mr_client.update_merge_request(
+                        project_info["project_id"],
+                        current_mr.iid,
+                        title=mr_title,
+                        description=f"调试循环第 {debug_idx + 1} 次修复（{current_model}）：{commit_note}"
+                    )
+                    if new_mr.state != "opened":
+                        logger.warning(f"MR {current_mr.iid} 已不是开放状态（{new_mr.state}），改为创建新的 MR")
+                        new_mr = None
+                    else:
+                        logger.info(f"已更新MR: iid={new_mr.iid}")
+                        print(f"✅ 已更新MR: iid={new_mr.iid}，第 {debug_idx + 1} 次修复", flush=True)
+                except Exception as e:
+                    logger.warning(f"更新MR失败，改为创建新的 MR: {e}")
+                    print(f"⚠️ 更新MR失败，改为创建新的 MR: {e}", flush=True)
+                    new_mr = None
+
+            if new_mr is None:
+                print("📝 创建新的 MR...", flush=True)
+                logger.info("创建新的 MR")
+                try:
+                    # 使用带冲突解决的创建方法
+                    new_mr = mr_ctrl.create_mr_with_conflict_resolution(
+                        project_info["project_id"], 
+                        "ai", 
+                        "dev", 
+                        mr_title
+                    )
+                    logger.info(f"新MR创建成功: iid={new_mr.iid}")
+                    print(f"✅ 新MR创建成功: iid={new_mr.iid}", flush=True)
+                except Exception as e:
+                    error_msg = f"创建MR失败: {e}"
+                    logger.error(error_msg)
+                    print(f"❌ {error_msg}", flush=True)
+                    return False
+            current_mr = new_mr
 
-            # 获取MR的Pipeline
+            # 10. 等待新MR中本次提交对应的Pipeline出现
+            print("⏳ 等待新MR的Pipeline启动...", flush=True)
             try:
-                mr_pipelines = mr_client.get_merge_request_pipelines(project_info["project_id"], new_mr.iid)
-                if mr_pipelines:
-                    latest_mr_pipeline = mr_pipelines[0]  # 获取最新的Pipeline
-                    current_mr_pipeline_id = latest_mr_pipeline["id"]
+                head_sha = get_head_sha(ai_work_dir)
+                latest_mr_pipeline = wait_for_pipeline(
+                    project_info["project_id"], head_sha, ref="ai",
+                    mr_iid=new_mr.iid, mr_client=mr_client, pipeline_client=pipeline_client
+                )
+                if latest_mr_pipeline:
+                    current_mr_pipeline_id = latest_mr_pipeline.id
+                    # 取消上一轮留下的旧 Pipeline 以及同一提交重复的 Pipeline
+                    superseded_pipelines.track(project_info["project_id"], latest_mr_pipeline)
                     print(f"🔄 找到新MR Pipeline ID: {current_mr_pipeline_id}", flush=True)
                     logger.info(f"找到新MR Pipeline ID: {current_mr_pipeline_id}")
 
                     # 检查Pipeline状态
-                    pipeline_status = str(latest_mr_pipeline.get("status", "")).lower()
+                    pipeline_status = str(latest_mr_pipeline.status or "").lower()
                     logger.info(f"新MR Pipeline状态: {pipeline_status}")
                     print(f"🔍 新MR Pipeline状态: {pipeline_status}", flush=True)
 
-                    if pipeline_status in {"success", "skipped", "canceled"}:
+                    if pipeline_status in {"success", "skipped"}:
                         print("✅ 新MR Pipeline已成功，结束调试循环进入下一阶段", flush=True)
                         logger.info("新MR Pipeline已成功，结束调试循环进入下一阶段")
                         # 更新project_info供后续使用
@@ -369,6 +412,13 @@ def run_debug_loop(config, project_info, mr):
     logger.info("开始调试循环阶段")
     success = loop_ctrl.run_loop(loop_body, config.retry_config.debug_max_time)
 
+    report = superseded_pipelines.report(project_info["project_id"])
+    if report["canceled_pipelines"]:
+        print(f"♻️ 已取消 {report['canceled_pipelines']} 个被取代的 Pipeline，"
+              f"约节省 Runner 时间 {report['saved_runner_seconds'] / 60:.1f} 分钟", flush=True)
+        logger.info(f"Superseded pipelines: {report}")
+    project_info["superseded_pipelines"] = report
+
     if success:
         print("🎉 调试循环成功完成", flush=True)
         logger.info("调试循环成功完成")
@@ -172,7 +172,9 @@ def prepare_project_info_for_workflow(config: AppConfig, preparation_result: Dic
         "remote_url": project_info["remote_url"],
         "git_work_dir": git_work_dir,
         "branch": preparation_result.get("branch", "unknown"),
-        "preparation_completed": True
+        "preparation_completed": True,
+        "noop": preparation_result.get("noop", False),
+        "head_sha": preparation_result.get("head_sha")
     }
     
     logger.info(f"工作流项目信息准备完成: {workflow_project_info['project_name']}")
@@ -1,14 +1,31 @@
 # controller/main_workflow/step_merge_mr.py
-import time
 from controller.mr_merge_controller import MrMergeController
 from clients.logging.logger import logger
 from clients.gitlab.pipeline_client import PipelineClient
+from clients.gitlab.merge_request_client import MergeRequestClient
+from clients.gitlab.pipeline_discovery import wait_for_pipeline
+
+def merged_commit_sha(merge_result, mr_client=None, project_id=None, mr_iid=None):
+    """
+    合并后目标分支上新提交的 SHA：squash 合并取 squash_commit_sha，普通合并取 merge_commit_sha；
+    合并响应中都没有时再查询一次 MR，仍没有则视为 fast-forward 合并，取源分支 HEAD（sha）
+    """
+    if not isinstance(merge_result, dict):
+        return None
+    sha = merge_result.get("squash_commit_sha") or merge_result.get("merge_commit_sha")
+    if sha or mr_client is None:
+        return sha or merge_result.get("sha")
+    try:
+        mr = mr_client.get_merge_request(project_id, mr_iid)
+        return mr.squash_commit_sha or mr.merge_commit_sha or mr.sha
+    except Exception as e:
+        logger.warning(f"Failed to fetch MR {mr_iid} for its merge commit: {e}")
+        return merge_result.get("sha")
 
 def merge_mr_and_wait_pipeline(config, project_info, mr=None):
     mr_merge_ctrl = MrMergeController(config)
     pipeline_client = PipelineClient()
     print("准备部署中，请等待...")
-    time.sleep(3)  # 给 GitLab 几秒触发新 pipeline
     
     # 优先使用调试循环阶段更新的当前MR，如果没有则使用传入的MR
     current_mr = project_info.get("current_mr") or mr
@@ -46,7 +63,7 @@ def merge_mr_and_wait_pipeline(config, project_info, mr=None):
             print(f"❌ Merge failed: {error_reason}")
             
             # 特殊处理：如果是因为没有差异导致无法合并，这可能是正常情况
-            if "no changes" in error_reason.lower() or "no differences" in error_reason.lower():
+            if merge_result.get("reason_code") == "no_changes":
                 logger.info("MR无法合并是因为源分支和目标分支没有差异，这可能表示代码已经是最新的")
                 print("ℹ️ 源分支和目标分支没有差异，可能代码已经是最新的")
                 print("💡 建议：检查ai分支和dev分支是否已经同步")
@@ -78,15 +95,23 @@ def merge_mr_and_wait_pipeline(config, project_info, mr=None):
         project_info["merge_error"] = str(e)
         raise RuntimeError(error_msg)
     
-    # 等待合并后的新pipeline
-    time.sleep(5)
-    pipelines = pipeline_client.list_pipelines(project_info["project_id"], ref="dev")
-    if not pipelines:
+    # 等待合并提交对应的新pipeline，避免取到目标分支上更早的旧 pipeline
+    target_branch = getattr(current_mr, "target_branch", None) or "dev"
+    merge_sha = merged_commit_sha(merge_result, MergeRequestClient(), project_info["project_id"], mr_iid)
+    project_info["merge_commit_sha"] = merge_sha
+    project_info["merge_target_branch"] = target_branch
+    if merge_sha:
+        print(f"⏳ 等待合并提交 {merge_sha[:8]} 的 Pipeline...", flush=True)
+        merged_pipeline = wait_for_pipeline(project_info["project_id"], merge_sha, ref=target_branch,
+                                            pipeline_client=pipeline_client)
+    else:
+        logger.warning(f"Merge commit SHA unknown, falling back to the latest {target_branch} pipeline")
+        merged_pipeline = pipeline_client.get_latest_pipeline(project_info["project_id"], ref=target_branch)
+    if not merged_pipeline:
         logger.warning("Merge 后未发现新的 pipeline，可能需要更长时间等待")
         print("⚠️  No new pipeline detected after merge. This may be normal for some projects.")
         project_info["merged_pipeline_id"] = None
     else:
-        merged_pipeline = pipelines[0]
         project_info["merged_pipeline_id"] = merged_pipeline.id
         logger.info(f"Found post-merge pipeline: {merged_pipeline.id}")
-        print(f"✅ 发现合并后Pipeline: {merged_pipeline.id}")
\ No newline at end of file
+        print(f"✅ 发现合并后Pipeline: {merged_pipeline.id}")
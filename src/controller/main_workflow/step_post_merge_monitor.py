@@ -1,11 +1,8 @@
 # controller/main_workflow/step_post_merge_monitor.py
-import time
-from clients.gitlab.job_client import JobClient
+from clients.gitlab.pipeline_discovery import find_pipeline
+from clients.gitlab.pipeline_result_store import get_pipeline_result_store
+from clients.gitlab.pipeline_watcher import pipeline_watcher, job_key
 from clients.logging.logger import logger
-SUCCESS_STATES = {"success", "skipped", "canceled"}
-RUNNING_STATES = {"running", "pending", "created", "scheduled"}
-FAILED_STATES = {"failed"}
-MANUAL_STATES = {"manual"}
 def monitor_post_merge_pipeline(config, project_info):
     # 检查是否合并失败
     if project_info.get("merge_failed", False):
@@ -21,45 +18,65 @@ def monitor_post_merge_pipeline(config, project_info):
         print("[INFO] 后合并监控步骤也将跳过")
         logger.info(f"Post-merge monitoring skipped because merge was skipped: {reason}")
         return
+    project_id = project_info["project_id"]
+    pipeline_id = project_info.get("merged_pipeline_id")
+    merge_sha = project_info.get("merge_commit_sha")
+    if not pipeline_id and merge_sha:
+        # 合并阶段等待超时后 Pipeline 才出现的情况，按合并提交再查一次
+        try:
+            pipeline = find_pipeline(project_id, merge_sha, project_info.get("merge_target_branch"))
+        except Exception as e:
+            logger.warning(f"Failed to look up pipeline for merge commit {merge_sha[:8]}: {e}")
+            pipeline = None
+        if pipeline is not None:
+            pipeline_id = project_info["merged_pipeline_id"] = pipeline.id
     # 检查是否有pipeline ID
-    if not project_info.get("merged_pipeline_id"):
+    if not pipeline_id:
         print(f"\n[INFO] 没有检测到合并后的Pipeline，跳过监控步骤")
         logger.info("No post-merge pipeline detected, skipping monitoring")
         return
-    job_client = JobClient()
-    project_id = project_info["project_id"]
-    pipeline_id = project_info["merged_pipeline_id"]
+    # 已有成功结论（如 Webhook 已上报）时无需再监控
+    verdict = get_pipeline_result_store(config.gitlab_api).get_pipeline(project_id, pipeline_id)
+    if verdict is not None and verdict["status"] == "success":
+        print(f"\n[✅ 合并后部署完成] Pipeline {pipeline_id} 已有结论")
+        logger.info(f"Post-merge pipeline {pipeline_id} verdict from result cache: success")
+        project_info["post_merge_status"] = "success"
+        return "success"
     print(f"\n[INFO] 开始监控合并后部署 Pipeline (ID: {pipeline_id})")
-    last_statuses = {}
-    dot_count = {}
-    while True:
-        try:
-            jobs = job_client.list_jobs(project_id, pipeline_id)
-            statuses = [job.status for job in jobs]
-            for job in jobs:
-                key = f"{job.stage}-{job.name}" if job.stage else job.name
-                status = job.status
-                prev = last_statuses.get(key)
-                if prev != status:
-                    print(f"\n[Stage: {job.stage}] Job: {job.name} | Status: {status}")
-                    logger.info(f"[Post-Merge Job] {job.name} ({job.stage}) changed: {prev} -> {status}")
-                    last_statuses[key] = status
-                    dot_count[key] = 0
-                else:
-                    print(".", end="", flush=True)
-                    dot_count[key] = dot_count.get(key, 0) + 1
-            if all(s in SUCCESS_STATES for s in statuses):
-                print("\n[✅ 合并后部署完成]")
-                break
-            if any(s in FAILED_STATES for s in statuses):
-                print("\n[❌ 合并后部署失败]")
-                break
-            if any(s in MANUAL_STATES for s in statuses):
-                print("\n[⏸️ 等待人工操作]")
-            time.sleep(2)
-        except Exception as e:
-            logger.error(f"Error monitoring post-merge pipeline: {e}")
-            print(f"\n[❌ 监控出错: {str(e)}]")
-            break
+    manual_reported = False
+    outcome = None
+    try:
+        # 共享的 Pipeline 监控：间隔由自适应轮询决定，收到 Webhook 事件时立即更新；超过总超时或长时间无进展时结束
+        with pipeline_watcher.subscribe(project_id, pipeline_id, config.timeout.pipeline_check_interval,
+                                        config.gitlab_api.webhook_fallback_interval) as subscription:
+            updates = subscription.updates(
+                timeout=config.timeout.overall_timeout_minutes * 60,
+                stall_timeout=config.gitlab_api.pipeline_stall_timeout
+            )
+            for update in updates:
+                outcome = update.outcome
+                changed = {job_key(job) for job, _ in update.changes}
+                for job, prev in update.changes:
+                    print(f"\n[Stage: {job.stage}] Job: {job.name} | Status: {job.status}")
+                    logger.info(f"[Post-Merge Job] {job.name} ({job.stage}) changed: {prev} -> {job.status}")
+                print("." * sum(1 for job in update.jobs if job_key(job) not in changed), end="", flush=True)
+                if update.outcome == "success":
+                    print("\n[✅ 合并后部署完成]")
+                elif update.outcome == "failed":
+                    print("\n[❌ 合并后部署失败]")
+                elif update.outcome == "manual":
+                    if not manual_reported:
+                        print("\n[⏸️ 等待人工操作]")
+                        manual_reported = True
+                elif update.outcome in ("timeout", "stalled"):
+                    print(f"\n[⚠️ 合并后部署监控结束: {update.outcome}]")
+                    logger.warning(f"Post-merge pipeline {pipeline_id} monitoring ended: {update.outcome}")
+    except Exception as e:
+        logger.error(f"Error monitoring post-merge pipeline {pipeline_id}: {e}")
+        print(f"\n[❌ 监控出错: {str(e)}]")
+        outcome = "error"
+        project_info["post_merge_error"] = str(e)
+    project_info["post_merge_status"] = outcome
+    return outcome
 # 确保 monitor_post_merge_pipeline 可被 import
-__all__ = ["monitor_post_merge_pipeline"]
\ No newline at end of file
+__all__ = ["monitor_post_merge_pipeline"]
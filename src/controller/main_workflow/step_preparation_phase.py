@@ -99,6 +99,59 @@ def check_current_git_branch(git_work_dir: str) -> Dict[str, Any]:
             "message": str(e)
         }
 
+def parse_porcelain_v2(output: str) -> Dict[str, Any]:
+    """
+    解析 git status --porcelain=v2 --branch 的输出
+
+    Returns:
+        head: HEAD 提交；upstream: 上游分支名；ahead/behind: 相对上游的提交数（无上游时为 None）；
+        changes: 暂存区/工作区/未跟踪的变更行
+    """
+    info: Dict[str, Any] = {"head": None, "upstream": None, "ahead": None, "behind": None, "changes": []}
+    for line in output.splitlines():
+        if line.startswith("# branch.oid "):
+            oid = line[len("# branch.oid "):].strip()
+            info["head"] = None if oid == "(initial)" else oid
+        elif line.startswith("# branch.upstream "):
+            info["upstream"] = line[len("# branch.upstream "):].strip()
+        elif line.startswith("# branch.ab "):
+            ahead, behind = line[len("# branch.ab "):].split()
+            info["ahead"], info["behind"] = int(ahead), abs(int(behind))
+        elif line and not line.startswith("#"):
+            info["changes"].append(line)
+    return info
+
+def check_noop(git_work_dir: str) -> Dict[str, Any]:
+    """
+    快速判断本次是否无需提交和推送：工作区与暂存区没有变更，且 HEAD 与上游（@{u}）是同一个提交
+
+    一次 git status --porcelain=v2 --branch 即可同时得到变更、HEAD 与上游的差异，不访问远程；
+    无法判断时（命令失败、没有上游）按有变更处理
+    """
+    try:
+        result = subprocess.run(
+            ["git", "status", "--porcelain=v2", "--branch"],
+            cwd=git_work_dir,
+            capture_output=True,
+            text=False,
+            timeout=10
+        )
+        if result.returncode != 0:
+            logger.warning(f"git status 失败，跳过无变更检测: {(result.stderr or b'').decode(errors='ignore')}")
+            return {"noop": False}
+        stdout = result.stdout or b""
+        try:
+            output = stdout.decode("utf-8")
+        except UnicodeDecodeError:
+            output = stdout.decode("gbk", errors="ignore")
+        info = parse_porcelain_v2(output)
+    except Exception as e:
+        logger.warning(f"无变更检测出错: {e}")
+        return {"noop": False}
+    info["noop"] = (not info["changes"] and info["head"] is not None and info["upstream"] is not None
+                    and info["ahead"] == 0 and info["behind"] == 0)
+    return info
+
 def git_add_and_show_changes(git_work_dir: str) -> Dict[str, Any]:
     logger.info("执行 git add . 并显示变更")
     print("📝 添加所有变更到暂存区", flush=True)
@@ -298,6 +351,19 @@ def run_preparation_phase(config: AppConfig, note: str) -> Dict[str, Any]:
     branch_check = check_current_git_branch(git_work_dir)
     if branch_check["status"] != "success":
         return branch_check
+    noop = check_noop(git_work_dir)
+    if noop["noop"]:
+        logger.info(f"工作区无变更且 HEAD 与 {noop['upstream']} 一致（{noop['head']}），跳过提交与推送")
+        print(f"⏭️ 没有需要提交的变更，HEAD 与 {noop['upstream']} 一致，跳过提交与推送", flush=True)
+        return {
+            "status": "success",
+            "message": "准备阶段完成（无变更）",
+            "git_work_dir": git_work_dir,
+            "branch": branch_check.get("branch", "unknown"),
+            "changes": "",
+            "noop": True,
+            "head_sha": noop["head"]
+        }
     add_result = git_add_and_show_changes(git_work_dir)
     if add_result["status"] != "success":
         return add_result
@@ -1,6 +1,7 @@
 # controller/mr_create_controller.py
 
 from clients.gitlab.merge_request_client import MergeRequestClient
+from clients.gitlab.merge_request_bulk import close_merge_requests
 from clients.logging.logger import logger
 
 class MrCreateController:
@@ -46,18 +47,17 @@ class MrCreateController:
                 print("ℹ️ 未发现现有的开放 MR", flush=True)
                 return 0
             
-            closed_count = 0
             for mr in open_mrs:
                 logger.info(f"Found open MR: {mr.iid} - {mr.title}")
                 print(f"🔍 发现开放 MR: {mr.iid} - {mr.title}", flush=True)
-                
-                if self.mr_client.close_merge_request(project_id, mr.iid):
-                    closed_count += 1
-                    logger.info(f"Successfully closed MR {mr.iid}")
-                    print(f"✅ 成功关闭 MR {mr.iid}", flush=True)
-                else:
-                    logger.warning(f"Failed to close MR {mr.iid}")
-                    print(f"⚠️ 关闭 MR {mr.iid} 失败", flush=True)
+
+            # 并发关闭；列表结果已带状态与源分支，不再逐个获取详情
+            results = close_merge_requests(self.mr_client, project_id, open_mrs, source_branch)
+            closed_count = sum(1 for ok in results.values() if ok)
+            for iid, ok in results.items():
+                if not ok:
+                    logger.warning(f"Failed to close MR {iid}")
+                    print(f"⚠️ 关闭 MR {iid} 失败", flush=True)
             
             logger.info(f"Closed {closed_count} out of {len(open_mrs)} open MRs")
             print(f"📊 关闭了 {closed_count}/{len(open_mrs)} 个开放 MR", flush=True)
@@ -1,5 +1,5 @@
 # controller/mr_merge_controller.py
-from clients.gitlab.merge_request_client import MergeRequestClient
+from clients.gitlab.merge_request_client import MergeRequestClient, MergeRejected
 from clients.logging.logger import logger
 class MrMergeController:
     def __init__(self, config):
@@ -18,19 +18,21 @@ class MrMergeController:
             error_msg = str(e)
             logger.warning(f"Merge not possible for MR {mr_iid}: {error_msg}")
             print(f"⚠️  Merge Request {mr_iid} cannot be merged: {error_msg}")
+            reason = e.reason if isinstance(e, MergeRejected) else None
             # 根据错误类型提供建议
-            if "no changes" in error_msg.lower():
+            if reason == "no_changes":
                 print("💡 Suggestion: Check if there are actual differences between the source and target branches.")
-            elif "conflicts" in error_msg.lower():
+            elif reason == "has_conflicts":
                 print("💡 Suggestion: Resolve the merge conflicts in GitLab or locally, then try again.")
-            elif "work in progress" in error_msg.lower():
+            elif reason == "work_in_progress":
                 print("💡 Suggestion: Remove the WIP status from the merge request and try again.")
-            elif "already merged" in error_msg.lower():
+            elif reason == "already_merged":
                 print("✅ The merge request has already been completed.")
             # 返回一个表示无法合并的结果，而不是抛出异常
             return {
                 "status": "cannot_merge",
                 "reason": error_msg,
+                "reason_code": reason,
                 "merge_successful": False
             }
         except Exception as e:
@@ -1,14 +1,16 @@
 # controller/pipeline_monitor_controller.py
 
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from clients.gitlab.job_client import JobClient
 from clients.gitlab.pipeline_client import PipelineClient
+from clients.gitlab.pipeline_watcher import pipeline_watcher, pipeline_outcome, job_key
+from clients.gitlab.pipeline_result_store import get_pipeline_result_store
 from clients.logging.logger import logger
+from operations.trace.failure_classifier import build_classifier
 
-PIPELINE_SUCCESS_STATES = {"success", "skipped", "canceled"}
-PIPELINE_RUNNING_STATES = {"running", "pending", "created", "scheduled"}
-PIPELINE_FAILED_STATES = {"failed"}
-PIPELINE_MANUAL_STATES = {"manual"}
+# fail_fast=jobs 时会被取消的 Job 状态
+CANCELABLE_JOB_STATES = {"created", "pending", "running", "scheduled", "waiting_for_resource", "preparing"}
 
 class PipelineMonitorController:
     """
@@ -19,45 +21,161 @@ class PipelineMonitorController:
         self.job_client = JobClient()
         self.pipeline_client = PipelineClient()
         self.interval = config.timeout.pipeline_check_interval
-        
+        self.classifier = build_classifier(config.gitlab_api.infra_failure_patterns)
+        # (project_id, Job 名称) -> 已因基础设施类失败重试的次数
+        self.infra_retries = {}
+        self._cancel_thread = None
+        self.results = get_pipeline_result_store(config.gitlab_api)
+
+    def _subscribe(self, project_id, pipeline_id, interval=None):
+        """订阅共享的 Pipeline 监控，同一 Pipeline 无论多少会话在看都只检查一次"""
+        return pipeline_watcher.subscribe(
+            project_id, pipeline_id,
+            interval or self.interval,
+            self.config.gitlab_api.webhook_fallback_interval
+        )
+
+    def _limits(self):
+        """返回 (总超时秒数, 无进展超时秒数)"""
+        return self.config.timeout.overall_timeout_minutes * 60, self.config.gitlab_api.pipeline_stall_timeout
+
+    def cancel_remaining(self, project_id, pipeline_id, jobs):
+        """
+        fail_fast 模式下取消失败 Pipeline 中剩余的运行，把 Runner 让给下一轮修复
+        在后台线程执行，调用方可以立即开始收集日志与 LLM 分析
+
+        Returns:
+            执行取消的线程，未开启 fail_fast 时返回 None
+        """
+        mode = self.config.gitlab_api.fail_fast
+        if not mode:
+            return None
+
+        def cancel():
+            try:
+                if mode == "pipeline":
+                    self.pipeline_client.cancel_pipeline(project_id, pipeline_id)
+                    logger.info(f"Fail-fast: canceled pipeline {pipeline_id}")
+                    return
+                pending = [j for j in jobs if j.status in CANCELABLE_JOB_STATES]
+                if not pending:
+                    return
+                with ThreadPoolExecutor(max_workers=min(8, len(pending))) as pool:
+                    results = list(pool.map(lambda j: self._cancel_job(project_id, j), pending))
+                logger.info(f"Fail-fast: canceled {sum(results)}/{len(pending)} remaining jobs of pipeline {pipeline_id}")
+            except Exception as e:
+                logger.warning(f"Fail-fast cancellation of pipeline {pipeline_id} failed: {e}")
+
+        print(f"\n[INFO] fail_fast={mode}：取消 Pipeline {pipeline_id} 剩余的运行", flush=True)
+        thread = threading.Thread(target=cancel, name=f"fail-fast-{pipeline_id}", daemon=True)
+        thread.start()
+        self._cancel_thread = thread
+        return thread
+
+    def retry_infra_failures(self, project_id, pipeline_id, entries):
+        """
+        所有失败 Job 都是基础设施类问题（Runner、网络、磁盘等）时直接重试，省掉一轮 LLM 修复和新的 Pipeline
+        每个 Job 名称最多重试 infra_retry_max 次；有任一代码类失败或超过上限时不重试
+
+        Args:
+            entries: TraceController.collect_failed_traces 返回的 (job, trace) 列表
+
+        Returns:
+            bool: 是否已重试，重试后调用方继续监控同一 Pipeline
+        """
+        limit = self.config.gitlab_api.infra_retry_max
+        if not limit or not entries:
+            return False
+        for job, trace in entries:
+            result = self.classifier.classify(trace, job.failure_reason)
+            if not result.retryable:
+                return False
+            if self.infra_retries.get((project_id, job.name), 0) >= limit:
+                logger.info(f"Job {job.name} reached infra retry limit ({limit}), handing over to LLM")
+                return False
+            logger.info(f"Job {job.name} ({job.id}) failed with infra issue {result.rule}: {result.line}")
+            print(f"\n[INFO] Job {job.name} 为基础设施类失败（{result.rule}），无需修改代码", flush=True)
+
+        # fail_fast 的取消可能还在执行，先等它结束，避免取消刚重试的 Job
+        if self._cancel_thread is not None:
+            self._cancel_thread.join(timeout=30)
+            self._cancel_thread = None
+        try:
+            if self.config.gitlab_api.fail_fast:
+                # 剩余的 Job 已被取消，整条 Pipeline 重试才能把它们一并恢复
+                self.pipeline_client.retry_pipeline(project_id, pipeline_id)
+            else:
+                with ThreadPoolExecutor(max_workers=min(8, len(entries))) as pool:
+                    list(pool.map(lambda entry: self.job_client.retry_job(project_id, entry[0].id), entries))
+        except Exception as e:
+            logger.warning(f"Failed to retry infra failures of pipeline {pipeline_id}: {e}")
+            return False
+        self.results.forget(project_id, pipeline_id)
+        for job, _ in entries:
+            key = (project_id, job.name)
+            self.infra_retries[key] = self.infra_retries.get(key, 0) + 1
+        print(f"[INFO] 已重试 {len(entries)} 个失败 Job，继续监控 Pipeline {pipeline_id}", flush=True)
+        logger.info(f"Retried {len(entries)} infra-failed jobs of pipeline {pipeline_id}")
+        return True
+
+    def _cancel_job(self, project_id, job):
+        try:
+            self.job_client.cancel_job(project_id, job.id)
+            return True
+        except Exception as e:
+            # Job 可能已经结束，无法取消
+            logger.debug(f"Could not cancel job {job.id}: {e}")
+            return False
+
+    def _cached_verdict(self, project_id, pipeline_id):
+        """
+        该 Pipeline 已有结论时直接返回 (status, jobs)，不再订阅监控
+        失败结论会取一次 Job 列表核对（Pipeline 可能已在别处重试），不一致时作废并返回 None
+        """
+        verdict = self.results.get_pipeline(project_id, pipeline_id)
+        if verdict is None:
+            return None
+        if verdict["status"] == "success":
+            return "success", []
+        jobs = self.job_client.list_jobs(project_id, pipeline_id)
+        if pipeline_outcome(jobs) == "failed":
+            return "failed", jobs
+        self.results.forget(project_id, pipeline_id)
+        return None
+
     def monitor(self, project_id, pipeline_id):
-        last_statuses = {}
-        dot_counters = {}
-        while True:
-            jobs = self.job_client.list_jobs(project_id, pipeline_id)
-            all_status = [j.status for j in jobs]
-            for job in jobs:
-                job_key = f"{job.stage}-{job.name}" if job.stage else job.name
-                current_status = job.status
-                previous_status = last_statuses.get(job_key)
-                if previous_status != current_status:
+        cached = self._cached_verdict(project_id, pipeline_id)
+        if cached is not None:
+            print(f"\n[INFO] Pipeline {pipeline_id} 已有结论: {cached[0]}，无需再次等待")
+            logger.info(f"Pipeline {pipeline_id} verdict from result cache: {cached[0]}")
+            return cached
+        timeout, stall_timeout = self._limits()
+        with self._subscribe(project_id, pipeline_id) as subscription:
+            for update in subscription.updates(timeout=timeout, stall_timeout=stall_timeout):
+                changed = {job_key(job) for job, _ in update.changes}
+                for job, previous_status in update.changes:
                     # 状态变更，换行输出变更信息
-                    print(f"\n[Job: {job.name}] Stage: {job.stage} | Status: {current_status}")
-                    logger.info(f"[Job: {job.name}] Status changed: {previous_status} -> {current_status}")
-                    last_statuses[job_key] = current_status
-                    dot_counters[job_key] = 0
-                else:
-                    # 正常只输出点，不换行
-                    print(".", end="", flush=True)
-                    dot_counters[job_key] = dot_counters.get(job_key, 0) + 1
-                    # 不再主动换行，除非状态变更
-            if all(s in PIPELINE_SUCCESS_STATES for s in all_status):
-                print("\n[INFO] Pipeline所有任务完成（成功/跳过/取消），结束。")
-                logger.info("All jobs succeeded/skipped/canceled.")
-                return "success", jobs
-            if any(s in PIPELINE_MANUAL_STATES for s in all_status):
-                print("\n[INFO] Pipeline等待人工操作，等待中...")
-                logger.info("Pipeline has manual state, waiting...")
-                time.sleep(self.interval)
-                continue
-            if any(s in PIPELINE_FAILED_STATES for s in all_status):
-                print("\n[WARN] Pipeline有任务失败，进入修复流程。")
-                logger.info("Pipeline detected failed job.")
-                return "failed", jobs
-            if any(s in PIPELINE_RUNNING_STATES for s in all_status):
-                time.sleep(self.interval)
-                continue
-            time.sleep(self.interval)
+                    print(f"\n[Job: {job.name}] Stage: {job.stage} | Status: {job.status}")
+                    logger.info(f"[Job: {job.name}] Status changed: {previous_status} -> {job.status}")
+                # 正常只输出点，不换行
+                print("." * sum(1 for job in update.jobs if job_key(job) not in changed), end="", flush=True)
+                if update.outcome == "success":
+                    print("\n[INFO] Pipeline所有任务完成（成功/跳过/取消），结束。")
+                    logger.info("All jobs succeeded/skipped/canceled.")
+                    return "success", update.jobs
+                if update.outcome == "failed":
+                    print("\n[WARN] Pipeline有任务失败，进入修复流程。")
+                    logger.info("Pipeline detected failed job.")
+                    self.cancel_remaining(project_id, pipeline_id, update.jobs)
+                    return "failed", update.jobs
+                if update.outcome == "manual":
+                    print("\n[INFO] Pipeline等待人工操作，等待中...")
+                    logger.info("Pipeline has manual state, waiting...")
+                if update.outcome in ("timeout", "stalled"):
+                    print(f"\n[WARN] Pipeline监控结束: {update.outcome}")
+                    logger.warning(f"Pipeline {pipeline_id} monitoring ended: {update.outcome}")
+                    return update.outcome, update.jobs
+        return "timeout", []
 
     def get_latest_pipeline(self, project_id, ref="ai"):
         """
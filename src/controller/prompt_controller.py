@@ -7,7 +7,7 @@ class PromptController:
     def __init__(self):
         self.prompt_builder = PromptBuilder()
 
-    def build_fix_prompt(self, trace, source_code):
-        prompt = self.prompt_builder.build_fix_bug_prompt(trace, source_code)
+    def build_fix_prompt(self, trace, source_code, extract_failed=True):
+        prompt = self.prompt_builder.build_fix_bug_prompt(trace, source_code, extract_failed)
         logger.info("提示词生成完成")
         return prompt
\ No newline at end of file
@@ -1,18 +1,45 @@
 # controller/trace_controller.py
 
+from concurrent.futures import ThreadPoolExecutor
 from clients.gitlab.job_client import JobClient
 from clients.logging.logger import logger
+from operations.template.prompt_builder import PromptBuilder
+from operations.trace.failed_traces import combine_failed_traces, estimate_tokens, rank_failed_jobs
 
 class TraceController:
     def __init__(self):
         self.job_client = JobClient()
 
-    def get_failed_trace(self, project_id, jobs):
-        for job in jobs:
-            if job.status == "failed":
-                trace = self.job_client.get_job_trace(project_id, job.id)
-                logger.info(f"TRACE CONTENT: {trace}")
-                print("测试未通过，正在检查代码...")
-                return trace
-        logger.warning("No failed job trace found.")
-        return ""
\ No newline at end of file
+    def collect_failed_traces(self, project_id, jobs):
+        """
+        并发获取所有失败 Job 的日志
+
+        Returns:
+            list: 按 stage 顺序排列的 (job, trace) 列表
+        """
+        failed = rank_failed_jobs(jobs)
+        if not failed:
+            return []
+        max_workers = min(len(failed), self.job_client.api_config.max_connections)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            traces = list(pool.map(
+                lambda job: self.job_client.get_job_trace(project_id, job.id, status=job.status), failed
+            ))
+        return list(zip(failed, traces))
+
+    def get_failed_trace(self, project_id, jobs, entries=None):
+        """
+        获取所有失败 Job 的日志，清理并截取失败部分后合并为一段，总长度受 failed_trace_token_budget 限制
+        一轮 LLM 修复即可同时看到多个独立的失败；entries 为已获取的 (job, trace) 列表，提供时不再重复下载
+        """
+        if entries is None:
+            entries = self.collect_failed_traces(project_id, jobs)
+        if not entries:
+            logger.warning("No failed job trace found.")
+            return ""
+        budget = self.job_client.api_config.failed_trace_token_budget
+        trace = combine_failed_traces(entries, budget, extract=PromptBuilder().extract_build_failed_content)
+        logger.info(f"Collected traces of {len(entries)} failed jobs (~{estimate_tokens(trace)} tokens)")
+        logger.info(f"TRACE CONTENT: {trace}")
+        print(f"测试未通过（{len(entries)} 个失败 Job），正在检查代码...")
+        return trace
@@ -101,15 +101,33 @@ def run_debug_and_deployment_phase(config, project_info: dict) -> dict:
         
         print(f"✅ GitLab 项目信息获取成功: ID={project_id}", flush=True)
         
+        # 准备阶段没有新提交时，远程 HEAD 的 Pipeline 若已通过，则跳过调试循环直接合并
+        head_green = False
+        if project_info.get("noop") and project_info.get("head_sha"):
+            from clients.gitlab.pipeline_discovery import find_pipeline
+            try:
+                head_pipeline = find_pipeline(project_id, project_info["head_sha"], project_info.get("branch"))
+                head_green = head_pipeline is not None and head_pipeline.status == "success"
+                if head_pipeline is not None:
+                    logger.info(f"Remote head pipeline {head_pipeline.id} status: {head_pipeline.status}")
+                    print(f"🔍 远程 HEAD 的 Pipeline {head_pipeline.id} 状态: {head_pipeline.status}", flush=True)
+            except Exception as e:
+                logger.warning(f"Failed to look up pipeline of remote head: {e}")
+        
         # 创建初始MR
         initial_mr = create_merge_request(config, workflow_project_info)
         
-        # 调试循环 - 可能会创建新的MR并更新到workflow_project_info["current_mr"]
-        debug_result = run_debug_loop(config, workflow_project_info, initial_mr)
-        if debug_result["status"] != "success":
-            logger.error(f"调试循环失败: {debug_result['message']}")
-            print(f"❌ 调试循环失败: {debug_result['message']}", flush=True)
-            return debug_result
+        if head_green:
+            print("⏭️ 代码无变化且 Pipeline 已通过，跳过调试循环，直接进入合并阶段", flush=True)
+            logger.info("No changes and head pipeline is green, skipping debug loop")
+            workflow_project_info["current_mr"] = initial_mr
+        else:
+            # 调试循环 - 可能会创建新的MR并更新到workflow_project_info["current_mr"]
+            debug_result = run_debug_loop(config, workflow_project_info, initial_mr)
+            if debug_result["status"] != "success":
+                logger.error(f"调试循环失败: {debug_result['message']}")
+                print(f"❌ 调试循环失败: {debug_result['message']}", flush=True)
+                return debug_result
         
         # 合并MR并等待Pipeline - 使用调试循环更新的MR信息
         # 检查是否有新的MR被创建
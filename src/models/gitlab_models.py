@@ -26,6 +26,14 @@ class GitLabJob(BaseModel):
     started_at: Optional[str] = None
     finished_at: Optional[str] = None
     web_url: Optional[str] = None
+    duration: Optional[float] = None
+    queued_duration: Optional[float] = None
+    allow_failure: bool = False
+    failure_reason: Optional[str] = None
+class JobTraceChunk(BaseModel):
+    content: str
+    offset: int
+    next_offset: int
 class GitLabUser(BaseModel):
     id: int
     name: str
@@ -45,6 +53,9 @@ class MergeRequest(BaseModel):
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
     merged_at: Optional[str] = None
+    sha: Optional[str] = None
+    merge_commit_sha: Optional[str] = None
+    squash_commit_sha: Optional[str] = None
 class GitLabAPIError(BaseModel):
     message: str
     status_code: Optional[int] = None
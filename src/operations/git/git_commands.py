@@ -247,6 +247,16 @@ def get_current_branch(cwd: str) -> str:
         print(f"fatal: {error_msg}", file=sys.stderr, flush=True)
         raise RuntimeError(error_msg)
 
+def get_head_sha(cwd: str, rev: str = "HEAD") -> str:
+    """Get the full commit SHA of a revision."""
+    try:
+        result = run_git_command(["rev-parse", rev], cwd=cwd)
+        return result.stdout.strip()
+    except Exception as e:
+        error_msg = f"Failed to resolve {rev}: {e}"
+        print(f"fatal: {error_msg}", file=sys.stderr, flush=True)
+        raise RuntimeError(error_msg)
+
 def branch_exists_local(branch: str, cwd: str) -> bool:
     """Check if branch exists locally."""
     try:
@@ -52,20 +52,21 @@ class PromptBuilder:
             logger.warning(f"提取 FAILED 内容时出错: {e}，使用完整日志")
             return trace
 
-    def build_fix_bug_prompt(self, trace: str, source_code: str) -> str:
+    def build_fix_bug_prompt(self, trace: str, source_code: str, extract_failed: bool = True) -> str:
         """
         构建修复 bug 的提示词
         直接使用模板中定义的占位符进行替换
         Args:
             trace: 错误日志
             source_code: 源代码
+            extract_failed: 是否截取 Build FAILED 之后的内容（已按 Job 截取过的合并日志传 False）
         Returns:
             str: 构建好的提示词
         """
         try:
             logger.info("开始构建修复提示词")
             # 1. 提取 Build FAILED/FAILED 之后的内容
-            filtered_trace = self.extract_build_failed_content(trace)
+            filtered_trace = self.extract_build_failed_content(trace) if extract_failed else trace
             logger.debug(f"过滤后的日志长度: {len(filtered_trace)}")
             # 2. 获取模板
             template = self.template_manager.get_fix_bug_prompt()
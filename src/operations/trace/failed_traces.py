@@ -0,0 +1,78 @@
+# operations/trace/failed_traces.py
+
+from typing import Callable, Dict, List, Optional, Tuple
+from .trace_normalizer import normalize_trace
+
+# 粗略估算：平均每个 token 约 4 个字符
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def stage_order(jobs) -> Dict[str, int]:
+    """
+    根据 Job 列表推断 stage 的执行顺序
+    同一 Pipeline 中靠前 stage 的 Job 先创建、id 更小，因此按各 stage 最小 Job id 排序
+    """
+    first_id: Dict[str, int] = {}
+    for job in jobs:
+        stage = job.stage or ""
+        first_id[stage] = min(first_id.get(stage, job.id), job.id)
+    return {stage: idx for idx, stage in enumerate(sorted(first_id, key=first_id.get))}
+
+def rank_failed_jobs(jobs) -> list:
+    """
+    返回需要分析的失败 Job，按 stage 顺序与 Job id 排序
+    靠前 stage 的失败通常是后续失败的根因，排在前面；allow_failure 的失败不参与分析
+    """
+    order = stage_order(jobs)
+    failed = [j for j in jobs if j.status == "failed" and not getattr(j, "allow_failure", False)]
+    return sorted(failed, key=lambda j: (order.get(j.stage or "", len(order)), j.id))
+
+def job_header(job) -> str:
+    return f"===== Job: {job.name} | Stage: {job.stage} | ID: {job.id} ====="
+
+def _fit(text: str, max_chars: int) -> str:
+    """保留日志末尾（错误信息通常在最后），超出部分从开头截掉"""
+    if len(text) <= max_chars:
+        return text
+    marker = "...[前面的日志已截断]...\n"
+    keep = max(0, max_chars - len(marker))
+    return marker + text[len(text) - keep:] if keep else text[len(text) - max_chars:]
+
+def combine_failed_traces(entries: List[Tuple[object, str]], token_budget: int,
+                          extract: Optional[Callable[[str], str]] = None) -> str:
+    """
+    把多个失败 Job 的日志合并为一段提示词内容，每段带 Job 标题
+
+    每条日志先清理（ANSI/区块标记）并可选地用 extract 截取失败部分；
+    总长度不超过 token_budget：先按 Job 数平分预算，日志较短的 Job 用不完的份额再分给其余 Job
+
+    Args:
+        entries: 已排序的 (job, trace) 列表
+        token_budget: 合并结果的 token 上限
+        extract: 从单条日志中截取关键部分的函数
+    """
+    if not entries:
+        return ""
+    sections = []
+    for job, trace in entries:
+        text = normalize_trace(trace or "").strip("\n")
+        if extract is not None:
+            text = extract(text)
+        sections.append((job_header(job), text))
+
+    budget_chars = token_budget * CHARS_PER_TOKEN
+    overhead = sum(len(header) + 2 for header, _ in sections)
+    available = max(0, budget_chars - overhead)
+
+    # 按长度从短到长分配，短日志用不完的份额留给后面的长日志
+    allotted: Dict[int, int] = {}
+    remaining = available
+    pending = sorted(range(len(sections)), key=lambda i: len(sections[i][1]))
+    for n, idx in enumerate(pending):
+        share = remaining // (len(pending) - n)
+        allotted[idx] = min(len(sections[idx][1]), share)
+        remaining -= allotted[idx]
+
+    return "\n\n".join(f"{header}\n{_fit(text, allotted[i])}" for i, (header, text) in enumerate(sections))
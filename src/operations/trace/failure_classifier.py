@@ -0,0 +1,93 @@
+# operations/trace/failure_classifier.py
+
+import re
+from typing import Iterable, List, Optional
+from .trace_normalizer import normalize_trace
+
+INFRA = "infra"
+CODE = "code"
+
+# GitLab 判定的非脚本失败原因（Job 的 failure_reason 字段），重试即可，不需要改代码
+INFRA_FAILURE_REASONS = {
+    "runner_system_failure",
+    "stuck_or_timeout_failure",
+    "scheduler_failure",
+    "api_failure",
+    "data_integrity_failure",
+    "runner_unsupported",
+}
+
+class FailureRule:
+    """一条分类规则：日志中任一行匹配 pattern 即归为 category"""
+    __slots__ = ("name", "pattern", "category")
+
+    def __init__(self, name: str, pattern: str, category: str = INFRA):
+        self.name = name
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+        self.category = category
+
+# Runner 自己输出的失败行（可带 GitLab 日志时间戳前缀）；脚本失败时为 "ERROR: Job failed: exit code N"
+_RUNNER_LINE = r"^\s*(?:\S+Z \w+ )?ERROR: "
+_RUNNER_ERROR = _RUNNER_LINE + r"(?:Job failed|Preparation failed)"
+
+# Runner / 执行器层面的问题，LLM 改代码无法修复。主要依据 failure_reason；日志规则只匹配 Runner 的
+# ERROR 行，脚本输出里的 "Connection refused"、"exit code 137" 等可能是代码本身的问题，不作为依据。
+# 同一行按列表顺序取第一条命中的规则
+DEFAULT_RULES = [
+    FailureRule("job_timeout", _RUNNER_ERROR + r": execution took longer than"),
+    FailureRule("docker_pull", _RUNNER_ERROR + r".*(?:failed to pull image|error pulling image|image pull failed|"
+                                               r"ErrImagePull|ImagePullBackOff|toomanyrequests)"),
+    FailureRule("disk_full", _RUNNER_ERROR + r".*no space left on device"),
+    FailureRule("oom_killed", _RUNNER_ERROR + r".*OOMKilled"),
+    FailureRule("runner_system_failure", _RUNNER_LINE + r"(?:Job failed \(system failure\)|Preparation failed)"),
+]
+
+class FailureClass:
+    """分类结果；rule 为命中的规则名或 failure_reason，line 为命中的日志行"""
+    __slots__ = ("category", "rule", "line")
+
+    def __init__(self, category: str, rule: Optional[str] = None, line: Optional[str] = None):
+        self.category = category
+        self.rule = rule
+        self.line = line
+
+    @property
+    def retryable(self) -> bool:
+        return self.category == INFRA
+
+    def __repr__(self):
+        return f"FailureClass({self.category!r}, {self.rule!r})"
+
+class FailureClassifier:
+    """
+    失败 Job 分类：infra（Runner、网络、资源等问题，重试即可）或 code（需要修复代码）
+
+    GitLab 给出的 failure_reason 属于 INFRA_FAILURE_REASONS 时直接判为 infra；否则只检查清理后日志的
+    最后 tail_lines 行中 Runner 输出的失败行。规则可通过 add_rule 或构造参数扩展
+    """
+
+    def __init__(self, rules: Optional[Iterable[FailureRule]] = None, tail_lines: int = 200):
+        self.rules: List[FailureRule] = list(DEFAULT_RULES if rules is None else rules)
+        self.tail_lines = tail_lines
+
+    def add_rule(self, name: str, pattern: str, category: str = INFRA) -> FailureRule:
+        rule = FailureRule(name, pattern, category)
+        self.rules.append(rule)
+        return rule
+
+    def classify(self, trace: str, failure_reason: Optional[str] = None) -> FailureClass:
+        if failure_reason in INFRA_FAILURE_REASONS:
+            return FailureClass(INFRA, failure_reason)
+        lines = normalize_trace(trace or "").split("\n")[-self.tail_lines:]
+        for line in reversed(lines):
+            for rule in self.rules:
+                if rule.pattern.search(line):
+                    return FailureClass(rule.category, rule.name, line.strip())
+        return FailureClass(CODE)
+
+def build_classifier(patterns: Iterable[str] = ()) -> FailureClassifier:
+    """默认规则加上配置中的额外正则（均归为 infra）"""
+    classifier = FailureClassifier()
+    for idx, pattern in enumerate(patterns):
+        classifier.add_rule(f"custom_{idx + 1}", pattern)
+    return classifier
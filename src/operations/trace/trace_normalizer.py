@@ -0,0 +1,62 @@
+# operations/trace/trace_normalizer.py
+
+import re
+from typing import Iterable, Iterator
+
+# CSI / OSC 等 ANSI 转义序列
+_ANSI_ESCAPE = re.compile(r"\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])")
+# GitLab 折叠区块标记: section_start:<时间戳>:<名称>[<选项>]\r\x1b[0K
+_SECTION_MARKER = re.compile(r"section_(?:start|end):\d+:[A-Za-z0-9_.-]+(?:\[[^\]]*\])?\r?")
+
+def normalize_line(line: str) -> str:
+    """
+    清理单行 Job 日志：去掉区块标记与 ANSI 转义，回车覆盖的进度输出只保留最后一段
+    """
+    line = _SECTION_MARKER.sub("", line)
+    line = _ANSI_ESCAPE.sub("", line)
+    if "\r" in line:
+        segments = [seg for seg in line.split("\r") if seg]
+        line = segments[-1] if segments else ""
+    return line
+
+def normalize_trace(trace: str) -> str:
+    """清理完整的 Job 日志文本"""
+    trace = trace.replace("\r\n", "\n")
+    return "\n".join(normalize_line(line) for line in trace.split("\n"))
+
+class TraceNormalizer:
+    """
+    流式日志清理器：按块输入，只输出完整的行，未结束的行留在缓冲区
+    单行超过 max_pending 字符时直接输出，保证内存占用有上限
+    """
+
+    def __init__(self, max_pending: int = 64 * 1024):
+        self.max_pending = max_pending
+        self._pending = ""
+
+    def feed(self, text: str) -> str:
+        data = (self._pending + text).replace("\r\n", "\n")
+        cut = data.rfind("\n")
+        if cut == -1:
+            if len(data) <= self.max_pending:
+                self._pending = data
+                return ""
+            self._pending = ""
+            return normalize_line(data)
+        # 以 \r 结尾的行可能与下一块的 \n 组成 \r\n，留到下一次处理
+        self._pending = data[cut + 1:]
+        return "\n".join(normalize_line(line) for line in data[:cut].split("\n")) + "\n"
+
+    def flush(self) -> str:
+        data, self._pending = self._pending, ""
+        return normalize_line(data) if data else ""
+
+def iter_normalized(chunks: Iterable[str]) -> Iterator[str]:
+    normalizer = TraceNormalizer()
+    for chunk in chunks:
+        out = normalizer.feed(chunk)
+        if out:
+            yield out
+    tail = normalizer.flush()
+    if tail:
+        yield tail
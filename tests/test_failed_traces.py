@@ -0,0 +1,43 @@
+"""失败 Job 排序与多条日志按 token 预算合并"""
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from models.gitlab_models import GitLabJob
+from operations.trace.failed_traces import CHARS_PER_TOKEN, combine_failed_traces, rank_failed_jobs
+
+
+def job(job_id: int, status: str, name: str = "test", stage: str = "test", **kwargs) -> GitLabJob:
+    return GitLabJob(id=job_id, status=status, name=name, stage=stage, **kwargs)
+
+
+def test_rank_failed_jobs_orders_by_stage_and_skips_allowed_failures():
+    jobs = [
+        job(12, "failed", name="lint", stage="test", allow_failure=True),
+        job(11, "failed", name="unit", stage="test"),
+        job(10, "success", name="build", stage="build"),
+        job(13, "failed", name="deploy", stage="deploy"),
+        job(9, "failed", name="compile", stage="build"),
+    ]
+    assert [j.name for j in rank_failed_jobs(jobs)] == ["compile", "unit", "deploy"]
+
+
+def test_combine_failed_traces_keeps_short_logs_and_tail_of_long_ones():
+    short = job(1, "failed", name="lint")
+    long = job(2, "failed", name="unit")
+    long_trace = "\n".join(f"line {i}" for i in range(2000)) + "\nAssertionError: boom"
+    combined = combine_failed_traces([(short, "\x1b[31mE501 line too long\x1b[0m"), (long, long_trace)],
+                                     token_budget=200)
+    assert "===== Job: lint | Stage: test | ID: 1 =====\nE501 line too long" in combined
+    assert "===== Job: unit | Stage: test | ID: 2 =====" in combined
+    assert combined.endswith("AssertionError: boom")
+    assert "line 0\n" not in combined
+    assert len(combined) <= 200 * CHARS_PER_TOKEN + 2
+
+
+def test_combine_failed_traces_applies_extract():
+    combined = combine_failed_traces([(job(1, "failed"), "noise\nERROR here\nmore noise")], token_budget=100,
+                                     extract=lambda text: text.split("\n")[1])
+    assert combined.split("\n")[1:] == ["ERROR here"]
+    assert combine_failed_traces([], token_budget=100) == ""
@@ -0,0 +1,43 @@
+"""失败分类：Runner 错误行归为 infra，脚本输出归为 code"""
+
+import pytest
+
+from operations.trace.failure_classifier import CODE, INFRA, FailureClassifier, build_classifier
+
+
+@pytest.mark.parametrize("line, rule", [
+    ("ERROR: Job failed (system failure): prepare environment: exit status 1", "runner_system_failure"),
+    ("2024-05-01T10:00:00.000000Z 01E ERROR: Preparation failed: Cannot connect to the Docker daemon",
+     "runner_system_failure"),
+    ("ERROR: Job failed: execution took longer than 1h0m0s seconds", "job_timeout"),
+    ("ERROR: Job failed: failed to pull image \"python:3.12\": toomanyrequests", "docker_pull"),
+    ("ERROR: Job failed: write /builds/tmp: no space left on device", "disk_full"),
+])
+def test_runner_errors_are_infra(line, rule):
+    result = FailureClassifier().classify(f"$ pytest\nrunning\n{line}\n")
+    assert result.category == INFRA
+    assert result.rule == rule
+    assert result.retryable
+
+
+@pytest.mark.parametrize("trace", [
+    "$ pytest\nAssertionError: expected 200, got 500\nERROR: Job failed: exit code 1",
+    # 脚本自身输出的网络/内存错误不作为 infra 依据
+    "requests.exceptions.ConnectionError: Connection refused\nERROR: Job failed: exit code 1",
+    "Killed (exit code 137)\nno space left on device\nERROR: Job failed: exit code 137",
+    "",
+])
+def test_script_failures_are_code(trace):
+    result = FailureClassifier().classify(trace)
+    assert result.category == CODE
+    assert not result.retryable
+
+
+def test_failure_reason_and_custom_rules():
+    classifier = build_classifier([r"Vault: permission denied"])
+    assert classifier.classify("", "stuck_or_timeout_failure").category == INFRA
+    assert classifier.classify("ERROR: Job failed: exit code 1", "script_failure").category == CODE
+    assert classifier.classify("Vault: permission denied\nERROR: Job failed: exit code 1").rule == "custom_1"
+    # 只检查最后 tail_lines 行
+    trace = "ERROR: Job failed (system failure): x\n" + "ok\n" * 10
+    assert FailureClassifier(tail_lines=5).classify(trace).category == CODE
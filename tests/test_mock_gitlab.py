@@ -0,0 +1,173 @@
+"""Mock GitLab 端到端流程：push → Pipeline → 失败 → 重试/取消 → 修复 → 合并"""
+
+import subprocess
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from mock_gitlab import MockGitLab, Scenario, create_app
+from operations.trace.failure_classifier import CODE, INFRA, FailureClassifier
+
+PROJECT = "/api/v4/projects/1"
+
+
+@pytest.fixture
+def gitlab(tmp_path):
+    scenario = Scenario(
+        projects=[{
+            "id": 1,
+            "path": "group/app",
+            "files": {"app.py": "BUG\n"},
+            "jobs": [
+                {"name": "build", "stage": "build", "duration": 1, "queued": 0},
+                {"name": "test", "stage": "test", "duration": 1, "queued": 0,
+                 "fail_if": {"file": "app.py", "pattern": "BUG"}, "failure_log": "AssertionError: BUG found"},
+            ],
+        }],
+        time_scale=0.01,
+        seed=1,
+    )
+    # 端口 9 无服务：post-receive hook 的通知会立即失败，测试中改为显式调用 /_mock/push
+    return MockGitLab(scenario, str(tmp_path / "repos"), "http://127.0.0.1:9")
+
+
+@pytest.fixture
+def client(gitlab):
+    with TestClient(create_app(gitlab)) as client:
+        yield client
+
+
+@pytest.fixture
+def workdir(gitlab, tmp_path):
+    path = tmp_path / "work"
+    git_dir = gitlab.projects[1].repo.git_dir
+    subprocess.run(["git", "clone", "-q", "-b", "dev", git_dir, str(path)], check=True)
+    subprocess.run(["git", "-C", str(path), "checkout", "-q", "-b", "ai"], check=True)
+    return path
+
+
+def push(client, workdir, content: str, message: str) -> int:
+    (workdir / "app.py").write_text(content)
+    git = ["git", "-c", "user.name=Test", "-c", "user.email=test@localhost", "-C", str(workdir)]
+    subprocess.run([*git, "commit", "-q", "-am", message], check=True)
+    before = subprocess.run([*git, "rev-parse", "HEAD~1"], check=True, capture_output=True, text=True).stdout.strip()
+    after = subprocess.run([*git, "rev-parse", "HEAD"], check=True, capture_output=True, text=True).stdout.strip()
+    subprocess.run([*git, "push", "-q", "origin", "ai"], check=True, capture_output=True)
+    resp = client.post("/_mock/push", json={
+        "project": "group/app",
+        "updates": [{"before": before, "after": after, "ref": "refs/heads/ai"}],
+    })
+    assert resp.status_code == 200
+    pipelines = resp.json()["pipelines"]
+    assert len(pipelines) == 1
+    return pipelines[0]
+
+
+def wait_pipeline(client, pipeline_id: int, timeout: float = 10) -> dict:
+    deadline = time.time() + timeout
+    while True:
+        pipeline = client.get(f"{PROJECT}/pipelines/{pipeline_id}").json()
+        if pipeline["status"] not in ("created", "pending", "running") or time.time() > deadline:
+            return pipeline
+        time.sleep(0.02)
+
+
+def jobs_by_name(client, pipeline_id: int) -> dict:
+    return {job["name"]: job for job in client.get(f"{PROJECT}/pipelines/{pipeline_id}/jobs").json()}
+
+
+def test_push_fail_retry_cancel_merge(client, workdir):
+    classifier = FailureClassifier()
+
+    # push 触发 Pipeline，fail_if 命中后 test Job 以脚本错误失败
+    pipeline_id = push(client, workdir, "BUG\nprint('hi')\n", "first try")
+    pipeline = wait_pipeline(client, pipeline_id)
+    assert pipeline["status"] == "failed"
+    assert pipeline["ref"] == "ai"
+    jobs = jobs_by_name(client, pipeline_id)
+    assert jobs["build"]["status"] == "success"
+    failed = jobs["test"]
+    assert failed["status"] == "failed"
+    assert failed["failure_reason"] == "script_failure"
+
+    trace = client.get(f"{PROJECT}/jobs/{failed['id']}/trace").text
+    assert "AssertionError: BUG found" in trace
+    assert classifier.classify(trace, failed["failure_reason"]).category == CODE
+
+    # Range 请求只返回新增部分
+    resp = client.get(f"{PROJECT}/jobs/{failed['id']}/trace", headers={"Range": "bytes=10-"})
+    assert resp.status_code == 206
+    assert resp.text == trace[10:]
+
+    # 脚本错误重试后仍然失败，原 Job 被新 Job 取代
+    resp = client.post(f"{PROJECT}/jobs/{failed['id']}/retry")
+    assert resp.status_code == 201
+    retried = resp.json()
+    assert retried["id"] != failed["id"]
+    assert wait_pipeline(client, pipeline_id)["status"] == "failed"
+    assert jobs_by_name(client, pipeline_id)["test"]["id"] == retried["id"]
+    assert client.post(f"{PROJECT}/jobs/{failed['id']}/retry").status_code == 403
+
+    # API 创建的 Pipeline 可以在运行中取消
+    resp = client.post(f"{PROJECT}/pipeline", json={"ref": "ai"})
+    assert resp.status_code == 201
+    manual = resp.json()
+    assert manual["source"] == "api"
+    canceled = client.post(f"{PROJECT}/pipelines/{manual['id']}/cancel").json()
+    assert canceled["status"] == "canceled"
+    assert all(j["status"] in ("canceled", "skipped") for j in jobs_by_name(client, manual["id"]).values())
+
+    # 修复后的 push 通过
+    fixed_id = push(client, workdir, "print('hi')\n", "fix")
+    fixed = wait_pipeline(client, fixed_id)
+    assert fixed["status"] == "success"
+
+    # 创建并合并 MR，目标分支上启动合并提交的 Pipeline
+    resp = client.post(f"{PROJECT}/merge_requests",
+                       json={"source_branch": "ai", "target_branch": "dev", "title": "Fix BUG"})
+    assert resp.status_code == 201
+    mr = resp.json()
+    assert mr["merge_status"] == "can_be_merged"
+    mr_pipelines = client.get(f"{PROJECT}/merge_requests/{mr['iid']}/pipelines").json()
+    assert fixed_id in [p["id"] for p in mr_pipelines]
+
+    resp = client.put(f"{PROJECT}/merge_requests/{mr['iid']}/merge", json={"sha": fixed["sha"]})
+    assert resp.status_code == 200
+    merged = resp.json()
+    assert merged["state"] == "merged"
+    assert merged["merge_commit_sha"]
+    dev_pipelines = client.get(f"{PROJECT}/pipelines", params={"ref": "dev", "sha": merged["merge_commit_sha"]}).json()
+    assert len(dev_pipelines) == 1
+    assert wait_pipeline(client, dev_pipelines[0]["id"])["status"] == "success"
+    assert client.put(f"{PROJECT}/merge_requests/{mr['iid']}/merge").status_code == 405
+
+    stats = client.get("/_mock/stats").json()
+    assert stats["pipelines"] == {"failed": 1, "canceled": 1, "success": 2}
+    assert stats["api"]["total"] > 0
+    assert stats["api"]["by_status"]["405"] == 1
+
+
+def test_runner_failure_trace_is_infra(tmp_path):
+    scenario = Scenario(
+        projects=[{"id": 1, "path": "group/app", "jobs": [
+            {"name": "flaky", "duration": 1, "queued": 0, "flaky_rate": 1.0},
+        ]}],
+        time_scale=0.01,
+        seed=1,
+    )
+    gitlab = MockGitLab(scenario, str(tmp_path), "http://127.0.0.1:9")
+    with TestClient(create_app(gitlab)) as client:
+        pipeline = client.post(f"{PROJECT}/pipeline", json={"ref": "dev"}).json()
+        assert wait_pipeline(client, pipeline["id"])["status"] == "failed"
+        job = jobs_by_name(client, pipeline["id"])["flaky"]
+        assert job["failure_reason"] == "runner_system_failure"
+        trace = client.get(f"{PROJECT}/jobs/{job['id']}/trace").text
+        # 不依赖 failure_reason，只看日志中的 Runner 错误行
+        result = FailureClassifier().classify(trace)
+        assert result.category == INFRA
+        assert result.rule == "runner_system_failure"
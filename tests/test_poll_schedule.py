@@ -0,0 +1,52 @@
+"""AdaptivePollSchedule：退避、按预计结束时间提前检查与抖动"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from clients.gitlab.job_duration_store import JobDurationStore
+from clients.gitlab.poll_schedule import AdaptivePollSchedule
+from models.gitlab_models import GitLabJob
+
+
+def job(job_id: int, status: str, **kwargs) -> GitLabJob:
+    return GitLabJob(id=job_id, status=status, name="test", stage="test", **kwargs)
+
+
+@pytest.fixture
+def history(tmp_path):
+    return JobDurationStore(str(tmp_path / "durations.db"))
+
+
+def test_poll_backs_off_while_nothing_changes(history):
+    schedule = AdaptivePollSchedule(history, min_interval=2, max_interval=10, backoff=2, jitter=0)
+    jobs = [job(1, "running")]
+    assert schedule.next_delay(1, jobs) == 2
+    assert schedule.next_delay(1, jobs) == 4
+    assert schedule.next_delay(1, jobs) == 8
+    assert schedule.next_delay(1, jobs) == 10
+    assert schedule.next_delay(1, jobs) == 10
+    # 状态变化后立即回到最短间隔
+    assert schedule.next_delay(1, [job(1, "success", duration=3)]) == 2
+
+
+def test_poll_wakes_up_near_predicted_finish(history):
+    history.record_job(1, job(1, "success", duration=30))
+    schedule = AdaptivePollSchedule(history, min_interval=1, max_interval=60, backoff=4, jitter=0)
+    started = (datetime.now(timezone.utc) - timedelta(seconds=25)).isoformat()
+    jobs = [job(2, "running", started_at=started)]
+    schedule.next_delay(1, jobs)
+    # 退避后应等 4 秒，但预计约 5 秒后结束：min(4, 5)
+    assert schedule.next_delay(1, jobs) == pytest.approx(4)
+    # 再退避到 16 秒时，提前到预计结束时间
+    assert schedule.next_delay(1, jobs) == pytest.approx(5, abs=0.5)
+    assert schedule.eta(1, jobs) == pytest.approx(5, abs=0.5)
+
+
+def test_poll_records_finished_jobs_and_applies_jitter(history):
+    schedule = AdaptivePollSchedule(history, min_interval=5, max_interval=5, jitter=0.2)
+    for _ in range(20):
+        assert 4 <= schedule.next_delay(1, [job(1, "success", duration=12)]) <= 6
+    assert history.expected(1, "test") == 12
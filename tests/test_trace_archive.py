@@ -0,0 +1,95 @@
+"""已结束 Job 的日志归档：第二次读取不再请求 GitLab"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("pydantic")
+httpx = pytest.importorskip("httpx")
+
+from clients.gitlab import trace_archive
+from clients.gitlab.async_gitlab_client import AsyncGitLabClient
+from clients.gitlab.async_job_client import AsyncJobClient
+from clients.gitlab.pipeline_events import pipeline_events
+from clients.gitlab.pipeline_watcher import known_job_status
+from config.config_manager import ConfigManager
+from config.config_models import AppConfig
+
+TRACE = b"$ pytest\n" + b"collected 3 items\n" * 2000 + b"ERROR: Job failed: exit code 1\n"
+
+
+@pytest.fixture
+def requests_seen(tmp_path, monkeypatch):
+    config = AppConfig.from_dict({
+        "paths": {"git_work_dir": str(tmp_path / "git"), "ai_work_dir": str(tmp_path / "ai")},
+        "services": {"grpc_port": "localhost:50051", "gitlab_url": str(tmp_path / "repos"),
+                     "gitlab_http_url": "http://gitlab.test", "llm_url": "http://llm.test", "llm_model": "m"},
+        "authentication": {"gitlab_private_token": "token"},
+        "retry_config": {"retry_interval_time": 1, "retry_max_time": 1, "debug_max_time": 1, "total_timeout": 60},
+        "timeout": {"overall_timeout_minutes": 1, "pipeline_check_interval": 1},
+        "gitlab_api": {"trace_archive_dir": str(tmp_path / "archive"), "http2": False},
+    })
+    monkeypatch.setattr(ConfigManager, "_config", config)
+    monkeypatch.setattr(trace_archive, "_archive", None)
+    return []
+
+
+def run(requests_seen, reads):
+    """用 MockTransport 代替 GitLab，依次执行 reads 中的读取，返回各次读取结果"""
+
+    def handler(request):
+        requests_seen.append(request.url.path)
+        return httpx.Response(200, content=TRACE)
+
+    async def main():
+        AsyncGitLabClient._pools[asyncio.get_running_loop()] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return [await read(AsyncJobClient()) for read in reads]
+        finally:
+            await AsyncGitLabClient.aclose()
+
+    return asyncio.run(main())
+
+
+async def stream(client, project_id, job_id, status):
+    return b"".join([chunk async for chunk in client.stream_job_trace(project_id, job_id, status=status)])
+
+
+def test_second_stream_of_finished_job_makes_no_request(requests_seen):
+    # 状态来自 Webhook 事件，读取接口不为确认状态额外请求
+    pipeline_events.apply({"object_kind": "build", "project_id": 71, "pipeline_id": 700,
+                           "build_id": 7001, "build_name": "test", "build_status": "failed"})
+    status = known_job_status(71, 7001)
+    assert status == "failed"
+    first, second = run(requests_seen, [lambda c: stream(c, 71, 7001, status)] * 2)
+    assert first == second == TRACE
+    assert requests_seen == ["/api/v4/projects/71/jobs/7001/trace"]
+
+
+def test_full_incremental_read_of_finished_job_is_archived(requests_seen):
+    first, second = run(requests_seen, [lambda c: c.get_job_trace_since(72, 7002, 0, status="success")] * 2)
+    assert first.content == second.content == TRACE.decode()
+    assert second.next_offset == len(TRACE)
+    assert len(requests_seen) == 1
+
+
+def test_unfinished_or_unknown_job_is_not_archived(requests_seen):
+    assert known_job_status(73, 7003) is None
+    run(requests_seen, [
+        lambda c: stream(c, 73, 7003, "running"),
+        lambda c: stream(c, 73, 7003, None),
+        lambda c: c.get_job_trace(73, 7003),
+    ])
+    assert len(requests_seen) == 3
+
+
+def test_corrupted_archive_falls_back_to_gitlab(requests_seen):
+    run(requests_seen, [lambda c: stream(c, 74, 7004, "success")])
+    archive = trace_archive._archive
+    blob = archive._lookup(74, 7004)
+    blob.write_bytes(blob.read_bytes()[:100])
+
+    # 损坏的归档被丢弃，本次从 GitLab 下载并重新归档，之后再次从归档读取
+    first, second = run(requests_seen, [lambda c: stream(c, 74, 7004, "success")] * 2)
+    assert first == second == TRACE
+    assert len(requests_seen) == 2